@@ -0,0 +1,76 @@
+"""
+Benchmark for partitioned reading of a single large CSV.  Writes synthetic data
+with multi-line resolution descriptions (quoted values with embedded newlines),
+then times reading the whole file with one pandas parser in this process
+against splitting it into byte ranges on record boundaries and parsing the
+ranges in 1, 2, 4, ... worker processes, and prints the throughput (rows per
+second) and the speedup over the single parser for each worker count.
+Run from the repository root:  python benchmarks/bench_partitioned_read.py --rows 2000000
+"""
+
+# Import necessary libraries and set path to normalizer module
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+from benchmarks.synthetic import write_311_csv
+from normalizer.ingest import average_record_bytes, partition_ranges, range_settings, read_range, record_offset
+
+##################################################
+
+# Define the function run by each worker: parse one byte range and return its row count
+def count_range(input_csv: str, start: int, end: int, settings: dict) -> int:
+    return len(read_range(input_csv, start, end, settings))
+
+##################################################
+
+# Define the main benchmark function
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark partitioned CSV reading by worker count")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--range-rows", type=int, default=100_000, help="Rows per byte range")
+    parser.add_argument("--multiline", type=float, default=0.1,
+                        help="Share of resolution descriptions broken over two lines")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = write_311_csv(os.path.join(tmp, "bench.csv"), args.rows, multiline=args.multiline)
+        print(f"{args.rows:,} rows, {os.path.getsize(input_csv) / 2 ** 20:,.0f} MiB")
+
+        # Splitting the file is part of the partitioned read, so it is timed with each run
+        def split():
+            start = record_offset(input_csv, 0, 1)
+            target_bytes = args.range_rows * average_record_bytes(input_csv, start)
+            return partition_ranges(input_csv, target_bytes, start), range_settings(input_csv)
+
+        # Powers of two up to the requested maximum, plus the maximum itself
+        counts = sorted({2 ** n for n in range(args.max_workers.bit_length()) if 2 ** n <= args.max_workers}
+                        | {args.max_workers})
+
+        print(f"{'reader':>14} {'seconds':>10} {'rows/sec':>12} {'speedup':>8}")
+        start = time.perf_counter()
+        rows = len(pd.read_csv(input_csv, low_memory=False))
+        baseline = time.perf_counter() - start
+        print(f"{'read_csv':>14} {baseline:>10.2f} {rows / baseline:>12,.0f} {1:>8.2f}x")
+        for workers in counts:
+            start = time.perf_counter()
+            ranges, settings = split()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rows = sum(pool.map(count_range, repeat(input_csv), *zip(*ranges), repeat(settings)))
+            elapsed = time.perf_counter() - start
+            print(f"{f'{workers} worker(s)':>14} {elapsed:>10.2f} {rows / elapsed:>12,.0f} "
+                  f"{baseline / elapsed:>8.2f}x")
+
+##################################################
+
+# Run the benchmark if this script is executed directly
+if __name__ == "__main__":
+    main()
+
+##################################################
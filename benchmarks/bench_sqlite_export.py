@@ -0,0 +1,55 @@
+"""
+Benchmark for the SQLite export.  Cleans the same synthetic data once, then
+times pandas' to_sql (the previous export path) against the bulk exporter in
+normalizer.sql_exporter, each writing a fresh database file.
+Run from the repository root:  python benchmarks/bench_sqlite_export.py --rows 1000000
+"""
+
+# Import necessary libraries and set path to normalizer module
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.synthetic import generate_311_data
+from normalizer.cleaner import clean_dataframe
+from normalizer.config_loader import load_config
+from normalizer.sql_exporter import export_to_sqlite
+
+##################################################
+
+# Define the previous export path, kept here only as the baseline
+def export_with_to_sql(df, db_path):
+    conn = sqlite3.connect(db_path)
+    df.to_sql("cleaned_data", conn, if_exists="replace", index=False)
+    conn.close()
+
+##################################################
+
+# Define the main benchmark function
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark to_sql against the bulk SQLite exporter")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--config", default="config/config.yaml")
+    args = parser.parse_args()
+
+    cleaned_df, _ = clean_dataframe(generate_311_data(args.rows), load_config(args.config))
+
+    print(f"{'exporter':>10} {'seconds':>10} {'rows/sec':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, export in (("to_sql", export_with_to_sql), ("bulk", export_to_sqlite)):
+            db_path = os.path.join(tmp, f"{name}.db")
+            start = time.perf_counter()
+            export(cleaned_df, db_path)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10} {elapsed:>10.2f} {args.rows / elapsed:>12,.0f}")
+
+##################################################
+
+# Run the benchmark if this script is executed directly
+if __name__ == "__main__":
+    main()
+
+##################################################
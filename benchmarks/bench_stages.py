@@ -0,0 +1,237 @@
+"""
+Benchmark suite timing every stage of a cleaning run separately, so a change
+that slows one stage down shows up even when the total hardly moves.  Seeded
+synthetic 311-style data (benchmarks/synthetic.py) is written to a temporary
+CSV, and then each stage is timed on its own:
+    read, each rule in normalizer.rules (column versions), compile_plan,
+    clean_row (on a sample of rows), clean_dataframe, the pre/post-clean
+    summaries, CSV write, SQLite export and HTML report render.
+The results are written as JSON together with the commit, versions and data
+settings, so runs can be compared between commits with --compare.
+Run from the repository root:
+    python benchmarks/bench_stages.py --size 1m
+    python benchmarks/bench_stages.py --size 1m --compare benchmarks/results/bench_1m_abc1234.json
+"""
+
+# Import necessary libraries and set path to normalizer module
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import SIZES, write_311_csv
+from normalizer import __version__, rules
+from normalizer.cleaner import clean_dataframe, clean_row, compile_plan
+from normalizer.ingest import read_csv
+from normalizer.profiler import profile_dataframe
+from normalizer.reporter import format_profile, write_html_report
+from normalizer.sql_exporter import export_to_sqlite
+
+##################################################
+
+# Folder the results are written to by default
+RESULTS_DIR = "benchmarks/results"
+
+# Maximum number of rows cleaned one at a time by the clean_row stage
+ROW_ENGINE_ROWS = 100_000
+
+# Date format of the synthetic data, and the output format the config converts it to
+INPUT_DATE_FORMAT = "%m/%d/%Y %H:%M"
+OUTPUT_DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+# Config matching the synthetic columns, used unless --config is given
+BENCH_CONFIG = {
+    "field_rules": {
+        "UI_Key": {"ignore": True},
+        "Created_Date": {"trim_whitespace": True, "fix_date_format": {
+            "input_format": INPUT_DATE_FORMAT, "output_format": OUTPUT_DATE_FORMAT}},
+        "Closed_Date": {"replace_nulls_with": {"enabled": True, "value": "Not Specified"}, "trim_whitespace": True,
+                        "fix_date_format": {"input_format": INPUT_DATE_FORMAT, "output_format": OUTPUT_DATE_FORMAT}},
+        "Agency": {"trim_whitespace": True, "normalize_case": "upper", "remove_invalid_chars": True},
+        "Complaint Type": {"trim_whitespace": True, "normalize_case": "title", "remove_invalid_chars": True},
+        "Location_Type": {"trim_whitespace": True, "normalize_case": "title", "remove_invalid_chars": True},
+        "Zip": {"remove_invalid_chars": "zip"},
+        "Resolution_Description": {"replace_nulls_with": {"enabled": True, "value": "Not Specified"},
+                                   "trim_whitespace": True, "normalize_case": "sentence",
+                                   "remove_invalid_chars": "text"},
+    }
+}
+
+# Each rule timed on its own: stage name, column, column function and its arguments
+RULE_STAGES = [
+    ("rules.strip_whitespace", "Location_Type", rules.strip_whitespace_series, {}),
+    ("rules.normalize_case", "Complaint Type", rules.normalize_case_series, {"case_type": "title"}),
+    ("rules.remove_invalid_chars", "Location_Type", rules.remove_invalid_chars_series, {}),
+    ("rules.fix_date_format", "Created_Date", rules.fix_date_format_series,
+     {"input_format": INPUT_DATE_FORMAT, "output_format": OUTPUT_DATE_FORMAT}),
+]
+
+##################################################
+
+# Define the function to time one stage and add its result to the list of stages
+def timed(stages: list, name: str, rows: int, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    stages.append({
+        "stage": name,
+        "rows": rows,
+        "seconds": round(seconds, 6),
+        "rows_per_sec": round(rows / seconds) if seconds else None,
+    })
+    return result
+
+# Define the function to read the short hash of the checked-out commit, if there is one
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+##################################################
+
+"""
+Define the function to run every stage on rows rows of synthetic data and
+return the results: a meta dictionary (commit, versions, machine, data
+settings) and the list of timed stages.  The date parse cache is cleared before
+each date stage so every run starts cold.
+"""
+def run_benchmark(rows: int, seed: int = 42, cardinality: int = None, null_rate: float = 0.05,
+                  mixed_dates: float = 0.1, config: dict = None, row_sample: int = ROW_ENGINE_ROWS) -> dict:
+    config = config or BENCH_CONFIG
+    stages = []
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = os.path.join(tmp, "bench_input.csv")
+        start = time.perf_counter()
+        write_311_csv(input_csv, rows, seed=seed, cardinality=cardinality, null_rate=null_rate,
+                      mixed_dates=mixed_dates)
+        generate_seconds = time.perf_counter() - start
+
+        df = timed(stages, "read", rows, read_csv, input_csv)
+
+        # Each rule on the string values of one column, as clean_dataframe runs them
+        for name, column, func, kwargs in RULE_STAGES:
+            values = df[column].dropna().astype(str)
+            rules.clear_date_cache()
+            timed(stages, name, len(values), func, values, **kwargs)
+
+        plan = timed(stages, "compile_plan", 0, compile_plan, config)
+
+        # The row engine is slow by design, so it only gets a sample of the rows
+        records = df.head(row_sample).to_dict("records")
+        rules.clear_date_cache()
+        timed(stages, "clean_row", len(records), lambda: [clean_row(record, plan) for record in records])
+
+        rules.clear_date_cache()
+        cleaned_df, _ = timed(stages, "clean_dataframe", rows, clean_dataframe, df, plan)
+
+        pre_summary = timed(stages, "summary.pre", rows,
+                            lambda: format_profile(profile_dataframe(df), "Pre-Clean"))
+        post_summary = timed(stages, "summary.post", rows,
+                             lambda: format_profile(profile_dataframe(cleaned_df), "Post-Clean"))
+
+        output_csv = os.path.join(tmp, "bench_CLEANED.csv")
+        timed(stages, "write_csv", rows, cleaned_df.to_csv, output_csv, index=False)
+        db_path = os.path.join(tmp, "bench_CLEANED.db")
+        timed(stages, "export_sqlite", rows, export_to_sqlite, cleaned_df, db_path)
+        timed(stages, "render_report", rows, write_html_report,
+              input_filename="bench_input.csv", config_path="(benchmark config)", clean_data_path=output_csv,
+              sqlite_path=db_path, pre_summary=pre_summary, post_summary=post_summary, changes=None,
+              example_row_number=None, output_path=os.path.join(tmp, "bench_report.html"))
+
+    meta = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "dnt_version": __version__,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "rows": rows,
+        "seed": seed,
+        "cardinality": cardinality,
+        "null_rate": null_rate,
+        "mixed_dates": mixed_dates,
+        "generate_seconds": round(generate_seconds, 6),
+    }
+    return {"meta": meta, "stages": stages}
+
+##################################################
+
+# Define the function to format the stage timings as a table, with the change against a baseline run
+def format_results(results: dict, baseline: dict = None) -> str:
+    before = {stage["stage"]: stage["seconds"] for stage in (baseline or {}).get("stages", [])}
+    header = f"{'stage':<28} {'rows':>10} {'seconds':>10} {'rows/sec':>12}"
+    lines = [header + (f" {'baseline':>10} {'change':>8}" if baseline else "")]
+    for stage in results["stages"]:
+        rate = f"{stage['rows_per_sec']:,}" if stage["rows_per_sec"] and stage["rows"] else "-"
+        line = f"{stage['stage']:<28} {stage['rows']:>10} {stage['seconds']:>10.3f} {rate:>12}"
+        if baseline:
+            old = before.get(stage["stage"])
+            change = f"{100 * (stage['seconds'] - old) / old:+.1f}%" if old else "-"
+            line += f" {f'{old:.3f}' if old is not None else '-':>10} {change:>8}"
+        lines.append(line)
+    # Timings of different data settings are not comparable stage by stage
+    if baseline and baseline["meta"]["rows"] != results["meta"]["rows"]:
+        lines.append(f"Note: the baseline ran on {baseline['meta']['rows']} rows, this run on {results['meta']['rows']}.")
+    return "\n".join(lines)
+
+##################################################
+
+# Define the main benchmark function
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every stage of a cleaning run on synthetic data")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--size", choices=sorted(SIZES), default="10k", help="Named data size (default: 10k)")
+    size.add_argument("--rows", type=int, help="Exact number of rows, instead of a named size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cardinality", type=int, default=None,
+                        help="Distinct values per categorical column (default: the small built-in vocabularies)")
+    parser.add_argument("--null-rate", type=float, default=0.05, help="Share of missing text and date values")
+    parser.add_argument("--mixed-dates", type=float, default=0.1, help="Share of dates in other formats")
+    parser.add_argument("--row-sample", type=int, default=ROW_ENGINE_ROWS,
+                        help=f"Rows cleaned by the clean_row stage (default: {ROW_ENGINE_ROWS})")
+    parser.add_argument("--config", default=None, help="YAML config to clean with (default: built-in config)")
+    parser.add_argument("--output", default=None, help=f"JSON results file (default: in {RESULTS_DIR}/)")
+    parser.add_argument("--compare", default=None, help="Earlier JSON results file to compare against")
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.config:
+        from normalizer.config_loader import load_config
+        config = load_config(args.config)
+    rows = args.rows or SIZES[args.size]
+    results = run_benchmark(rows, seed=args.seed, cardinality=args.cardinality, null_rate=args.null_rate,
+                            mixed_dates=args.mixed_dates, config=config, row_sample=args.row_sample)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        label = args.size if not args.rows else f"{rows}rows"
+        output = os.path.join(RESULTS_DIR, f"bench_{label}_{results['meta']['commit'] or 'nocommit'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+    print(f"Results written to {output}")
+
+##################################################
+
+# Run the benchmark if this script is executed directly
+if __name__ == "__main__":
+    main()
+
+##################################################
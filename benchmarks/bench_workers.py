@@ -0,0 +1,50 @@
+"""
+Benchmark for parallel cleaning.  Cleans the same synthetic data with 1, 2, 4, ...
+worker processes and prints the throughput (rows per second) for each worker count,
+so the scaling can be compared against the single-core run.
+Run from the repository root:  python benchmarks/bench_workers.py --rows 1000000
+"""
+
+# Import necessary libraries and set path to normalizer module
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.synthetic import generate_311_data
+from normalizer.config_loader import load_config
+from normalizer.pipeline import clean_dataframe_parallel
+
+##################################################
+
+# Define the main benchmark function
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cleaning throughput by worker count")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--config", default="config/config.yaml")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    df = generate_311_data(args.rows)
+
+    # Powers of two up to the requested maximum, plus the maximum itself
+    counts = sorted({2 ** n for n in range(args.max_workers.bit_length()) if 2 ** n <= args.max_workers}
+                    | {args.max_workers})
+
+    print(f"{'workers':>8} {'seconds':>10} {'rows/sec':>12} {'speedup':>8}")
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        clean_dataframe_parallel(df, config, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.2f} {args.rows / elapsed:>12,.0f} {baseline / elapsed:>8.2f}x")
+
+##################################################
+
+# Run the benchmark if this script is executed directly
+if __name__ == "__main__":
+    main()
+
+##################################################
@@ -0,0 +1,138 @@
+"""
+This module generates synthetic 311-style data for benchmarks.  The data is
+seeded so every run produces exactly the same rows, and it is deliberately messy:
+stray whitespace, mixed case, invalid characters, and missing values.
+The mess can be tuned:
+1. cardinality: the number of distinct (dirty) spellings in each categorical
+   column, from the small built-in vocabularies up to millions of variants.
+2. null_rate: the share of missing values in the text and date columns.
+3. mixed_dates: the share of dates written in another format than the usual
+   m/d/Y H:M, as in feeds merged from several sources.
+4. multiline: the share of Resolution_Description values broken over several
+   lines, as free text typed into the source system often is; the CSV then
+   holds quoted values with embedded newlines.
+Named sizes (10k, 1m, 10m rows) are used by the benchmark suite, and
+write_311_csv writes large files in pieces so 10 million rows never have to be
+held in memory at once.
+"""
+
+# Import necessary libraries
+import numpy as np
+import pandas as pd
+
+##################################################
+
+# Small vocabularies sampled to build the categorical columns
+AGENCIES = ["NYPD", " nypd", "DSNY", "HPD ", "dot", "DEP", "DOHMH"]
+COMPLAINTS = ["Noise - Commercial", "noise - RESIDENTIAL", "Illegal Parking", "HEAT/HOT WATER", "Blocked Driveway"]
+LOCATIONS = ["Store - Commercial!!!!", "Street - Sidewalk$%^&*", "Residential Building - House#$%", "  Park  "]
+RESOLUTIONS = [
+    "RESPONDED and UPON ARRIVAL those responsible for the condition were gone.",
+    "ReSPONded to the COMPLAINT and took action to fix the condition.",
+    "RESPONDED and determined that ACTION was not necessary.",
+    None,
+]
+
+# Row counts of the named benchmark sizes
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# The usual date format of the feed, and the others mixed in with mixed_dates
+DATE_FORMAT = "%-m/%-d/%Y %-H:%M"
+OTHER_DATE_FORMATS = ["%Y-%m-%d %H:%M", "%m-%d-%Y %H:%M", "%d-%b-%Y %H:%M"]
+
+# Characters the cleaning rules remove, used to dirty generated variants
+JUNK_CHARS = "!@#$%^&*"
+
+# Rows generated at a time by write_311_csv
+CSV_PIECE_ROWS = 500_000
+
+##################################################
+
+# Define the function to build count distinct dirty spellings of a vocabulary
+def dirty_variants(vocabulary: list, count: int, rng) -> list:
+    base = [value for value in vocabulary if value is not None]
+    variants = list(base[:count])
+    for n in range(len(variants), count):
+        value = base[n % len(base)]
+        # Flip the case of random letters, pad with spaces and add stray symbols
+        flips = rng.random(len(value)) < 0.3
+        value = "".join(c.swapcase() if flip else c for c, flip in zip(value, flips))
+        value = " " * int(rng.integers(0, 3)) + value + JUNK_CHARS[int(rng.integers(0, len(JUNK_CHARS)))]
+        # A number keeps every variant distinct once the dirty forms run out
+        variants.append(f"{value} {n // len(base)}")
+    return variants
+
+# Define the function to format dates, writing a share of them in other formats
+def format_dates(dates: pd.DatetimeIndex, mixed_dates: float, rng) -> np.ndarray:
+    values = np.asarray(dates.strftime(DATE_FORMAT), dtype=object)
+    if mixed_dates:
+        mixed = np.flatnonzero(rng.random(len(dates)) < mixed_dates)
+        formats = rng.integers(0, len(OTHER_DATE_FORMATS), size=len(mixed))
+        for n, fmt in enumerate(OTHER_DATE_FORMATS):
+            picked = mixed[formats == n]
+            values[picked] = np.asarray(dates[picked].strftime(fmt), dtype=object)
+    return values
+
+##################################################
+
+"""
+Define the function to generate a DataFrame of synthetic 311-style rows.
+cardinality (None for the built-in vocabularies) sets the distinct values per
+categorical column, null_rate the share of missing text and date values,
+mixed_dates the share of dates in other formats, and multiline the share of
+resolution descriptions with line breaks in them.  first_key sets the first
+UI_Key, so pieces of one large file get consecutive keys.
+"""
+def generate_311_data(rows: int, seed: int = 42, cardinality: int = None, null_rate: float = 0.0,
+                      mixed_dates: float = 0.0, multiline: float = 0.0,
+                      first_key: int = 60_000_000) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(0, 60 * 24 * 365, size=rows)
+    created = pd.Timestamp("2025-01-01") + pd.to_timedelta(minutes, unit="min")
+    closed = created + pd.to_timedelta(rng.integers(5, 600, size=rows), unit="min")
+
+    # Categorical columns, from the built-in vocabularies or cardinality dirty variants of them
+    vocabularies = {"Agency": AGENCIES, "Complaint Type": COMPLAINTS, "Location_Type": LOCATIONS,
+                    "Resolution_Description": RESOLUTIONS}
+    if cardinality:
+        # Variants come from their own fixed seed, so every piece of a file shares them
+        variant_rng = np.random.default_rng(0)
+        vocabularies = {col: dirty_variants(vocabulary, cardinality, variant_rng)
+                        for col, vocabulary in vocabularies.items()}
+
+    # Define a helper to sample one column from its vocabulary
+    def sample(col):
+        return rng.choice(np.array(vocabularies[col], dtype=object), size=rows)
+
+    # Columns are drawn in this order so the default data stays the same as earlier versions
+    df = pd.DataFrame({
+        "UI_Key": np.arange(first_key, first_key + rows),
+        "Created_Date": format_dates(created, mixed_dates, rng),
+        "Closed_Date": format_dates(closed, mixed_dates, rng),
+        "Agency": sample("Agency"),
+        "Complaint Type": sample("Complaint Type"),
+        "Location_Type": sample("Location_Type"),
+        "Zip": rng.integers(10001, 11698, size=rows),
+        "Resolution_Description": sample("Resolution_Description"),
+    })
+    if null_rate:
+        for col in ["Closed_Date", "Agency", "Complaint Type", "Location_Type", "Resolution_Description"]:
+            df.loc[rng.random(rows) < null_rate, col] = None
+    if multiline:
+        # Break the description over two lines before its last word
+        broken = (rng.random(rows) < multiline) & df["Resolution_Description"].notna().to_numpy()
+        df.loc[broken, "Resolution_Description"] = \
+            df.loc[broken, "Resolution_Description"].str.replace(r" (\S+)$", r"\n\1", regex=True)
+    return df
+
+##################################################
+
+# Define the function to write a synthetic CSV file, generating it piece by piece
+def write_311_csv(path: str, rows: int, seed: int = 42, piece_rows: int = CSV_PIECE_ROWS, **options) -> str:
+    for piece, start in enumerate(range(0, rows, piece_rows)):
+        df = generate_311_data(min(piece_rows, rows - start), seed=seed + piece, first_key=60_000_000 + start,
+                               **options)
+        df.to_csv(path, index=False, mode="w" if piece == 0 else "a", header=piece == 0)
+    return path
+
+##################################################
@@ -7,31 +7,151 @@ The logic flow is as follows:
 3. DNT checks for an existing YAML config file in /config/, creates if not found
 4. User decides to regenerate a fresh config from CSV file or use existing config
 5. User confirms the config is acceptable for cleaning to proceed
-6. DNT cleans the CSV data according to the YAML config and exports a clean copy
-7. User decides if they also want a SQLite table of the cleaned data (optional)
+6. User decides if they also want a SQLite table of the cleaned data (optional)
+7. DNT cleans the CSV data according to the YAML config and exports a clean copy
 8. DNT exports the cleaned data to a SQLite database using the same name as the CSV
 9. DNT produces a detailed log and an HTML report of the cleaning process
+Large files can be cleaned in streaming mode with --chunk-size N: the CSV is then
+read, cleaned and written N rows at a time, to both outputs as the chunks go by.
+Cleaning can use several CPU cores with --workers N, in either mode.
+--pipelined (streaming mode, 100,000-row chunks unless --chunk-size is given)
+reads the next chunks and writes every output on their own threads while the
+current chunk is cleaned, so disk and network time overlap with the cleaning.
+--checkpoint-every N (streaming mode) saves a checkpoint every N chunks; if the
+run fails or is killed, running it again with --resume carries on from the last
+checkpoint, as long as the input, config, chunk size and outputs are the same.
+--append is for files that only grow: each run cleans just the rows added since
+the last --append run and appends them to the cleaned CSV (and SQLite table),
+falling back to a full run if the file was truncated or rewritten.
+--partitioned-read (streaming mode) splits the file into byte ranges on record
+boundaries; with --workers N each worker parses and cleans its own ranges, so
+the reading of one large file is spread over the cores too.
+Inputs compressed with gzip, bzip2 or Zstandard (.csv.gz, .csv.bz2, .csv.zst) are
+listed and read directly, decompressed as they are parsed; the cleaned CSV is
+compressed the same way unless the export csv settings of the config say otherwise.
+If the input file, config and options are unchanged since an earlier run, the
+outputs of that run are reused; --force cleans the file again regardless.
+Changes are summarized per field and rule with a sample of examples; with
+--change-log every change is also written to a JSON lines file next to the log.
+--format parquet and/or --format arrow also write the cleaned data as Parquet or
+Arrow IPC (Feather) files, in addition to any formats set in the config.
+--postgres also loads the cleaned data into PostgreSQL with COPY, using the
+postgres section of the config (or the DNT_POSTGRES_URL environment variable).
+The time (and peak memory) of every step and the cost of every rule are written
+to the log, the HTML report and a JSON file next to the log.  --profile also
+traces memory with tracemalloc and runs the cleaning under cProfile, with the
+stats dumped to a .prof file next to the log.
+The heavy modules (pandas, yaml, jinja2, sqlite3) are only imported once the
+flags have been read, so --help and flag errors return right away.  The same
+cleaning runs without prompts through the dnt console script (normalizer/cli.py).
 """
 
 # Import necessary libraries
 import os                            # For file and directory operations   
-import pandas as pd                  # For data manipulation and analysis
+import argparse                      # For optional command-line flags
 import normalizer.file_selector      # Selects input CSV file, supports testing
 
-# Import custom modules
+# Import custom modules; the heavy ones are imported in main() after the flags are read
 from normalizer.file_selector import get_input_csv_path           # User identifies source CSV file
-from normalizer.config_loader import load_config                  # Loads the YAML config file
-from normalizer.config_builder import build_field_rules_config    # Creates config from CSV sample
-from normalizer.reporter import setup_logger                      # Creates a log file
-from normalizer.reporter import summarize_dataframe               # Summarizes the data for logging
-from normalizer.reporter import write_html_report                 # Generates HTML report 
-from normalizer.cleaner import clean_row                          # Cleans a row based on config
-from normalizer.sql_exporter import export_to_sqlite              # Exports clean data to SQLite
+from normalizer.cli import COLUMNAR_FORMATS                       # Columnar formats for --format
+
+##################################################
+
+# Define the function to read optional command-line flags
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Data Normalization Toolkit (DNT)")
+    parser.add_argument(
+        "--chunk-size", type=int, default=None,
+        help="Stream the CSV in chunks of this many rows instead of loading it all into memory"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of worker processes used for cleaning (default: 1)"
+    )
+    parser.add_argument(
+        "--pipelined", action="store_true",
+        help="Stream the CSV with reading, cleaning and each output's writing overlapping on separate threads"
+    )
+    parser.add_argument(
+        "--checkpoint-every", type=int, default=None,
+        help="Save a checkpoint every N chunks so an interrupted run can be resumed (streaming mode)"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Carry on from the last checkpoint of an interrupted run of the same file, config and options"
+    )
+    parser.add_argument(
+        "--append", action="store_true",
+        help="Clean only the rows appended to the file since the last --append run and append them to the outputs"
+    )
+    parser.add_argument(
+        "--partitioned-read", action="store_true",
+        help="Split the CSV into byte ranges on record boundaries, read and cleaned by the workers (streaming mode)"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Clean the file even if an identical earlier run is cached"
+    )
+    parser.add_argument(
+        "--change-log", action="store_true",
+        help="Write every changed value to a JSON lines file next to the log"
+    )
+    parser.add_argument(
+        "--format", dest="formats", action="append", choices=COLUMNAR_FORMATS, default=[],
+        help="Also write the cleaned data in this columnar format (can be repeated)"
+    )
+    parser.add_argument(
+        "--postgres", action="store_true",
+        help="Also load the cleaned data into PostgreSQL (see the postgres section of the config)"
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Trace memory per step and dump cProfile stats of the cleaning to a .prof file next to the log"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.checkpoint_every is not None and args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be at least 1")
+    if args.append and (args.resume or args.checkpoint_every):
+        parser.error("--append cannot be combined with --resume or --checkpoint-every")
+    if args.partitioned_read and (args.pipelined or args.resume or args.checkpoint_every):
+        parser.error("--partitioned-read cannot be combined with --pipelined, --resume or --checkpoint-every")
+    return args
+
+##################################################
+
+# Define the function to ask the user if they want a SQLite export
+def ask_sqlite_export(logger):
+    confirm_sql = input("Export cleaned data to SQLite? (y/n): ").strip().lower()
+    # If user confirms, return True
+    if confirm_sql.startswith("y"):
+        logger.info("User confirmed SQLite export.")
+        print("Exporting cleaned data to SQLite...")
+        return True
+    # If user declines, return False
+    logger.info("User declined SQLite export.")
+    print("Skipping SQLite export.")
+    return False
 
 ##################################################
 
 # Define the main function
-def main():
+def main(argv=None):
+    # Read any optional command-line flags
+    args = parse_args(argv)
+
+    # Import the modules that pull in pandas, yaml and jinja2 only now
+    from normalizer.config_loader import load_config                  # Loads the YAML config file
+    from normalizer.config_builder import build_field_rules_config    # Creates config from CSV sample
+    from normalizer.cleaner import compile_plan                       # Validates and compiles the config
+    from normalizer.reporter import setup_logger                      # Creates a log file
+    from normalizer.rules import date_cache_summary                   # Reports date parsing cache use
+    from normalizer.runner import clean_file, run_modes               # Cleans, exports and reports one file
+    from normalizer.instrumentation import RunMetrics, profiled       # Times each step, optional cProfile
+
     # Initial program message
     print("Welcome to the Data Normalization Toolkit (DNT) v1.01.")
     print("This tool normalizes a CSV file using customizable rules defined in a YAML config.")
@@ -39,6 +159,8 @@ def main():
 
     # Set up the logger to log to a file in /logs/
     logger = setup_logger()
+    # Time every step from here on; --profile also traces memory, which slows the run down
+    metrics = RunMetrics(trace_memory=args.profile)
 
     # Step 1: Prompt for CSV path
     input_csv = get_input_csv_path()
@@ -52,7 +174,8 @@ def main():
     config_exists = os.path.exists(config_path)
     # If config file doesn't exist, build new by reading the CSV columns
     if not config_exists:
-        build_field_rules_config(input_csv, config_path)
+        with metrics.stage("build_config"):
+            build_field_rules_config(input_csv, config_path)
         logger.info(f"Generated new config: {config_path}")
     # If config already exists, ask user if they want to regenerate it or retain current config
     else:
@@ -60,7 +183,8 @@ def main():
         regen = input("Do you want to regenerate a fresh config from the CSV file? (y/n): ").strip().lower()
         if regen == "y":
             # If user chooses to regenerate a new baseline, build a fresh config from CSV columns
-            build_field_rules_config(input_csv, config_path)
+            with metrics.stage("build_config"):
+                build_field_rules_config(input_csv, config_path)
             logger.info(f"Regenerated fresh config.")
         else:
             # If user chooses not to regenerate, use existing config
@@ -73,86 +197,60 @@ def main():
         print("Cleaning aborted.")
         return
 
-    # Step 4: Load config and the dirty source CSV
+    # Step 4: Ask user if they want to export cleaned data to SQLite
+    # Asked before cleaning so streaming mode can write each chunk to both outputs
+    export_sqlite = ask_sqlite_export(logger)
+
+    # Step 5: Load config and compile the field rules once;
+    # unknown rules or bad values are reported here
     print(f"Loading: {input_csv}")
-    config = load_config(config_path)
-    # Read the CSV file into a DataFrame
-    # Use low_memory=False to avoid memory warnings on large files
-    df = pd.read_csv(input_csv, low_memory=False)
-
-    # Step 5: Log pre-clean summary
-    logger.info(summarize_dataframe(df, "Pre-Clean"))
-
-    # Step 6: Clean the rows using YAML config settings
-    print("\nCleaning rows...")
-    cleaned_rows = []
-    # Loop through each row in the DataFrame
-    for i, row in df.iterrows():
-        cleaned, changes = clean_row(row.to_dict(), config)
-        cleaned_rows.append(cleaned)
-    # If changes are made to the data, log for post-cleaning review
-    if changes:
-        logger.info(f"Changes detected in row {i + 1}:")
-        for field, diff in changes.items():
-            logger.info(f"  {field}: '{diff['from']}' ➜ '{diff['to']}'")
-    # Convert cleaned rows back to DataFrame
-    cleaned_df = pd.DataFrame(cleaned_rows)
-
-    # Step 7: Post-clean summary
-    logger.info(summarize_dataframe(cleaned_df, "Post-Clean"))
-
-    # Step 8: Save cleaned CSV to /data/2-CSV-Export
-    output_dir = "data/2-CSV-Export"
-    os.makedirs(output_dir, exist_ok=True)
-    # Append file name with "_CLEANED" to clearly indicate post-cleaning status
-    output_filename = os.path.basename(input_csv).replace(".csv", "_CLEANED.csv")
-    output_path = os.path.join(output_dir, output_filename)
-    cleaned_df.to_csv(output_path, index=False)
-    print(f"Cleaned CSV: {os.path.abspath(output_path)}")
-
-    # Step 9: Ask user if they want to export cleaned data to SQLite
-    confirm_sql = input("Export cleaned data to SQLite? (y/n): ").strip().lower()
-    # If user confirms, set export_sqlite to True
-    if confirm_sql.startswith("y"):
-        logger.info("User confirmed SQLite export.")
-        print("Exporting cleaned data to SQLite...")
-        export_sqlite = True
-    # If user declines, set export_sqlite to False
+    with metrics.stage("load_config"):
+        raw_config = load_config(config_path)
+        config = compile_plan(raw_config)
+
+    # Step 6: Clean the file, export it, and write the log and HTML report
+    # The full list of changes only goes to the sidecar file if --change-log is set
+    log_path = logger.handlers[0].baseFilename
+    sidecar_path = log_path.replace(".log", "_changes.ndjson") if args.change_log else None
+    profile_path = log_path.replace(".log", ".prof") if args.profile else None
+    if args.chunk_size or args.pipelined or args.checkpoint_every or args.resume or args.append \
+            or args.partitioned_read:
+        print(f"\nCleaning rows in chunks of {args.chunk_size or 'the default size'}"
+              + (", pipelined..." if args.pipelined else "..."))
     else:
-        logger.info("User declined SQLite export.")
-        print("Skipping SQLite export.")
-        export_sqlite = False
-
-    # Step 9B: If exporting to SQLite is true, create the directory and export
-    db_path = None
-    if export_sqlite == True:
-        # Ensure the directory exists for SQLite export
-        os.makedirs("data/3-SQLite-Export", exist_ok=True)
-        # Append "_CLEANED" to the database name to match the cleaned CSV
-        db_name = os.path.basename(input_csv).replace(".csv", "_CLEANED.db")
-        db_path = os.path.join("data/3-SQLite-Export", db_name)
-        export_to_sqlite(cleaned_df, db_path, table_name="cleaned_data")
-        absolute_db_path = os.path.abspath(db_path)
-        # Log the SQLite export path and print to terminal for user awareness
-        message = f"SQLite export: {absolute_db_path}"
-        logger.info(message)
-        print(message)
-
-    # Step 10: Create the post-cleaning HTML Report for user review
-    report_path = write_html_report(
-        input_filename=os.path.basename(input_csv),
-        config_path=config_path,
-        clean_data_path=output_path,
-        sqlite_path=db_path if export_sqlite else None,
-        pre_summary=summarize_dataframe(df, "Pre-Clean"),
-        post_summary=summarize_dataframe(cleaned_df, "Post-Clean"),
-        changes=changes if changes else None,
-        example_row_number=i + 1 if changes else None
-    )
+        print("\nCleaning rows...")
+    try:
+        with profiled(profile_path, logger):
+            result = clean_file(
+                input_csv, raw_config, config_path, plan=config, export_sqlite=export_sqlite,
+                chunk_size=args.chunk_size, workers=args.workers, force=args.force,
+                sidecar_path=sidecar_path, logger=logger, formats=args.formats,
+                export_postgres=args.postgres, metrics=metrics,
+                metrics_path=log_path.replace(".log", "_metrics.json"), modes=run_modes(args)
+            )
+    finally:
+        metrics.close()
+    if result["status"] == "cached":
+        print("Input and config are unchanged since the last run; reusing its outputs (use --force to re-clean).")
+    elif result["status"] == "appended":
+        print(f"Appended {result['rows']} new row(s) to the outputs of the last run.")
+
+    # Log how the dates of this run were parsed, and how well the date cache worked
+    logger.info(date_cache_summary())
 
-    # Step 11: Print final messages
-    print(f"Log file: {logger.handlers[0].baseFilename}")
-    print(f"HTML report: {os.path.abspath(report_path)}")
+    # Step 7: Print final messages
+    print(f"Cleaned CSV: {result['csv']}")
+    if result["sqlite"]:
+        print(f"SQLite export: {result['sqlite']}")
+    for fmt, path in result["columnar"].items():
+        print(f"{fmt.capitalize()} export: {path}")
+    if result["postgres"]:
+        print(f"PostgreSQL export: {result['postgres']}")
+    print(f"Log file: {log_path}")
+    print(f"Run timings: {result['metrics']}")
+    if profile_path:
+        print(f"cProfile stats: {profile_path}")
+    print(f"HTML report: {result['report']}")
 
 ##################################################
 
@@ -0,0 +1,6 @@
+"""
+The normalizer package holds the core modules of the Data Normalization Toolkit.
+"""
+
+# Toolkit version, also part of the run cache key
+__version__ = "1.0.1"
@@ -0,0 +1,123 @@
+"""
+This module provides append mode, for raw feeds that are append-only files
+growing through the day.  Rather than cleaning the whole file on every run,
+each run in append mode remembers how far it got:
+1. The byte offset just past the last complete record cleaned, the number of
+   rows before it, and the column types decided so far (ingest.StreamTypes),
+   so the appended rows are typed as in one run over the whole file.
+2. A fingerprint of the file: a hash of its header, and a hash of the bytes
+   just before the offset.
+3. The config hash, toolkit version and outputs of the run, with the size and
+   modification time of each output once it was written.
+The next run checks all of these.  If they still hold, it seeks straight to
+the offset, cleans only the rows appended since with the same compiled config,
+and appends them to the existing cleaned CSV and SQLite table.  If the file is
+shorter than the offset (truncated), its header or the bytes before the offset
+have changed (rewritten), or the config or outputs have changed, the run falls
+back to cleaning the whole file.  The state is kept as JSON in
+.dnt_cache/append, one file per input.
+"""
+
+# Import necessary libraries
+import hashlib
+import json
+import os
+from normalizer import __version__
+from normalizer.ingest import record_offset
+from normalizer.run_cache import CACHE_DIR, HASH_BLOCK_SIZE, config_digest, file_stamp
+
+##################################################
+
+# Folder under the cache directory holding the append state of each input
+APPEND_DIR_NAME = "append"
+
+# Number of bytes before the offset hashed to notice a rewritten file
+TAIL_FINGERPRINT_BYTES = 64 * 1024
+
+##################################################
+
+# Define the function to build the append state path for an input file
+def append_state_path(input_path: str, cache_dir: str = CACHE_DIR) -> str:
+    name = hashlib.blake2b(os.path.abspath(input_path).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, APPEND_DIR_NAME, name + ".json")
+
+##################################################
+
+# Define the function to hash the bytes of a file from start up to end
+def range_digest(path: str, start: int, end: int) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(HASH_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+# Define the function to fingerprint a file's header and the bytes just before offset
+def input_fingerprint(input_csv: str, offset: int) -> dict:
+    header_end = record_offset(input_csv, 0, 1)
+    return {
+        "header": range_digest(input_csv, 0, header_end),
+        "tail": range_digest(input_csv, max(header_end, offset - TAIL_FINGERPRINT_BYTES), offset),
+    }
+
+##################################################
+
+# Define the function to describe what an append-mode run writes, so only the same run is continued
+def append_identity(config: dict, options: dict = None) -> dict:
+    return {"config": config_digest(config), "version": __version__, "options": options or {}}
+
+##################################################
+
+"""
+Define the function to load the append state of an input file and check that
+its rows can be appended to.  Returns the state (with the offset and row count
+to carry on from) and None, or None and the reason the whole file has to be
+cleaned instead.
+"""
+def load_append_state(input_csv: str, identity: dict, cache_dir: str = CACHE_DIR):
+    try:
+        with open(append_state_path(input_csv, cache_dir), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    # A missing or damaged state simply means the file is cleaned from the start
+    except (FileNotFoundError, ValueError):
+        return None, "there is no earlier append-mode run of this file"
+
+    if state.get("identity") != identity:
+        return None, "the config, version or outputs have changed since the last run"
+    for path, stamp in state["outputs"].items():
+        if not os.path.exists(path) or file_stamp(path) != stamp:
+            return None, f"{path} has changed since the last run"
+    if os.path.getsize(input_csv) < state["offset"]:
+        return None, "the file is shorter than at the last run (truncated)"
+    fingerprint = input_fingerprint(input_csv, state["offset"])
+    if fingerprint["header"] != state["fingerprint"]["header"]:
+        return None, "the header has changed since the last run (the file was rewritten)"
+    if fingerprint["tail"] != state["fingerprint"]["tail"]:
+        return None, "the rows cleaned by the last run have changed (the file was rewritten)"
+    return state, None
+
+# Define the function to save how far a run got, once its outputs are written
+def save_append_state(input_csv: str, identity: dict, offset: int, rows: int, outputs: list,
+                      cache_dir: str = CACHE_DIR, column_types: dict = None):
+    state = {
+        "input": os.path.abspath(input_csv),
+        "identity": identity,
+        "offset": offset,
+        "rows": rows,
+        "column_types": column_types or {},
+        "fingerprint": input_fingerprint(input_csv, offset),
+        "outputs": {os.path.abspath(path): file_stamp(path) for path in outputs if path},
+    }
+    path = append_state_path(input_csv, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so an interrupted save never leaves half a state
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+##################################################
@@ -0,0 +1,250 @@
+"""
+This module keeps track of the changes made while cleaning.  Rather than writing
+every changed value to the text log, which floods the disk on large files, it
+keeps aggregate statistics and a small sample:
+1. The number of changed values per field, and per rule within each field,
+   with the calls and time spent in each rule.
+2. A bounded sample of individual changes (row, field, from, to), in which
+   every change has the same chance of being shown as an example in the report.
+3. Optionally, every change written to a newline-delimited JSON sidecar file,
+   one chunk at a time through a buffered file, for full review later.
+The tracker's state can be saved in a checkpoint and restored to resume a run.
+clean_dataframe fills a ChangeBatch for each DataFrame (or chunk, or worker
+partition) it cleans; the ChangeTracker then records the batches in row order.
+"""
+
+# Import necessary libraries
+import os
+import numpy as np
+import pandas as pd
+
+##################################################
+
+# Number of example changes kept for the report
+DEFAULT_SAMPLE_SIZE = 20
+
+# Write buffer of the sidecar file, in bytes
+SIDECAR_BUFFER_SIZE = 1024 * 1024
+
+# Block size used to copy a checkpointed sidecar into a resumed run's sidecar, in bytes
+SIDECAR_COPY_BLOCK_SIZE = 1024 * 1024
+
+##################################################
+
+"""
+Define the changes found while cleaning one DataFrame: changed value counts per
+field and per rule, the calls and seconds of each rule, and the row positions
+of the changed values in each field.  Only positions are kept, so a batch stays
+small enough to send back from a worker process; the values themselves are read
+from the original and cleaned frames when the batch is recorded.
+"""
+class ChangeBatch:
+    def __init__(self):
+        self.field_counts = {}
+        self.rule_counts = {}
+        self.rule_times = {}
+        self.positions = {}
+
+    # Count the values one rule changed in a field
+    def add_rule(self, field, rule: str, count: int):
+        if count:
+            field_rules = self.rule_counts.setdefault(field, {})
+            field_rules[rule] = field_rules.get(rule, 0) + int(count)
+
+    # Add the calls of one rule in a field and the seconds they took
+    def add_time(self, field, rule: str, calls: int, seconds: float):
+        timing = self.rule_times.setdefault(field, {}).setdefault(rule, [0, 0.0])
+        timing[0] += calls
+        timing[1] += seconds
+
+    # Record the positions of the values that differ after cleaning a field
+    def add_field(self, field, changed: np.ndarray):
+        positions = np.flatnonzero(changed)
+        if len(positions):
+            self.field_counts[field] = len(positions)
+            self.positions[field] = positions
+
+##################################################
+
+"""
+Define the change tracker for a whole run.  record() adds one cleaned batch of
+rows; batches must be recorded in row order so row numbers (1-based, as in the
+input file without its header) stay correct.  The sample is a bottom-k sample:
+every change gets a pseudo-random key by hashing its row number and field, and
+the sample_size changes with the smallest keys are kept.  That is a uniform
+random sample, computed for a whole field of a batch at once with numpy, and
+it does not depend on how the rows were split into chunks or partitions.
+row_offset is the number of rows before the first batch, when only rows
+appended to a file since an earlier run are cleaned, so the rows keep their
+numbers in the file; the counts and percentages cover the recorded rows only.
+"""
+class ChangeTracker:
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE, sidecar_path: str = None):
+        self.sample_size = sample_size
+        self.sidecar_path = sidecar_path
+        self.rows = 0
+        self.row_offset = 0
+        self.changes_seen = 0
+        self.field_counts = {}
+        self.rule_counts = {}
+        self.rule_times = {}
+        self.sample = []
+        self.sidecar = open(sidecar_path, "w", encoding="utf-8", buffering=SIDECAR_BUFFER_SIZE) \
+            if sidecar_path else None
+
+    # Add the changes of one cleaned batch of rows
+    def record(self, original: pd.DataFrame, cleaned: pd.DataFrame, batch: ChangeBatch):
+        for field, count in batch.field_counts.items():
+            self.field_counts[field] = self.field_counts.get(field, 0) + count
+        for field, counts in batch.rule_counts.items():
+            field_rules = self.rule_counts.setdefault(field, {})
+            for rule, count in counts.items():
+                field_rules[rule] = field_rules.get(rule, 0) + count
+        for field, timings in batch.rule_times.items():
+            field_times = self.rule_times.setdefault(field, {})
+            for rule, (calls, seconds) in timings.items():
+                timing = field_times.setdefault(rule, [0, 0.0])
+                timing[0] += calls
+                timing[1] += seconds
+
+        for field, positions in batch.positions.items():
+            if self.sidecar:
+                self._write_sidecar(field, positions, original[field], cleaned[field])
+            self._sample(field, positions, original[field], cleaned[field])
+        self.rows += len(original)
+
+    # Write every change in one field of the batch to the sidecar file
+    def _write_sidecar(self, field, positions, original: pd.Series, cleaned: pd.Series):
+        changes = pd.DataFrame({
+            "row": positions + self.row_offset + self.rows + 1,
+            "field": field,
+            "from": np.asarray(original.iloc[positions], dtype=object),
+            "to": np.asarray(cleaned.iloc[positions], dtype=object),
+        })
+        changes.to_json(self.sidecar, orient="records", lines=True, force_ascii=False)
+
+    # Offer the changes in one field of the batch to the sample
+    def _sample(self, field, positions, original: pd.Series, cleaned: pd.Series):
+        self.changes_seen += len(positions)
+        if self.sample_size <= 0:
+            return
+        rows = (positions + self.row_offset + self.rows + 1).astype(np.uint64)
+        field_key = pd.util.hash_array(np.array([str(field)], dtype=object))[0]
+        keys = pd.util.hash_array(rows ^ field_key)
+
+        # Only changes with a smaller key than the current largest sampled one can get in
+        if len(self.sample) == self.sample_size:
+            candidates = np.flatnonzero(keys < self.sample[-1][0])
+        else:
+            candidates = np.arange(len(keys))
+        if len(candidates) > self.sample_size:
+            smallest = np.argpartition(keys[candidates], self.sample_size)[:self.sample_size]
+            candidates = candidates[smallest]
+        if not len(candidates):
+            return
+
+        picked = positions[candidates]
+        from_values = np.asarray(original.iloc[picked], dtype=object).tolist()
+        to_values = np.asarray(cleaned.iloc[picked], dtype=object).tolist()
+        for n, key in enumerate(keys[candidates].tolist()):
+            change = {"row": int(rows[candidates[n]]), "field": field, "from": from_values[n], "to": to_values[n]}
+            self.sample.append((key, change))
+        # Keep the sample sorted by key, so its last entry is the one to beat
+        self.sample.sort(key=lambda entry: entry[0])
+        del self.sample[self.sample_size:]
+
+    # Return the counts, sample and sidecar size recorded so far, to be saved in a checkpoint
+    def state(self) -> dict:
+        if self.sidecar:
+            self.sidecar.flush()
+        return {
+            "rows": self.rows,
+            "changes_seen": self.changes_seen,
+            "field_counts": self.field_counts,
+            "rule_counts": self.rule_counts,
+            "rule_times": self.rule_times,
+            "sample": self.sample,
+            "sidecar_path": os.path.abspath(self.sidecar_path) if self.sidecar_path else None,
+            "sidecar_bytes": os.path.getsize(self.sidecar_path) if self.sidecar else None,
+        }
+
+    """
+    Continue from a state() saved in a checkpoint, before any batch is
+    recorded.  If both runs write a sidecar, the changes the checkpointed run
+    had written are copied into this run's sidecar first, so it ends up
+    holding every change.  This run's sidecar must be a different file, since
+    opening it has already emptied it.
+    """
+    def restore(self, saved: dict):
+        self.rows = saved.get("rows", 0)
+        self.changes_seen = saved.get("changes_seen", 0)
+        self.field_counts = saved.get("field_counts", {})
+        self.rule_counts = saved.get("rule_counts", {})
+        self.rule_times = saved.get("rule_times", {})
+        self.sample = saved.get("sample", [])
+        if not self.sidecar or not saved.get("sidecar_path"):
+            return
+        if saved["sidecar_path"] == os.path.abspath(self.sidecar_path):
+            raise ValueError(f"Cannot resume into the change log the checkpoint points at: {self.sidecar_path}")
+        remaining = saved["sidecar_bytes"]
+        self.sidecar.flush()
+        with open(saved["sidecar_path"], "rb") as source:
+            while remaining > 0:
+                block = source.read(min(SIDECAR_COPY_BLOCK_SIZE, remaining))
+                if not block:
+                    raise ValueError(f"The change log {saved['sidecar_path']} is shorter than at the checkpoint")
+                self.sidecar.buffer.write(block)
+                remaining -= len(block)
+
+    # Close the sidecar file, flushing any buffered changes
+    def close(self):
+        if self.sidecar:
+            self.sidecar.close()
+            self.sidecar = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    """
+    Return the aggregate change statistics for the log and the HTML report:
+    the row count, total changed values, and per-field counts (most changed
+    first) with their per-rule breakdown, plus the sampled changes in row order.
+    """
+    def stats(self) -> dict:
+        fields = [
+            {
+                "field": field,
+                "changed": count,
+                "percent": 100.0 * count / self.rows if self.rows else 0.0,
+                "rules": self.rule_counts.get(field, {}),
+            }
+            for field, count in sorted(self.field_counts.items(), key=lambda item: -item[1])
+        ]
+        return {
+            "rows": self.rows,
+            "changed_values": self.changes_seen,
+            "fields": fields,
+            "sample": sorted((change for _, change in self.sample),
+                             key=lambda change: (change["row"], str(change["field"]))),
+            "sidecar_path": self.sidecar_path,
+        }
+
+    # Return the calls, seconds and changed values of every rule in every field, slowest first
+    def rule_costs(self) -> list:
+        costs = [
+            {
+                "field": field,
+                "rule": rule,
+                "calls": calls,
+                "seconds": round(seconds, 6),
+                "changed": self.rule_counts.get(field, {}).get(rule, 0),
+            }
+            for field, timings in self.rule_times.items()
+            for rule, (calls, seconds) in timings.items()
+        ]
+        return sorted(costs, key=lambda cost: -cost["seconds"])
+
+##################################################
@@ -0,0 +1,188 @@
+"""
+This module provides checkpoints for long streaming runs, so a run that fails
+or is killed part-way through a large file can be resumed instead of starting
+over.  Every few chunks the streaming pipeline saves a checkpoint recording:
+1. The position in the input: the number of rows done, and the byte offset just
+   past them (found by ingest.record_offset), so a resumed read seeks straight
+   there instead of reading the finished rows again.
+2. The committed position of each output: the size of the cleaned CSV, and the
+   row count of the SQLite table (each chunk is committed in its own
+   transaction).
+3. Everything summarized so far: the pre/post-clean DataProfiles, the change
+   counts, the example changes, and the ChangeTracker's counts and sample,
+   along with the column types decided so far (ingest.StreamTypes).
+A checkpoint also records what the run was: the input's size and modification
+time, a hash of the config, the toolkit version, and the options that change
+the output (chunk size and output paths).  A resumed run must match all of them.
+It then cuts the outputs back to their committed positions, restores the
+summaries and carries on from the next chunk, so its outputs are the same as
+those of a run that was never interrupted.
+Checkpoints are pickled to .dnt_cache/checkpoints, one file per input, written
+to a temporary file first so a crash while saving leaves the previous one.
+Outputs that cannot be cut back to a position (Parquet and Arrow files, whose
+footer is written at the end, PostgreSQL, which is loaded in one transaction,
+and incremental SQLite updates) cannot be checkpointed.
+"""
+
+# Import necessary libraries
+import hashlib
+import os
+import pickle
+import sqlite3
+from contextlib import closing
+from normalizer import __version__
+from normalizer.ingest import record_offset
+from normalizer.run_cache import CACHE_DIR, config_digest, file_stamp
+from normalizer.sql_exporter import quote_identifier
+
+##################################################
+
+# Folder under the cache directory holding the checkpoints
+CHECKPOINT_DIR_NAME = "checkpoints"
+
+# Default number of chunks cleaned between two checkpoints
+DEFAULT_CHECKPOINT_EVERY = 10
+
+# Parts of the pipeline state saved in a checkpoint
+SAVED_STATE = ("pre_profile", "post_profile", "change_counts", "example_changes", "column_types")
+
+##################################################
+
+# Define the function to build the checkpoint path for an input file
+def checkpoint_path(input_path: str, cache_dir: str = CACHE_DIR) -> str:
+    name = hashlib.blake2b(os.path.abspath(input_path).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, CHECKPOINT_DIR_NAME, name + ".pkl")
+
+##################################################
+
+# Define the function to describe a run, so a checkpoint is only resumed by the same run
+def run_identity(input_path: str, config: dict, options: dict = None) -> dict:
+    return {
+        "input": os.path.abspath(input_path),
+        "input_stamp": file_stamp(input_path),
+        "config": config_digest(config),
+        "version": __version__,
+        "options": options or {},
+    }
+
+##################################################
+
+"""
+Define the checkpoint of one streaming run.  every sets how many chunks are
+cleaned between two checkpoints.  With resume, the input's last checkpoint is
+loaded and checked against identity (from run_identity); it is then in saved
+(None if there was no checkpoint to resume from).  A checkpoint that does not
+match raises ValueError naming what changed.  save() is called by the
+pipeline once every chunk so far has been written; clear() removes the
+checkpoint once the run has finished.
+"""
+class RunCheckpoint:
+    def __init__(self, input_csv: str, identity: dict, every: int = DEFAULT_CHECKPOINT_EVERY,
+                 resume: bool = False, path: str = None):
+        if not isinstance(every, int) or every < 1:
+            raise ValueError(f"Checkpoints must be taken every positive whole number of chunks, got: {every!r}")
+        self.input_csv = input_csv
+        self.identity = identity
+        self.every = every
+        self.path = path or checkpoint_path(input_csv)
+        self.saved = self.load() if resume else None
+        # Byte offset and row count reached by the last save, found incrementally from there
+        self.position = (self.saved["input_offset"], self.saved["rows"]) if self.saved else None
+
+    # Load the saved checkpoint and check it belongs to this run; None if there is none
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                saved = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as exc:
+            raise ValueError(f"Checkpoint {self.path} cannot be read: {exc}") from None
+        descriptions = {
+            "input": "the input file is a different file",
+            "input_stamp": "the input file has changed",
+            "config": "the config has changed",
+            "version": "the toolkit version has changed",
+            "options": "the chunk size or outputs have changed",
+        }
+        for part, description in descriptions.items():
+            if saved["identity"].get(part) != self.identity.get(part):
+                raise ValueError(
+                    f"Cannot resume from checkpoint {self.path}: {description} since it was written "
+                    f"(checkpoint: {saved['identity'].get(part)!r}, now: {self.identity.get(part)!r})"
+                )
+        return saved
+
+    # Whether a checkpoint is due after this many chunks
+    def due(self, chunks: int) -> bool:
+        return chunks % self.every == 0
+
+    # Find the byte offset of the input just past this many rows
+    def input_offset(self, rows: int) -> int:
+        if self.position is None:
+            # Start from the end of the header
+            self.position = (record_offset(self.input_csv, 0, 1), 0)
+        offset, done = self.position
+        offset = record_offset(self.input_csv, offset, rows - done)
+        self.position = (offset, rows)
+        return offset
+
+    # Save the pipeline state once every chunk so far is in the outputs
+    def save(self, state: dict, output_path: str, tracker=None):
+        checkpoint = {
+            "identity": self.identity,
+            "rows": state["rows"],
+            "chunks": state["chunks"],
+            "input_offset": self.input_offset(state["rows"]),
+            "csv_bytes": os.path.getsize(output_path),
+            "state": {key: state[key] for key in SAVED_STATE},
+            "tracker": tracker.state() if tracker else None,
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write to a temporary file first so an interrupted save keeps the previous checkpoint
+        with open(self.path + ".tmp", "wb") as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(self.path + ".tmp", self.path)
+
+    # Remove the checkpoint once the run it belongs to has finished
+    def clear(self):
+        for path in (self.path, self.path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+##################################################
+
+"""
+Define the function to cut the outputs of an interrupted run back to a
+checkpoint: the cleaned CSV is truncated to its size at the checkpoint, and
+rows added to the SQLite table after it are deleted (rows are kept in rowid
+order, which is the order they were written in).  Raises ValueError if an
+output holds less than it did at the checkpoint, since it has been changed
+since.
+"""
+def rewind_outputs(saved: dict, output_path: str, db_path: str = None, table_name: str = "cleaned_data"):
+    size = saved["csv_bytes"]
+    if not os.path.exists(output_path) or os.path.getsize(output_path) < size:
+        raise ValueError(f"The cleaned CSV {output_path} is shorter than at the checkpoint; clean the file again")
+    os.truncate(output_path, size)
+    if not db_path:
+        return
+
+    rows = saved["rows"]
+    table = quote_identifier(table_name)
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        try:
+            count = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+        except sqlite3.OperationalError:
+            count = 0
+        if count < rows:
+            raise ValueError(f"The SQLite table {table_name} in {db_path} has fewer rows than at the checkpoint")
+        if count > rows and not rows:
+            conn.execute(f"DELETE FROM {table}")
+        elif count > rows:
+            conn.execute(
+                f"DELETE FROM {table} WHERE rowid > (SELECT rowid FROM {table} ORDER BY rowid LIMIT 1 OFFSET ?)",
+                (rows - 1,),
+            )
+
+##################################################
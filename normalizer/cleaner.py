@@ -1,70 +1,265 @@
 """
-This script loops through each row of a dataset and applies cleaning operations
-to each row based on the configuration file that was auto-generated by the
-config_builder.py script.
+This script applies cleaning operations to a dataset based on the configuration
+file that was auto-generated by the config_builder.py script.
+Before any data is touched, compile_plan turns the field_rules of the loaded
+config into an immutable CleaningPlan: for every column, an ordered tuple of
+transform steps with their arguments already bound and no-op steps left out.
+Unknown rule keys and bad values are rejected at this point, once per run.
+Two equivalent engines then run that plan:
+1. clean_row cleans a single row (dictionary) at a time.
+2. clean_dataframe cleans a whole DataFrame column by column, applying each
+   field's steps to the entire column at once with pandas string methods.
+   Low-cardinality columns (few distinct values compared to rows, like Agency)
+   are dictionary-encoded: the steps only run on the distinct values, and the
+   results are mapped back through categorical codes.  Those columns come out
+   as pandas categoricals, which also keeps their memory use low.
+   Given a ChangeBatch (change_tracker.py), clean_dataframe also counts the
+   values each rule changed and where the changed values are.
 """
 
 # Import rules.py from the normalizer module
 # Include pandas for pd.isna()
 # Include typing for backward compatibility
+# Include dataclasses, namedtuple and partial to build the immutable plan
 from normalizer import rules
-import pandas as pd 
+import time
+import numpy as np
+import pandas as pd
 from typing import Tuple, Dict
+from collections import namedtuple
+from dataclasses import dataclass
+from functools import partial
+
+##################################################
+
+# Rule keys allowed for each field in the YAML config
+RULE_KEYS = (
+    "ignore",
+    "replace_nulls_with",
+    "trim_whitespace",
+    "normalize_case",
+    "remove_invalid_chars",
+    "fix_date_format",
+    # Read-time type hint, used by ingest.py rather than by the cleaning plan
+    "dtype",
+)
+
+# Case types accepted by the normalize_case rule
+CASE_TYPES = ("lower", "upper", "title", "sentence")
+
+# Dictionary encoding is used when distinct values / rows is at most this ratio
+DICTIONARY_MAX_RATIO = 0.5
+
+# Columns shorter than this are always cleaned value by value
+DICTIONARY_MIN_ROWS = 1000
+
+# Number of leading rows used to estimate the ratio before encoding a whole column
+DICTIONARY_SAMPLE_ROWS = 10_000
+
+##################################################
+
+# One transform step: its rule name, a single-value function, and a column function
+Step = namedtuple("Step", ["name", "apply", "apply_series"])
+
+# The compiled rules for one column
+@dataclass(frozen=True)
+class FieldPlan:
+    ignore: bool = False
+    replace_nulls: bool = False
+    null_value: object = None
+    steps: tuple = ()
+
+# The compiled rules for every configured column; other columns are left as-is
+# A dictionary_max_ratio of 0 turns dictionary encoding off
+@dataclass(frozen=True)
+class CleaningPlan:
+    fields: tuple = ()
+    dictionary_max_ratio: float = DICTIONARY_MAX_RATIO
+    dictionary_min_rows: int = DICTIONARY_MIN_ROWS
+
+    # Index the (name, FieldPlan) pairs by name once, for fast lookups
+    def __post_init__(self):
+        object.__setattr__(self, "_by_name", dict(self.fields))
+
+    # Look up the plan for a column by name
+    def field(self, name) -> FieldPlan:
+        return self._by_name.get(name, NO_RULES)
+
+# Plan used for columns without any configured rules
+NO_RULES = FieldPlan()
 
 ##################################################
 
 """
-Define the function to clean a single row of data. This function takes a row 
-as a dictionary plus the YAML configuration and returns a new, cleaned dictionary
-with the same keys but transformed values.  It also produces a second dictionary
-with the changes, to enable logging and analysis of the cleaning process.
+Define the function to resolve a remove_invalid_chars setting to the character
+class it keeps.  The setting can be true (the default profile), the name of a
+profile from rules.CHAR_PROFILES (e.g. zip, email, text), or a mapping with a
+custom regex character class, e.g. {allowed: "A-Za-z0-9 "}.  Returns None when
+the rule is off.  The pattern is compiled here so mistakes surface right away.
 """
-def clean_row(row: dict, config: dict) -> tuple[dict, dict]:
+def compile_allowed_chars(name, setting):
+    if setting in (None, False):
+        return None
+    try:
+        if setting is True:
+            allowed = rules.DEFAULT_ALLOWED_CHARS
+        elif isinstance(setting, str):
+            allowed = rules.char_profile(setting)
+        elif isinstance(setting, dict) and set(setting) == {"profile"}:
+            allowed = rules.char_profile(setting["profile"])
+        elif isinstance(setting, dict) and set(setting) == {"allowed"} and isinstance(setting["allowed"], str):
+            allowed = setting["allowed"]
+        else:
+            raise ValueError(
+                f"expected true/false, a profile name, or a mapping with 'profile' or 'allowed', "
+                f"got: {setting!r}"
+            )
+        rules.compile_char_filter(allowed)
+    except ValueError as e:
+        raise ValueError(f"remove_invalid_chars for field '{name}': {e}")
+    return allowed
+
+##################################################
+
+# Define the function to compile the rules of one field into a FieldPlan
+def compile_field(name, rules_for_field) -> FieldPlan:
+    if rules_for_field is None:
+        return FieldPlan()
+    if not isinstance(rules_for_field, dict):
+        raise ValueError(f"Rules for field '{name}' must be a mapping, got: {rules_for_field!r}")
+    unknown = [key for key in rules_for_field if key not in RULE_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown rule(s) for field '{name}': {', '.join(map(str, unknown))}")
+
+    # Ignored fields are passed through untouched, so no other rule matters
+    if rules_for_field.get("ignore", False):
+        return FieldPlan(ignore=True)
+
+    # First transformation is replacing nulls if configured
+    replace_nulls, null_value = False, None
+    null_cfg = rules_for_field.get("replace_nulls_with")
+    if isinstance(null_cfg, dict):
+        replace_nulls = bool(null_cfg.get("enabled"))
+        null_value = null_cfg.get("value", "Not Specified")
+    elif null_cfg not in (None, False):
+        raise ValueError(f"replace_nulls_with for field '{name}' must be a mapping, got: {null_cfg!r}")
+
+    steps = []
+    # Second transformation is trimming whitespace
+    if rules_for_field.get("trim_whitespace", False):
+        steps.append(Step("trim_whitespace", rules.strip_whitespace, rules.strip_whitespace_series))
+
+    # Third transformation is converting to specified case
+    case_type = rules_for_field.get("normalize_case")
+    if case_type not in (None, False):
+        if case_type not in CASE_TYPES:
+            raise ValueError(
+                f"normalize_case for field '{name}' must be one of {', '.join(CASE_TYPES)} or false, "
+                f"got: {case_type!r}"
+            )
+        steps.append(Step(
+            "normalize_case",
+            partial(rules.normalize_case, case_type=case_type),
+            partial(rules.normalize_case_series, case_type=case_type),
+        ))
+
+    # Fourth transformation is removing invalid characters
+    allowed = compile_allowed_chars(name, rules_for_field.get("remove_invalid_chars", False))
+    if allowed is not None:
+        steps.append(Step(
+            "remove_invalid_chars",
+            partial(rules.remove_invalid_chars, allowed=allowed),
+            partial(rules.remove_invalid_chars_series, allowed=allowed),
+        ))
+
+    # Fifth transformation is fixing date formats
+    fix_date_cfg = rules_for_field.get("fix_date_format")
+    if isinstance(fix_date_cfg, dict):
+        formats = {
+            "input_format": fix_date_cfg.get("input_format", "%m/%d/%Y"),
+            "output_format": fix_date_cfg.get("output_format", "%Y-%m-%d"),
+        }
+        steps.append(Step(
+            "fix_date_format",
+            partial(rules.fix_date_format, **formats),
+            partial(rules.fix_date_format_series, **formats),
+        ))
+    elif fix_date_cfg not in (None, False):
+        raise ValueError(f"fix_date_format for field '{name}' must be a mapping, got: {fix_date_cfg!r}")
+
+    return FieldPlan(replace_nulls=replace_nulls, null_value=null_value, steps=tuple(steps))
+
+##################################################
+
+"""
+Define the function to compile the loaded YAML config into a CleaningPlan.
+Call it once per run and pass the plan to clean_row / clean_dataframe; passing
+the raw config dictionary still works but compiles it again on every call.
+"""
+def compile_plan(config: dict) -> CleaningPlan:
+    # Reads the field_rules from the YAML config as a dictionary
+    field_rules = (config or {}).get("field_rules") or {}
+    if not isinstance(field_rules, dict):
+        raise ValueError("field_rules in the config must be a mapping of field names to rules")
+    fields = tuple(
+        (name, compile_field(name, rules_for_field)) for name, rules_for_field in field_rules.items()
+    )
+
+    # Optional dictionary_encoding section: enabled, max_ratio, min_rows
+    encoding = (config or {}).get("dictionary_encoding") or {}
+    if not isinstance(encoding, dict) or set(encoding) - {"enabled", "max_ratio", "min_rows"}:
+        raise ValueError("dictionary_encoding must be a mapping with enabled, max_ratio and/or min_rows")
+    max_ratio = encoding.get("max_ratio", DICTIONARY_MAX_RATIO)
+    min_rows = encoding.get("min_rows", DICTIONARY_MIN_ROWS)
+    if not isinstance(max_ratio, (int, float)) or not 0 <= max_ratio <= 1:
+        raise ValueError(f"dictionary_encoding max_ratio must be between 0 and 1, got: {max_ratio!r}")
+    if not isinstance(min_rows, int) or min_rows < 0:
+        raise ValueError(f"dictionary_encoding min_rows must be a whole number, got: {min_rows!r}")
+    if not encoding.get("enabled", True):
+        max_ratio = 0
+
+    return CleaningPlan(fields, dictionary_max_ratio=max_ratio, dictionary_min_rows=min_rows)
+
+##################################################
+
+# Define the function to accept either a loaded config or an already compiled plan
+def as_plan(config) -> CleaningPlan:
+    return config if isinstance(config, CleaningPlan) else compile_plan(config)
+
+##################################################
+
+"""
+Define the function to clean a single row of data. This function takes a row
+as a dictionary plus the YAML configuration (or a compiled plan) and returns a
+new, cleaned dictionary with the same keys but transformed values.  It also
+produces a second dictionary with the changes, to enable logging and analysis
+of the cleaning process.
+"""
+def clean_row(row: dict, config) -> tuple[dict, dict]:
     # Initialize an empty dictionary to hold cleaned values
     cleaned = {}
-    
+
     # Initialize a dictionary to hold changes for logging
     changes = {}
-    
-    # Reads the field_rules from the YAML config as a dictionary
-    field_rules = config.get("field_rules", {})
-    
+
+    # Use the compiled plan, compiling the config first if needed
+    plan = as_plan(config)
+
     # Loop through each key-value pair in the row and apply cleaning rules
     for key, val in row.items():
         original_val = val
-        changed = False  # Track if this field was modified
-        rules_for_field = field_rules.get(key, {})
+        field_plan = plan.field(key)
 
         # Skip the field if marked to be ignored
-        if rules_for_field.get("ignore", False):
+        if field_plan.ignore:
             cleaned[key] = val
             continue
 
-        # Apply transformations conditionally based on the rules defined
-        # First transformation is replacing nulls if configured
-        null_cfg = rules_for_field.get("replace_nulls_with")
-        if pd.isna(val) and isinstance(null_cfg, dict) and null_cfg.get("enabled"):
-            val = null_cfg.get("value", "Not Specified")
-
-         # Second transformation is trimming whitespace
-        if rules_for_field.get("trim_whitespace", False):
-            val = rules.strip_whitespace(val)
-
-        # Third transformation is converting to specified case
-        normalize_case = rules_for_field.get("normalize_case")
-        if normalize_case and normalize_case is not False:
-            val = rules.normalize_case(val, normalize_case)
-
-        # Fourth transformation is removing invalid characters
-        if rules_for_field.get("remove_invalid_chars", False):
-            val = rules.remove_invalid_chars(val)
-
-        # Fifth transformation is fixing date formats
-        fix_date_cfg = rules_for_field.get("fix_date_format")
-        if isinstance(fix_date_cfg, dict):
-            input_fmt = fix_date_cfg.get("input_format", "%m/%d/%Y")
-            output_fmt = fix_date_cfg.get("output_format", "%Y-%m-%d")
-            val = rules.fix_date_format(val, input_format=input_fmt, output_format=output_fmt)
+        # Replace nulls first, then run the remaining steps in order
+        if field_plan.replace_nulls and pd.isna(val):
+            val = field_plan.null_value
+        for step in field_plan.steps:
+            val = step.apply(val)
 
         # Determine the changes to log to the changes dictionary
         if val != original_val:
@@ -79,4 +274,200 @@ def clean_row(row: dict, config: dict) -> tuple[dict, dict]:
     # Return the cleaned dictionary and changes dictionary with all transformations applied
     return cleaned, changes
 
-##################################################
\ No newline at end of file
+##################################################
+
+"""
+Define the function to clean a single column of data.  This is the column-wise
+counterpart of the per-field logic in clean_row: the same steps run in the same
+order, but each one is applied to every value of the column in one call.
+Only string values are passed to the string rules, exactly like the isinstance()
+checks inside normalizer.rules do for single values.
+If rule_counts is given, the number of values each rule changed is added to it;
+weights (aligned with values) make each value count as that many rows, for
+columns cleaned through their distinct values.  If rule_times is given, the
+calls and seconds spent in each rule are added to it.
+"""
+def clean_column(values: pd.Series, field_plan: FieldPlan, rule_counts: dict = None,
+                 weights: pd.Series = None, rule_times: dict = None) -> pd.Series:
+    # Skip the column if marked to be ignored
+    if field_plan.ignore:
+        return values
+
+    # First transformation is replacing nulls if configured
+    if field_plan.replace_nulls:
+        started = time.perf_counter()
+        nulls = values.isna()
+        if nulls.any():
+            values = values.astype(object)
+            values[nulls] = field_plan.null_value
+            if rule_counts is not None:
+                count_rule(rule_counts, "replace_nulls_with", nulls, weights)
+        if rule_times is not None:
+            time_rule(rule_times, "replace_nulls_with", time.perf_counter() - started)
+
+    # Only object and string columns can hold strings, numeric columns are done
+    if not field_plan.steps:
+        return values
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+        return values
+    is_str = values.map(lambda v: isinstance(v, str))
+    if not is_str.any():
+        return values
+    strings = values[is_str].astype(object)
+
+    # Run the remaining steps in order on the string values
+    for step in field_plan.steps:
+        before = strings
+        started = time.perf_counter()
+        strings = step.apply_series(strings)
+        if rule_times is not None:
+            time_rule(rule_times, step.name, time.perf_counter() - started)
+        if rule_counts is not None:
+            count_rule(rule_counts, step.name, changed_values(before, strings), weights)
+
+    # Put the cleaned strings back in place of the originals, non-strings are untouched
+    if is_str.all():
+        return strings
+    cleaned = values.astype(object)
+    cleaned[is_str] = strings
+    return cleaned
+
+##################################################
+
+# Define the function to find the values that differ, treating a null that stayed null as unchanged
+def changed_values(original: pd.Series, cleaned: pd.Series) -> pd.Series:
+    return (as_values(cleaned) != as_values(original)) & ~(cleaned.isna() & original.isna())
+
+# Define the function to add the number of values a rule changed to the rule counts
+def count_rule(rule_counts: dict, rule: str, changed: pd.Series, weights: pd.Series = None):
+    count = int(weights[changed[changed].index].sum()) if weights is not None else int(changed.sum())
+    if count:
+        rule_counts[rule] = rule_counts.get(rule, 0) + count
+
+# Define the function to add one call of a rule and the seconds it took to the rule timings
+def time_rule(rule_times: dict, rule: str, seconds: float):
+    timing = rule_times.setdefault(rule, [0, 0.0])
+    timing[0] += 1
+    timing[1] += seconds
+
+##################################################
+
+# Define the function to decide if a column is worth dictionary-encoding
+def use_dictionary_encoding(values: pd.Series, plan: CleaningPlan) -> bool:
+    if plan.dictionary_max_ratio <= 0 or len(values) < max(plan.dictionary_min_rows, 1):
+        return False
+    if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+            or isinstance(values.dtype, pd.CategoricalDtype)):
+        return False
+    # Estimate the ratio of distinct values from the leading rows first, which is cheap
+    sample = values.iloc[:DICTIONARY_SAMPLE_ROWS]
+    return sample.nunique(dropna=False) <= plan.dictionary_max_ratio * len(sample)
+
+##################################################
+
+"""
+Define the function to clean a low-cardinality column through its dictionary of
+distinct values.  The column is factorized into integer codes and distinct
+values, the field's steps run once per distinct value (plus once for the null
+replacement), and the codes are mapped back to the cleaned values.  Distinct
+values that clean to the same result share one category.  Returns a categorical
+Series with the same values clean_column would give, or None if the column turns
+out to have too many distinct values.  Rule counts are weighted by how many rows
+hold each distinct value, so they match a value-by-value clean; rule timings
+are the time spent on the distinct values.
+"""
+def clean_column_encoded(values: pd.Series, field_plan: FieldPlan, max_ratio: float = DICTIONARY_MAX_RATIO,
+                         rule_counts: dict = None, rule_times: dict = None):
+    codes, uniques = pd.factorize(values)
+    if len(uniques) > max_ratio * len(values):
+        return None
+    distinct = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+
+    # Nulls have code -1; give the null replacement value its own dictionary entry
+    nulls = codes == -1
+    if field_plan.replace_nulls and nulls.any():
+        codes = np.where(nulls, len(distinct), codes)
+        distinct = pd.concat([distinct, pd.Series([field_plan.null_value], dtype=object)], ignore_index=True)
+        if rule_counts is not None:
+            count_rule(rule_counts, "replace_nulls_with", pd.Series(nulls))
+
+    # Run the steps on the distinct values only, then map the rows back to them
+    weights = None
+    if rule_counts is not None:
+        weights = pd.Series(np.bincount(codes[codes >= 0], minlength=len(distinct)))
+    cleaned_codes, categories = pd.factorize(clean_column(distinct, field_plan, rule_counts, weights, rule_times))
+    row_codes = np.where(codes == -1, -1, cleaned_codes[np.maximum(codes, 0)])
+    return pd.Series(
+        pd.Categorical.from_codes(row_codes, categories=categories),
+        index=values.index, name=values.name,
+    )
+
+##################################################
+
+"""
+Define the function to clean a whole DataFrame.  It produces the same values as
+calling clean_row on every row, without building a Python dictionary per row.
+It also returns the number of changed values per field, for logging.  If a
+ChangeBatch is given, the per-rule counts and timings and the positions of the
+changed values are added to it as well.
+"""
+def clean_dataframe(df: pd.DataFrame, config, changes=None) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    # Use the compiled plan, compiling the config first if needed
+    plan = as_plan(config)
+
+    cleaned_columns = {}
+    change_counts = {}
+    for key in df.columns:
+        original = df[key]
+        field_plan = plan.field(key)
+        cleaned = None
+        rule_counts = {} if changes is not None else None
+        rule_times = {} if changes is not None else None
+        # Low-cardinality columns are cleaned once per distinct value
+        if field_plan.steps and not field_plan.ignore and use_dictionary_encoding(original, plan):
+            cleaned = clean_column_encoded(original, field_plan, plan.dictionary_max_ratio, rule_counts,
+                                           rule_times)
+        if cleaned is None:
+            cleaned = clean_column(original, field_plan, rule_counts, rule_times=rule_times)
+        cleaned_columns[key] = cleaned
+        if changes is not None:
+            for rule, (calls, seconds) in rule_times.items():
+                changes.add_time(key, rule, calls, seconds)
+        # Count values that differ, treating a null that stayed null as unchanged
+        if cleaned is not original:
+            differs = changed_values(original, cleaned)
+            changed = int(differs.sum())
+            if changed:
+                change_counts[key] = changed
+            if changes is not None:
+                changes.add_field(key, differs.to_numpy())
+                for rule, count in rule_counts.items():
+                    changes.add_rule(key, rule, count)
+
+    # Rebuild the DataFrame with the original column order and row index
+    cleaned_df = pd.DataFrame(cleaned_columns, index=df.index, columns=df.columns)
+    return cleaned_df, change_counts
+
+##################################################
+
+# Define the function to compare categorical columns by value rather than by category
+def as_values(values: pd.Series) -> pd.Series:
+    return values.astype(object) if isinstance(values.dtype, pd.CategoricalDtype) else values
+
+##################################################
+
+# Define the function to list the differences between a raw and a cleaned row
+def diff_row(original: dict, cleaned: dict) -> dict:
+    # Same format as the changes dictionary returned by clean_row
+    changes = {}
+    for key, val in cleaned.items():
+        original_val = original.get(key)
+        if pd.isna(val) and pd.isna(original_val):
+            continue
+        if val != original_val:
+            changes[key] = {"from": original_val, "to": val}
+    return changes
+
+##################################################
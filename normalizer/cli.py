@@ -0,0 +1,317 @@
+"""
+This module is the headless command-line interface of the toolkit, for cron jobs
+and other automated runs where nobody is there to answer main.py's prompts.  It
+is installed as the dnt console script (or run with python -m normalizer.cli):
+    dnt batch data/1-CSV-Raw --sqlite --jobs 4
+    dnt validate --config config/config.yaml
+    dnt version
+Orchestration scripts call it thousands of times a day, so startup is kept
+short: this module only imports the standard library at load time, and each
+subcommand imports the heavy modules (pandas, yaml, jinja2, sqlite3, ...) it
+needs when it runs.  --help, version and argument errors never import them;
+tests/test_startup.py holds the import time to a budget.
+The batch subcommand cleans every CSV file matching the given directories or
+glob patterns in a single process.
+The config is loaded and compiled once and shared by all files (unless
+--regen-config builds a fresh config per file), and the HTML report template
+is loaded once.  With --jobs N, N files are cleaned at the same time on
+threads; --workers N still spreads the cleaning of each file over N processes.
+Per-file timings are printed as a table at the end and written to the log, and
+each file's step timings and rule costs go to a JSON file next to the log.
+--profile (with --jobs 1) also traces memory and writes cProfile stats per file.
+--checkpoint-every N saves a checkpoint per file every N chunks, and --resume
+carries each file on from its last checkpoint after an interrupted batch.
+--append cleans only the rows added to each file since the last --append run.
+--partitioned-read splits each file into byte ranges read by the --workers.
+"""
+
+# Import necessary libraries
+import os
+import sys
+import time
+import argparse
+from normalizer import __version__
+
+##################################################
+
+# Default input folder and shared config file
+RAW_DIR = "data/1-CSV-Raw"
+CONFIG_PATH = "config/config.yaml"
+
+# Suffix of the configs --regen-config builds per file, kept apart from config.yaml
+REGEN_CONFIG_SUFFIX = ".config.yaml"
+
+# Columnar formats accepted by --format; the same as columnar_exporter.FORMAT_EXTENSIONS,
+# which is not imported here because that module imports pandas
+COLUMNAR_FORMATS = ("arrow", "parquet")
+
+##################################################
+
+# Define the function to read the command-line arguments
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="dnt", description="Data Normalization Toolkit (DNT), headless mode")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Clean every CSV file in a directory or matching a glob pattern")
+    batch.add_argument(
+        "paths", nargs="*", default=[RAW_DIR],
+        help=f"Directories, CSV files or glob patterns to clean (default: {RAW_DIR})"
+    )
+    batch.add_argument(
+        "--config", default=CONFIG_PATH,
+        help=f"Config shared by every file, built from the first file if missing (default: {CONFIG_PATH})"
+    )
+    batch.add_argument(
+        "--regen-config", action="store_true",
+        help="Build a fresh config from each file, saved as config/<file name>.config.yaml"
+    )
+    batch.add_argument("--sqlite", action="store_true", help="Also export each cleaned file to SQLite")
+    batch.add_argument(
+        "--postgres", action="store_true",
+        help="Also load each cleaned file into PostgreSQL (see the postgres section of the config)"
+    )
+    batch.add_argument(
+        "--format", dest="formats", action="append", choices=COLUMNAR_FORMATS, default=[],
+        help="Also write each cleaned file in this columnar format (can be repeated)"
+    )
+    batch.add_argument("--jobs", type=int, default=1, help="Number of files cleaned at the same time (default: 1)")
+    batch.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of worker processes used for cleaning each file (default: 1)"
+    )
+    batch.add_argument(
+        "--chunk-size", type=int, default=None,
+        help="Stream each CSV in chunks of this many rows instead of loading it all into memory"
+    )
+    batch.add_argument(
+        "--pipelined", action="store_true",
+        help="Stream each CSV with reading, cleaning and each output's writing overlapping on separate threads"
+    )
+    batch.add_argument(
+        "--checkpoint-every", type=int, default=None,
+        help="Save a checkpoint every N chunks so an interrupted file can be resumed (streaming mode)"
+    )
+    batch.add_argument(
+        "--resume", action="store_true",
+        help="Carry each file on from the last checkpoint of an interrupted run with the same config and options"
+    )
+    batch.add_argument(
+        "--append", action="store_true",
+        help="Clean only the rows appended to each file since the last --append run and append them to its outputs"
+    )
+    batch.add_argument(
+        "--partitioned-read", action="store_true",
+        help="Split each CSV into byte ranges on record boundaries, read and cleaned by the workers (streaming mode)"
+    )
+    batch.add_argument("--force", action="store_true", help="Clean files even if an identical earlier run is cached")
+    batch.add_argument(
+        "--change-log", action="store_true",
+        help="Write every changed value to a JSON lines file per input next to the log"
+    )
+    batch.add_argument(
+        "--profile", action="store_true",
+        help="Trace memory per step and write cProfile stats per file next to the log (needs --jobs 1)"
+    )
+
+    validate = commands.add_parser("validate", help="Check a config without cleaning anything")
+    validate.add_argument("--config", default=CONFIG_PATH, help=f"Config to check (default: {CONFIG_PATH})")
+
+    commands.add_parser("version", help="Print the toolkit version")
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        if args.jobs < 1 or args.workers < 1:
+            parser.error("--jobs and --workers must be at least 1")
+        if args.chunk_size is not None and args.chunk_size < 1:
+            parser.error("--chunk-size must be at least 1")
+        if args.checkpoint_every is not None and args.checkpoint_every < 1:
+            parser.error("--checkpoint-every must be at least 1")
+        if args.append and (args.resume or args.checkpoint_every):
+            parser.error("--append cannot be combined with --resume or --checkpoint-every")
+        if args.partitioned_read and (args.pipelined or args.resume or args.checkpoint_every):
+            parser.error("--partitioned-read cannot be combined with --pipelined, --resume or --checkpoint-every")
+        # cProfile only sees its own thread, and tracemalloc cannot tell concurrent files apart
+        if args.profile and args.jobs > 1:
+            parser.error("--profile needs --jobs 1")
+    return args
+
+##################################################
+
+"""
+Define the function to load the config for each file.  A shared config is
+loaded and compiled once; with regen, each file gets its own fresh config built
+from its columns, saved with a .config.yaml suffix so that no input name (such
+as config.csv) can overwrite the shared config.yaml.  Returns a dictionary of
+input file -> (config path, raw config, compiled plan).
+"""
+def load_configs(files: list, config_path: str, regen: bool, logger) -> dict:
+    from normalizer.cleaner import compile_plan
+    from normalizer.config_builder import build_field_rules_config
+    from normalizer.compression import csv_stem
+    from normalizer.config_loader import load_config
+    configs = {}
+    if regen:
+        for input_csv in files:
+            file_config = os.path.join("config", csv_stem(input_csv) + REGEN_CONFIG_SUFFIX)
+            build_field_rules_config(input_csv, file_config)
+            logger.info(f"Generated config {file_config} for {input_csv}")
+            raw_config = load_config(file_config)
+            configs[input_csv] = (file_config, raw_config, compile_plan(raw_config))
+        return configs
+
+    if not os.path.exists(config_path):
+        build_field_rules_config(files[0], config_path)
+        logger.info(f"Generated new config {config_path} from {files[0]}")
+    raw_config = load_config(config_path)
+    shared = (config_path, raw_config, compile_plan(raw_config))
+    return {input_csv: shared for input_csv in files}
+
+##################################################
+
+# Define the function to format the per-file results as a table of timings
+def format_timings(results: list) -> str:
+    lines = [f"{'File':<40} {'Status':<8} {'Rows':>10} {'Seconds':>9} {'Rows/s':>10}"]
+    for result in results:
+        rows = result.get("rows")
+        rate = f"{rows / result['seconds']:,.0f}" if rows and result["seconds"] else "-"
+        lines.append(
+            f"{os.path.basename(result['input']):<40} {result['status']:<8} "
+            f"{rows if rows is not None else '-':>10} {result['seconds']:>9.2f} {rate:>10}"
+        )
+    return "\n".join(lines)
+
+##################################################
+
+# Define the function to group the files whose outputs would have the same name (matched ignoring case)
+def duplicate_names(files: list) -> list:
+    from normalizer.compression import csv_stem
+    groups = {}
+    for input_csv in files:
+        groups.setdefault(csv_stem(input_csv).lower(), []).append(input_csv)
+    return [paths for paths in groups.values() if len(paths) > 1]
+
+"""
+Define the batch command.  Files are cleaned on a thread pool of --jobs threads,
+all sharing the compiled configs; a file that fails is reported and the others
+carry on.  Files that would write to the same outputs (a/x.csv and b/x.csv, or
+x.csv and x.csv.gz) stop the batch before anything is cleaned.  Returns the
+process exit code: 0 if every file was cleaned (or reused from the run cache),
+1 otherwise.
+"""
+def run_batch(args) -> int:
+    from concurrent.futures import ThreadPoolExecutor
+    from normalizer.compression import csv_stem
+    from normalizer.file_selector import find_csv_files
+    from normalizer.instrumentation import RunMetrics, profiled
+    from normalizer.reporter import setup_logger
+    from normalizer.rules import date_cache_summary
+    from normalizer.runner import FileLogger, clean_file, run_modes
+
+    files = find_csv_files(args.paths)
+    if not files:
+        print(f"No CSV files found in: {', '.join(args.paths)}")
+        return 1
+    # Files with the same name would write to the same outputs, so the batch does not start
+    clashes = duplicate_names(files)
+    if clashes:
+        print("These files would write to the same outputs; rename them or clean them in separate batches:")
+        for paths in clashes:
+            print("  " + ", ".join(paths))
+        return 1
+    logger = setup_logger()
+    logger.info(f"Batch run over {len(files)} file(s) with {args.jobs} job(s).")
+    configs = load_configs(files, args.config, args.regen_config, logger)
+
+    log_path = logger.handlers[0].baseFilename
+    run_stamp = os.path.basename(log_path)[:-len(".log")]
+
+    # Clean one file, catching any error so the rest of the batch still runs
+    def clean_one(input_csv):
+        name = csv_stem(input_csv)
+        config_path, raw_config, plan = configs[input_csv]
+        file_logger = FileLogger(logger, {"file": os.path.basename(input_csv)})
+        sidecar_path = os.path.join("logs", f"{run_stamp}_{name}_changes.ndjson") if args.change_log else None
+        profile_path = os.path.join("logs", f"{run_stamp}_{name}.prof") if args.profile else None
+        metrics = RunMetrics(trace_memory=args.profile)
+        started = time.perf_counter()
+        try:
+            with profiled(profile_path, file_logger):
+                return clean_file(
+                    input_csv, raw_config, config_path, plan=plan, export_sqlite=args.sqlite,
+                    chunk_size=args.chunk_size, workers=args.workers, force=args.force,
+                    sidecar_path=sidecar_path,
+                    report_path=os.path.join("reports", f"{run_stamp}_{name}.html"),
+                    logger=file_logger, formats=args.formats, export_postgres=args.postgres,
+                    metrics=metrics, metrics_path=os.path.join("logs", f"{run_stamp}_{name}_metrics.json"),
+                    modes=run_modes(args),
+                )
+        except Exception as exc:
+            logger.exception(f"[{os.path.basename(input_csv)}] Cleaning failed: {exc}")
+            return {"input": input_csv, "status": "failed", "rows": None,
+                    "seconds": time.perf_counter() - started, "error": str(exc)}
+        finally:
+            metrics.close()
+
+    # map() keeps the results in the order of the files
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(clean_one, files))
+
+    logger.info(date_cache_summary())
+    timings = format_timings(results)
+    logger.info("Per-file timings:\n" + timings)
+    print(timings)
+    for result in results:
+        if result["status"] == "failed":
+            print(f"FAILED {result['input']}: {result['error']}")
+    print(f"Log file: {log_path}")
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+##################################################
+
+"""
+Define the validate command.  The config is loaded and checked the way a run
+would check it: the field rules are compiled, and the ingest, sqlite, export
+and postgres sections are read.  Returns 0 if the config is valid, 1 otherwise.
+"""
+def run_validate(args) -> int:
+    from normalizer.cleaner import compile_plan
+    from normalizer.columnar_exporter import export_options
+    from normalizer.config_loader import load_config
+    from normalizer.ingest import ingest_options
+    from normalizer.pg_exporter import postgres_options
+    from normalizer.sql_exporter import sqlite_options
+
+    try:
+        raw_config = load_config(args.config)
+        plan = compile_plan(raw_config)
+        for read_section in (ingest_options, sqlite_options, export_options, postgres_options):
+            read_section(raw_config)
+    # A missing optional package (pyarrow for the export formats) also makes the config unusable here
+    except (FileNotFoundError, ValueError, ImportError) as exc:
+        print(f"Invalid config {args.config}: {exc}")
+        return 1
+    print(f"Config OK: {args.config} ({len(plan.fields)} field(s) configured)")
+    return 0
+
+##################################################
+
+# Define the main function of the headless CLI, the entry point of the dnt console script
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.command == "batch":
+        return run_batch(args)
+    if args.command == "validate":
+        return run_validate(args)
+    if args.command == "version":
+        print(f"dnt {__version__}")
+        return 0
+    return 1
+
+##################################################
+
+# Run the CLI if this module is executed directly
+if __name__ == "__main__":
+    sys.exit(main())
+
+##################################################
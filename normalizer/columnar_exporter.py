@@ -0,0 +1,259 @@
+"""
+This module exports cleaned DataFrames to columnar file formats, next to the
+cleaned CSV, so downstream jobs can load typed columns instead of re-parsing
+text:
+1. parquet: Apache Parquet, with a configurable compression codec (and level)
+   and row-group size.
+2. arrow: the Arrow IPC file format (Feather v2), readable with
+   pandas.read_feather or pyarrow, with optional lz4 or zstd compression.
+Both need the optional pyarrow package, which is only imported when a format
+is selected.  The formats are chosen in an optional export section of the
+config, or with --format on the command line:
+    export:
+      formats: [parquet, arrow]
+      parquet:
+        compression: zstd
+        compression_level: 3
+        row_group_size: 100000
+      arrow:
+        compression: lz4
+      csv:
+        compression: gzip
+        compression_level: 6
+The csv part sets how the cleaned CSV itself is compressed (compression.py).
+Like the SQLite writers, a columnar writer keeps its file open so the streaming
+pipeline can write chunk after chunk into it; in streaming mode every chunk
+becomes one Parquet row group (or Arrow record batch), so memory stays bounded.
+"""
+
+# Import necessary libraries
+import pandas as pd
+from normalizer.compression import DEFAULT_CSV_OPTIONS, require_zstandard, validate_csv_settings
+from normalizer.ingest import require_pyarrow
+
+##################################################
+
+# File extension of each columnar format
+FORMAT_EXTENSIONS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+# Compression codecs accepted by each format ("none" writes uncompressed files)
+PARQUET_CODECS = ("snappy", "zstd", "gzip", "brotli", "lz4", "none")
+ARROW_CODECS = ("lz4", "zstd", "none")
+
+# Default settings of each format
+DEFAULT_PARQUET_OPTIONS = {"compression": "snappy", "compression_level": None, "row_group_size": 100_000}
+DEFAULT_ARROW_OPTIONS = {"compression": "none"}
+
+##################################################
+
+"""
+Define the function to read and validate the optional export section of the
+config.  formats adds formats chosen on the command line to those in the
+config.  Returns a dictionary with the list of formats to write, the settings
+of each format, including the cleaned CSV's compression, and the columns whose
+nulls the field rules replace with text (text_columns), which are written as
+text since they can hold both numbers and that text.
+"""
+def export_options(config: dict, formats: list = None) -> dict:
+    section = (config or {}).get("export") or {}
+    if not isinstance(section, dict):
+        raise ValueError("The export section of the config must be a mapping")
+    unknown = set(section) - {"formats", "parquet", "arrow", "csv"}
+    if unknown:
+        raise ValueError(f"Unknown export option(s): {', '.join(sorted(map(str, unknown)))}")
+    configured = section.get("formats") or []
+    if not isinstance(configured, list):
+        raise ValueError(f"export formats must be a list, got: {configured!r}")
+    # Keep the order formats were given in, without duplicates
+    selected = list(dict.fromkeys(configured + list(formats or [])))
+    for fmt in selected:
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ValueError(f"export format must be one of {', '.join(FORMAT_EXTENSIONS)}, got: {fmt!r}")
+
+    parquet = {**DEFAULT_PARQUET_OPTIONS, **section_settings(section, "parquet", DEFAULT_PARQUET_OPTIONS)}
+    if parquet["compression"] not in PARQUET_CODECS:
+        raise ValueError(f"parquet compression must be one of {', '.join(PARQUET_CODECS)}, "
+                         f"got: {parquet['compression']!r}")
+    if parquet["compression_level"] is not None and not isinstance(parquet["compression_level"], int):
+        raise ValueError(f"parquet compression_level must be a whole number, got: {parquet['compression_level']!r}")
+    if not isinstance(parquet["row_group_size"], int) or parquet["row_group_size"] < 1:
+        raise ValueError(f"parquet row_group_size must be a positive whole number, got: {parquet['row_group_size']!r}")
+    arrow = {**DEFAULT_ARROW_OPTIONS, **section_settings(section, "arrow", DEFAULT_ARROW_OPTIONS)}
+    if arrow["compression"] not in ARROW_CODECS:
+        raise ValueError(f"arrow compression must be one of {', '.join(ARROW_CODECS)}, got: {arrow['compression']!r}")
+    csv = {**DEFAULT_CSV_OPTIONS, **section_settings(section, "csv", DEFAULT_CSV_OPTIONS)}
+    validate_csv_settings(csv)
+    if csv["compression"] == "zstd":
+        require_zstandard("export csv compression: zstd")
+
+    if selected:
+        require_pyarrow(f"export format {selected[0]}")
+    return {"formats": selected, "parquet": parquet, "arrow": arrow, "csv": csv,
+            "text_columns": text_fill_columns(config)}
+
+# Define the function to list the columns whose nulls are replaced with text by the field rules
+def text_fill_columns(config: dict) -> list:
+    columns = []
+    for col, field_rules in ((config or {}).get("field_rules") or {}).items():
+        if not isinstance(field_rules, dict) or field_rules.get("ignore"):
+            continue
+        null_cfg = field_rules.get("replace_nulls_with")
+        if isinstance(null_cfg, dict) and null_cfg.get("enabled") and isinstance(null_cfg.get("value"), str):
+            columns.append(col)
+    return columns
+
+# Define the function to read the settings of one format from the export section
+def section_settings(section: dict, fmt: str, defaults: dict) -> dict:
+    settings = section.get(fmt) or {}
+    if not isinstance(settings, dict):
+        raise ValueError(f"The export {fmt} section must be a mapping")
+    unknown = set(settings) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown export {fmt} option(s): {', '.join(sorted(map(str, unknown)))}")
+    return settings
+
+##################################################
+
+"""
+Define the base columnar writer.  The first DataFrame written fixes the file's
+schema; later chunks are cast to it, so a column that happens to be all empty
+(or integer) in the first chunk does not break the file when a later chunk
+holds text (or decimals).  Columns that cannot be cast are reported by name;
+a dtype hint in field_rules pins their type for every chunk.  text_columns (and
+any column mixing numbers and text, such as a numeric column whose nulls were
+replaced with "Not Specified") are written as text, formatted as in the CSV.
+"""
+class ColumnarWriter:
+    def __init__(self, path: str, text_columns: list = ()):
+        self.path = path
+        self.text_columns = set(text_columns)
+        self.schema = None
+        self.writer = None
+        self.rows = 0
+
+    # Convert a DataFrame to an Arrow table with the file's schema
+    def to_table(self, df: pd.DataFrame):
+        import pyarrow as pa
+        # Categories can differ from chunk to chunk, so categoricals are written as plain values
+        categorical = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+        if categorical:
+            df = df.astype({col: object for col in categorical})
+        # Columns that hold (or may hold) both numbers and text are written as text
+        text = [col for col in df.columns if col in self.text_columns or is_mixed(df[col])]
+        if text:
+            df = df.assign(**{col: as_text(df[col]) for col in text})
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.schema is None:
+            # Columns with no values at all in the first chunk are typed as text
+            self.schema = pa.schema(
+                [pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field for field in table.schema],
+                metadata=table.schema.metadata,
+            )
+        if table.schema.equals(self.schema, check_metadata=False):
+            return table
+        columns = []
+        for field in self.schema:
+            column = table.column(field.name)
+            try:
+                columns.append(column.cast(field.type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                raise ValueError(
+                    f"Column '{field.name}' changed type from {field.type} to {column.type} between chunks "
+                    f"of {self.path}; set a dtype for it in field_rules"
+                ) from None
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    # Write a DataFrame to the file, opening it with the first DataFrame's schema
+    def write(self, df: pd.DataFrame):
+        table = self.to_table(df)
+        if self.writer is None:
+            self.writer = self.open()
+        self.write_table(table)
+        self.rows += len(df)
+
+    # Finish the file
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    # Allow use as a context manager
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Define the function to tell whether a column mixes values of different types (other than ints and floats)
+def is_mixed(series: pd.Series) -> bool:
+    if series.dtype != object:
+        return False
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    return inferred.startswith("mixed") and inferred != "mixed-integer-float"
+
+# Define the function to turn a column into text as the CSV writes it, keeping nulls
+def as_text(series: pd.Series) -> pd.Series:
+    return series.astype(object).where(series.isna(), series.astype(str))
+
+##################################################
+
+# Define the Parquet writer; row_group_size None writes each DataFrame as one row group
+class ParquetWriter(ColumnarWriter):
+    def __init__(self, path: str, compression: str = "snappy", compression_level: int = None,
+                 row_group_size: int = DEFAULT_PARQUET_OPTIONS["row_group_size"], text_columns: list = ()):
+        super().__init__(path, text_columns)
+        self.compression = compression
+        self.compression_level = compression_level
+        self.row_group_size = row_group_size
+
+    def open(self):
+        from pyarrow import parquet as pq
+        return pq.ParquetWriter(self.path, self.schema, compression=self.compression,
+                                compression_level=self.compression_level)
+
+    def write_table(self, table):
+        self.writer.write_table(table, row_group_size=self.row_group_size or max(len(table), 1))
+
+# Define the Arrow IPC (Feather v2) writer; each DataFrame is written as one record batch
+class ArrowWriter(ColumnarWriter):
+    def __init__(self, path: str, compression: str = "none", text_columns: list = ()):
+        super().__init__(path, text_columns)
+        self.compression = compression
+
+    def open(self):
+        import pyarrow as pa
+        codec = None if self.compression == "none" else self.compression
+        return pa.ipc.new_file(self.path, self.schema, options=pa.ipc.IpcWriteOptions(compression=codec))
+
+    def write_table(self, table):
+        self.writer.write_table(table, max_chunksize=max(len(table), 1))
+
+##################################################
+
+"""
+Define the function to open the writer for one format with its settings from
+export_options.  With streaming set, each written chunk becomes one Parquet
+row group, whatever the configured row_group_size.
+"""
+def open_columnar_writer(fmt: str, path: str, options: dict = None, streaming: bool = False):
+    options = options or export_options({}, [fmt])
+    text_columns = options.get("text_columns", ())
+    if fmt == "parquet":
+        settings = dict(options["parquet"])
+        if streaming:
+            settings["row_group_size"] = None
+        return ParquetWriter(path, **settings, text_columns=text_columns)
+    if fmt == "arrow":
+        return ArrowWriter(path, **options["arrow"], text_columns=text_columns)
+    raise ValueError(f"export format must be one of {', '.join(FORMAT_EXTENSIONS)}, got: {fmt!r}")
+
+# Define the function to export a whole DataFrame to one columnar format
+def export_columnar(df: pd.DataFrame, path: str, fmt: str, options: dict = None) -> str:
+    with open_columnar_writer(fmt, path, options) as writer:
+        writer.write(df)
+    return path
+
+##################################################
@@ -0,0 +1,137 @@
+"""
+This module provides transparent compression for the CSV input and the cleaned
+CSV, so compressed raw exports never have to be unpacked to disk first.
+1. Input: files named .csv.gz (gzip), .csv.bz2 (bzip2) or .csv.zst (Zstandard)
+   are listed by the file selector and the batch CLI like plain CSVs, and are
+   read directly: pandas and pyarrow pick the codec from the file extension and
+   decompress as the parser reads, a block at a time.
+2. Output: the cleaned CSV can be written compressed, with the codec and level
+   set in the csv part of the config's export section.  By default it uses the
+   input's codec, so a .csv.gz input gives a _CLEANED.csv.gz output.  The
+   compressed stream is opened once per run and every chunk of a streaming run
+   is written through it.
+gzip and bzip2 come with Python; Zstandard needs the optional zstandard package,
+which is only imported when a .zst file is read or written.  Byte offsets in a
+compressed file do not point at records, so checkpoints, append mode and
+partitioned reading need an uncompressed input and output.
+"""
+
+# Import necessary libraries
+import bz2
+import gzip
+import io
+import os
+
+##################################################
+
+# File extension of each codec, added after .csv
+CODEC_EXTENSIONS = {"gzip": ".gz", "bz2": ".bz2", "zstd": ".zst"}
+
+# Names of the CSV files that are read, plain or compressed
+CSV_EXTENSIONS = (".csv",) + tuple(".csv" + extension for extension in CODEC_EXTENSIONS.values())
+
+# Compression choices for the cleaned CSV: the input's codec, no compression, or a given codec
+CSV_CODECS = ("input", "none") + tuple(CODEC_EXTENSIONS)
+
+# Valid compression levels of each codec, and the level used when none is set
+CODEC_LEVELS = {"gzip": range(0, 10), "bz2": range(1, 10), "zstd": range(1, 23)}
+DEFAULT_LEVELS = {"gzip": 6, "bz2": 9, "zstd": 3}
+
+# Default settings of the cleaned CSV, overridden by the export csv section of the config
+DEFAULT_CSV_OPTIONS = {"compression": "input", "compression_level": None}
+
+##################################################
+
+# Define the function to import zstandard only when a .zst file is read or written
+def require_zstandard(reason: str):
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(f"{reason} needs the optional zstandard package (pip install zstandard)") from None
+    return zstandard
+
+##################################################
+
+# Define the function to tell whether a file name is a CSV file, plain or compressed
+def is_csv(path: str) -> bool:
+    return path.lower().endswith(CSV_EXTENSIONS)
+
+# Define the function to find the codec of a file from its extension (None if it is not compressed)
+def codec_of(path: str):
+    for codec, extension in CODEC_EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return codec
+    return None
+
+# Define the function to remove the codec extension from a file name (data.csv.gz -> data.csv)
+def strip_codec(path: str) -> str:
+    codec = codec_of(path)
+    return path[:-len(CODEC_EXTENSIONS[codec])] if codec else path
+
+# Define the function to find the name of a CSV file without its folder and extensions (data/Feed.CSV.gz -> Feed)
+def csv_stem(path: str) -> str:
+    return os.path.splitext(strip_codec(os.path.basename(path)))[0]
+
+# Define the function to check that a compressed input can be read, raising ImportError if not
+def check_input(input_csv: str):
+    if codec_of(input_csv) == "zstd":
+        require_zstandard(f"Reading {os.path.basename(input_csv)}")
+
+##################################################
+
+"""
+Define the function to work out how the cleaned CSV of input_csv is written,
+from csv_settings (the csv part of columnar_exporter.export_options).  Returns
+a dictionary with the codec and level, or None for an uncompressed CSV.
+"""
+def output_compression(input_csv: str, csv_settings: dict = None):
+    settings = {**DEFAULT_CSV_OPTIONS, **(csv_settings or {})}
+    codec = settings["compression"]
+    if codec == "input":
+        codec = codec_of(input_csv)
+    if codec in (None, "none"):
+        return None
+    level = settings["compression_level"]
+    return {"codec": codec, "level": DEFAULT_LEVELS[codec] if level is None else level}
+
+# Define the function to check the csv part of the config's export section
+def validate_csv_settings(settings: dict):
+    codec = settings["compression"]
+    if codec not in CSV_CODECS:
+        raise ValueError(f"export csv compression must be one of {', '.join(CSV_CODECS)}, got: {codec!r}")
+    level = settings["compression_level"]
+    if level is None:
+        return
+    if not isinstance(level, int) or isinstance(level, bool):
+        raise ValueError(f"export csv compression_level must be a whole number, got: {level!r}")
+    # With the input's codec the level is checked against every codec it could be
+    codecs = list(CODEC_LEVELS) if codec == "input" else [codec] if codec != "none" else []
+    for name in codecs:
+        if level not in CODEC_LEVELS[name]:
+            levels = CODEC_LEVELS[name]
+            raise ValueError(f"export csv compression_level for {name} must be from {levels.start} "
+                             f"to {levels.stop - 1}, got: {level}")
+
+##################################################
+
+"""
+Define the function to open the cleaned CSV for writing as a text file, through
+a streaming compressor when compression (from output_compression) is given.
+Chunks written with DataFrame.to_csv are compressed as they go, and the
+compressed stream is finished when the file is closed.  gzip files carry no
+timestamp, so the same rows always give the same bytes.
+"""
+def open_output(path: str, compression: dict = None):
+    if not compression:
+        return open(path, "w", encoding="utf-8", newline="")
+    codec, level = compression["codec"], compression["level"]
+    if codec == "gzip":
+        raw = gzip.GzipFile(path, "wb", compresslevel=level, mtime=0)
+    elif codec == "bz2":
+        raw = bz2.BZ2File(path, "wb", compresslevel=level)
+    else:
+        zstandard = require_zstandard(f"Writing {os.path.basename(path)}")
+        raw = zstandard.ZstdCompressor(level=level).stream_writer(open(path, "wb"), closefd=True)
+    return io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+##################################################
@@ -1,45 +1,249 @@
 """
 This script builds a YAML configuration file for field rules based on a sample of a CSV file.
-It reads the first few rows of the CSV, extracts column names, and generates default rules 
-for each field.  It then writes a YAML template for per-column cleaning settings.  This allows 
-the user to quickly set up a normalization configuration, which is built dynamically depending
-on the columns contained in the input data.
+It reads a bounded sample of rows (never the whole file), infers what kind of data each
+column holds, and generates rules that fit it.  It then writes a YAML template for per-column
+cleaning settings.  This allows the user to quickly set up a normalization configuration,
+which is built dynamically depending on the columns contained in the input data.
+Each column is inferred as one of:
+1. numeric: every sampled value is a number (IDs, counts, 5-digit ZIP codes).  Case and
+   character rules are switched off, since they cannot change a number.
+2. date: the sampled values parse with one of the known date formats.  fix_date_format is
+   switched on with that format as input_format.
+3. zip / email: ZIP+4 codes or email addresses, cleaned with the matching character profile.
+4. text: everything else, title case (sentence case for description fields) and the default
+   character filter.
 """
 
 # Import necessary libraries
+import csv
+import io
+import os
+import re
+import random
 import pandas as pd
 import yaml
+from datetime import datetime
+from normalizer.compression import codec_of
+from normalizer.ingest import QUOTE, record_offset
+
+##################################################
+
+# Maximum number of rows read to infer the rules
+SAMPLE_ROWS = 1000
+
+# Files larger than this are sampled from random offsets instead of from the top
+RANDOM_SAMPLE_BYTES = 32 * 1024 * 1024
+
+# Number of blocks a large file is sampled in (the first from the top, the others from random offsets)
+SAMPLE_BLOCKS = 20
+
+# Number of bytes read at each random offset
+SAMPLE_BLOCK_BYTES = 256 * 1024
+
+# Share of sampled values that must match for a column to count as a date, ZIP or email column
+MATCH_RATIO = 0.95
+
+# Date formats tried in order; US month-first formats come first, as in the rest of DNT
+DATE_FORMATS = (
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%d-%b-%Y",
+    "%b %d %Y",
+)
+
+# Patterns of the columns cleaned with a character profile
+ZIP_PATTERN = re.compile(r"\d{5}(-\d{4})?")
+EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+##################################################
+
+"""
+Define the function to read a bounded sample of a CSV file as strings.  Small
+files are read from the top with nrows.  Large files are sampled from
+SAMPLE_BLOCKS random offsets: SAMPLE_BLOCK_BYTES are read at each one, and
+the block starts at the first line from which whole records follow (see
+block_records), so it never starts inside a quoted value that spans lines.
+Blocks that cannot be placed are made up with records from the top of the
+file, so a sample reads about the same number of bytes whatever the size of
+the file.  A compressed file cannot be sought into, so it is always sampled
+from the top, decompressing only as far as the sample goes.
+"""
+def read_sample(input_csv, sample_size=SAMPLE_ROWS, seed=0) -> pd.DataFrame:
+    size = os.path.getsize(input_csv)
+    if size <= RANDOM_SAMPLE_BYTES or codec_of(input_csv):
+        return pd.read_csv(input_csv, nrows=sample_size, dtype=str)
+
+    rng = random.Random(seed)
+    records_per_block = max(1, sample_size // SAMPLE_BLOCKS)
+    header_end = record_offset(input_csv, 0, 1)
+    blocks, missing, covered = [], 0, size
+    with open(input_csv, "rb") as f:
+        header = f.read(header_end)
+        columns = len(next(csv.reader(io.StringIO(header.decode("utf-8", "replace")))))
+        # Offsets are visited from the end of the file, so each block stops short of the one after it
+        offsets = sorted((rng.randrange(header_end, size) for _ in range(SAMPLE_BLOCKS - 1)), reverse=True)
+        for offset in offsets:
+            f.seek(offset)
+            found = block_records(f.read(min(SAMPLE_BLOCK_BYTES, covered - offset)), columns, records_per_block)
+            if found is None:
+                missing += 1
+                continue
+            skipped, block = found
+            blocks.insert(0, block)
+            covered = offset + skipped
+        # The first block, and any that could not be placed, come from the top of the file
+        top = min(record_offset(input_csv, header_end, records_per_block * (1 + missing)), covered)
+        f.seek(header_end)
+        blocks.insert(0, f.read(max(top - header_end, 0)))
+    blocks = [block if block.endswith(b"\n") else block + b"\n" for block in blocks if block]
+    return pd.read_csv(io.BytesIO(header + b"".join(blocks)), dtype=str)
+
+"""
+Define the function to find whole records in a block of bytes read from a
+random offset.  The partial line at the offset is skipped, then each
+following line is tried as the start of a record: from a true record start,
+every record (up to records of them) parses as exactly one row with the
+header's number of fields, while a line from inside a quoted value puts the
+quotes out of step and breaks that.  Returns the number of bytes skipped and
+the records, or None if no line of the block passes.
+"""
+def block_records(data: bytes, columns: int, records: int):
+    position = data.find(b"\n") + 1
+    while 0 < position < len(data):
+        end = _whole_records(data, position, columns, records)
+        if end is not None:
+            return position, data[position:end]
+        position = data.find(b"\n", position) + 1
+    return None
+
+# Define the function to find the end of up to records valid records from position, or None if one is invalid
+def _whole_records(data: bytes, position: int, columns: int, records: int):
+    record_start = offset = position
+    in_quotes, count = False, 0
+    for line in io.BytesIO(data[position:]):
+        offset += len(line)
+        # Blank lines are not records
+        if not in_quotes and not line.strip():
+            record_start = offset
+            continue
+        if line.count(QUOTE) % 2:
+            in_quotes = not in_quotes
+        # A record still open at the end of the block is left out
+        if in_quotes or not line.endswith(b"\n"):
+            continue
+        rows = list(csv.reader(io.StringIO(data[record_start:offset].decode("utf-8", "replace"))))
+        if len(rows) != 1 or len(rows[0]) != columns:
+            return None
+        record_start = offset
+        count += 1
+        if count == records:
+            break
+    return record_start if count else None
+
+##################################################
+
+# Define the function to find the first date format that (nearly) every sampled value matches
+def detect_date_format(values: list):
+    for fmt in DATE_FORMATS:
+        parsed = 0
+        for value in values:
+            try:
+                datetime.strptime(value, fmt)
+                parsed += 1
+            except ValueError:
+                pass
+        if parsed >= MATCH_RATIO * len(values):
+            return fmt
+    return None
+
+# Define the function to pick the output format that keeps the precision of the input format
+def date_output_format(input_format: str) -> str:
+    if "%S" in input_format:
+        return "%Y-%m-%d %H:%M:%S"
+    if "%H" in input_format or "%I" in input_format:
+        return "%Y-%m-%d %H:%M"
+    return "%Y-%m-%d"
+
+##################################################
+
+# Define the function to infer what kind of data a sampled column holds
+def infer_column_type(values: pd.Series):
+    # Values are trimmed first, like the trim_whitespace rule does before the others run
+    values = values.dropna().str.strip()
+    values = values[values != ""]
+    if values.empty:
+        return "text", None
+    if pd.to_numeric(values, errors="coerce").notna().all():
+        return "numeric", None
+
+    # Dates are checked on the distinct values only, which keeps strptime calls down
+    distinct = values.unique().tolist()
+    date_format = detect_date_format(distinct)
+    if date_format:
+        return "date", date_format
+    if values.str.fullmatch(ZIP_PATTERN).mean() >= MATCH_RATIO:
+        return "zip", None
+    if values.str.fullmatch(EMAIL_PATTERN).mean() >= MATCH_RATIO:
+        return "email", None
+    return "text", None
+
+##################################################
+
+# Define the function to build the rules of one column from its inferred type
+def field_rules_for(col, column_type, date_format=None) -> dict:
+    rules = {
+        # Ignore = False so the field is processed
+        "ignore": False,
+        # Replace Nulls with "Not Specified" by default
+        "replace_nulls_with": {
+            "enabled": True,
+            "value": "Not Specified"
+        },
+        # Trim whitespace by default
+        "trim_whitespace": True,
+        # Normalize case to title case by default, unless it's a description field
+        "normalize_case": "sentence" if "description" in str(col).lower() else "title",
+        # Remove invalid characters by default
+        "remove_invalid_chars": True,
+        # Only date columns get a date format rule
+        "fix_date_format": False,
+    }
+    if column_type in ("numeric", "date"):
+        # Case and character rules cannot improve a number or a date
+        rules["normalize_case"] = False
+        rules["remove_invalid_chars"] = False
+    if column_type == "date":
+        rules["fix_date_format"] = {
+            "input_format": date_format,
+            "output_format": date_output_format(date_format)
+        }
+    elif column_type == "zip":
+        rules["normalize_case"] = False
+        rules["remove_invalid_chars"] = "zip"
+    elif column_type == "email":
+        rules["normalize_case"] = "lower"
+        rules["remove_invalid_chars"] = "email"
+    return rules
 
 ##################################################
 
 # Function to build field rules configuration from a CSV file
-def build_field_rules_config(input_csv, output_yaml, sample_size=10):
-    # Reads the first few rows of the CSV file to determine the columns
-    # Uses low_memory=False to avoid dtype warnings and reads only a sample of rows
-    df = pd.read_csv(input_csv, low_memory=False).head(sample_size)
+def build_field_rules_config(input_csv, output_yaml, sample_size=SAMPLE_ROWS):
+    # Reads a bounded sample of rows, as strings, to infer each column's rules
+    df = read_sample(input_csv, sample_size)
     config = {"field_rules": {}}
     for col in df.columns:
-        # Initialize default field rules for each column
-        config["field_rules"][col] = {
-            # Ignore = False so the field is processed
-            "ignore": False,
-            # Replace Nulls with "Not Specified" by default
-            "replace_nulls_with": {
-                "enabled": True,
-                "value": "Not Specified"
-            },
-            # Trim whitespace by default
-            "trim_whitespace": True,
-            # Normalize case to title case by default, unless it's a description field
-            "normalize_case": "sentence" if "description" in col.lower() else "title",
-            # Remove invalid characters by default
-            "remove_invalid_chars": True,
-            # Fix date format if applicable, defaulting to US format
-            "fix_date_format": {
-                "input_format": "%m%d%Y %H%M",
-                "output_format": "%Y-%m-%d %H:%M"
-            },
-        }
+        column_type, date_format = infer_column_type(df[col])
+        config["field_rules"][col] = field_rules_for(col, column_type, date_format)
 
     # Creates the yaml.dump output
     with open(output_yaml, 'w', encoding='utf-8') as f:
@@ -48,4 +252,4 @@ def build_field_rules_config(input_csv, output_yaml, sample_size=10):
     # Lets the user know the config was written
     print(f"Field rules config written to {output_yaml}")
 
-##################################################
\ No newline at end of file
+##################################################
@@ -2,10 +2,14 @@
 This module provides a function to select a CSV file from the /data/1-CSV-Raw directory
 or enter a full path manually. It ensures the selected file exists and returns the path.
 This version uses basic input() for terminal interaction and supports Pytest automation.
+CSV files compressed with gzip, bzip2 or Zstandard (.csv.gz, .csv.bz2, .csv.zst)
+are listed and found alongside plain ones, since they are read directly.
 """
 
 # Import necessary libraries
 import os
+import glob
+from normalizer.compression import is_csv
 
 ##########################################################
 
@@ -17,10 +21,10 @@ def get_input_csv_path():
     if not os.path.exists(raw_dir):
         os.makedirs(raw_dir)
 
-    # Get available CSV files in the raw data directory
+    # Get available CSV files in the raw data directory, plain or compressed
     csv_files = [
         f for f in os.listdir(raw_dir)
-        if f.endswith(".csv") and not f.startswith(".gitkeep")
+        if is_csv(f) and not f.startswith(".gitkeep")
     ]
 
     # If running in non-interactive mode for Pytest, return the first CSV file or None
@@ -64,4 +68,20 @@ def get_input_csv_path():
             print("Invalid input.")
             return None
 
-##########################################################
\ No newline at end of file
+##########################################################
+
+# Define the function to expand directories and glob patterns into a sorted list of CSV files, plain or compressed
+def find_csv_files(paths) -> list:
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            # Listed rather than globbed, so A.CSV and b.Csv.GZ are found on case-sensitive file systems too
+            matches = [os.path.join(path, name) for name in os.listdir(path)]
+        else:
+            # A plain file path matches itself, a pattern matches any number of files
+            matches = glob.glob(path, recursive=True)
+        found.extend(match for match in sorted(matches) if is_csv(match) and os.path.isfile(match))
+    # Keep the first occurrence of each file, in the order given
+    return list(dict.fromkeys(found))
+
+##########################################################
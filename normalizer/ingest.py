@@ -0,0 +1,615 @@
+"""
+This module reads the input CSV with typed, lightweight settings taken from the
+config, instead of letting pandas infer every column as Python objects:
+1. Per-column dtype hints in field_rules (dtype: category, string,
+   string[pyarrow], int, float, bool, datetime, str) are passed to the parser,
+   so columns are built in their final type during the read.
+2. Columns marked ignore are read as raw strings: no type inference, and their
+   original text is written back out unchanged.
+3. An optional ingest section can limit the columns read (usecols) and switch
+   to the multithreaded pyarrow CSV parser (engine: pyarrow).  pyarrow is an
+   optional dependency and is only imported when it is asked for.
+    ingest:
+      engine: pyarrow
+      usecols: [UI_Key, Agency, Created_Date]
+A streaming read can also cover a byte range of the file, starting after the
+rows an earlier run has done (found by record_offset, to resume a run from a
+checkpoint) and ending at the last complete record (found by complete_records,
+to clean only the rows appended to a growing file).
+A single large file can also be split into byte ranges that start and end on
+record boundaries (partition_ranges), each parsed on its own from a memory map
+of the file (read_range), so several processes can parse one file at once.
+Integer columns are read as whole numbers even when they hold nulls (pandas
+would turn them into floats), so a column is written the same way whether the
+whole file is read at once or in chunks, only some of which hold nulls.
+"""
+
+# Import necessary libraries
+import io
+import mmap
+import os
+import numpy as np
+import pandas as pd
+
+##################################################
+
+# pandas dtypes for the dtype hints accepted in field_rules
+DTYPE_HINTS = {
+    "category": "category",
+    "string": "string",
+    "string[pyarrow]": "string[pyarrow]",
+    "str": str,
+    "int": "Int64",
+    "float": "float64",
+    "bool": "boolean",
+    "datetime": None,
+}
+
+# CSV parsers that can be selected in the ingest section
+ENGINES = ("c", "pyarrow")
+
+# Size of the blocks the pyarrow parser reads at a time in streaming mode, in bytes
+PYARROW_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Quote character of the CSV files read
+QUOTE = b'"'
+
+# Size of the blocks scanned for quotes and newlines when a file is split into byte ranges, in bytes
+PARTITION_SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Field rules that only change string values
+STRING_RULES = ("trim_whitespace", "normalize_case", "remove_invalid_chars", "fix_date_format")
+
+# Size of the windows searched for the next record boundary after each split point, in bytes
+PARTITION_SEARCH_SIZE = 64 * 1024
+
+# Number of records sampled to estimate the average record size
+RECORD_SIZE_SAMPLE = 1000
+
+##################################################
+
+# Define the function to import pyarrow only when a setting needs it
+def require_pyarrow(reason: str):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(f"{reason} needs the optional pyarrow package (pip install pyarrow)") from None
+
+##################################################
+
+"""
+Define the function to read and validate the ingest settings of a config.
+Returns a dictionary with the engine, the columns to read (None for all), the
+pandas dtype of each hinted, ignored or string-rule column, and the columns
+parsed as dates.
+"""
+def ingest_options(config: dict) -> dict:
+    section = (config or {}).get("ingest") or {}
+    if not isinstance(section, dict):
+        raise ValueError("The ingest section of the config must be a mapping")
+    unknown = set(section) - {"engine", "usecols"}
+    if unknown:
+        raise ValueError(f"Unknown ingest option(s): {', '.join(sorted(map(str, unknown)))}")
+    engine = section.get("engine", "c")
+    if engine not in ENGINES:
+        raise ValueError(f"ingest engine must be one of {', '.join(ENGINES)}, got: {engine!r}")
+    usecols = section.get("usecols")
+    if usecols is not None and (not isinstance(usecols, list) or not all(isinstance(c, str) for c in usecols)):
+        raise ValueError(f"ingest usecols must be a list of column names, got: {usecols!r}")
+
+    dtypes, parse_dates = {}, []
+    for name, rules_for_field in ((config or {}).get("field_rules") or {}).items():
+        if not isinstance(rules_for_field, dict):
+            continue
+        hint = rules_for_field.get("dtype")
+        # Ignored columns pass straight through as the text they were read as
+        if rules_for_field.get("ignore", False):
+            dtypes[name] = str
+        elif hint is None:
+            # String rules skip values that are not strings, so their columns are read as text by both engines
+            if any(rules_for_field.get(rule) for rule in STRING_RULES):
+                dtypes[name] = str
+            continue
+        elif hint not in DTYPE_HINTS:
+            raise ValueError(
+                f"dtype for field '{name}' must be one of {', '.join(DTYPE_HINTS)}, got: {hint!r}"
+            )
+        elif hint == "datetime":
+            # A parsed date is no longer a string, so the string date rule could not run on it
+            if rules_for_field.get("fix_date_format"):
+                raise ValueError(f"Field '{name}' cannot use both dtype: datetime and fix_date_format")
+            parse_dates.append(name)
+        else:
+            dtypes[name] = DTYPE_HINTS[hint]
+
+    if engine == "pyarrow":
+        require_pyarrow("ingest engine: pyarrow")
+    if "string[pyarrow]" in dtypes.values():
+        require_pyarrow("dtype: string[pyarrow]")
+    return {"engine": engine, "usecols": usecols, "dtype": dtypes, "parse_dates": parse_dates}
+
+##################################################
+
+# Define the function to keep only the settings that apply to the file's columns
+def read_kwargs(input_csv: str, options: dict = None) -> dict:
+    options = options or {"engine": "c", "usecols": None, "dtype": {}, "parse_dates": []}
+    columns = pd.read_csv(input_csv, nrows=0).columns.tolist()
+    if options["usecols"]:
+        # Keep the file's column order, as pandas does (pyarrow would follow the list)
+        missing = [col for col in options["usecols"] if col not in columns]
+        if missing:
+            raise ValueError(f"ingest usecols not found in {input_csv}: {', '.join(missing)}")
+        columns = [col for col in columns if col in options["usecols"]]
+    kwargs = {
+        "dtype": {col: dtype for col, dtype in options["dtype"].items() if col in columns},
+        "parse_dates": [col for col in options["parse_dates"] if col in columns],
+    }
+    if options["usecols"]:
+        kwargs["usecols"] = columns
+    if options["engine"] == "pyarrow":
+        kwargs["engine"] = "pyarrow"
+    else:
+        # Avoids the mixed-type warnings of the C parser reading in small pieces
+        kwargs["low_memory"] = False
+        # Nullable types tell integer columns with nulls apart from decimals (see settle_types)
+        kwargs["dtype_backend"] = "numpy_nullable"
+    return kwargs
+
+##################################################
+
+"""
+Define the function to settle the types of a frame read with pandas' nullable
+types (or pyarrow's integers).  Every column gets its usual numpy type, except
+that an integer column with nulls keeps whole numbers (Python ints and NaN in
+an object column) instead of becoming floats, so 10003 is not written as
+10003.0 just because a null was read with it.  Hinted columns keep their type.
+"""
+def settle_types(df: pd.DataFrame, hinted=()) -> pd.DataFrame:
+    for col in df.columns:
+        values = df[col]
+        dtype = values.dtype
+        if col in hinted or not isinstance(dtype, (pd.core.dtypes.dtypes.BaseMaskedDtype, pd.StringDtype)):
+            continue
+        nulls = values.isna()
+        if pd.api.types.is_integer_dtype(dtype) and not nulls.all():
+            df[col] = values.to_numpy(dtype.numpy_dtype if not nulls.any() else object, na_value=np.nan)
+        elif pd.api.types.is_bool_dtype(dtype) and not nulls.any():
+            df[col] = values.to_numpy(bool)
+        elif pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_float_dtype(dtype):
+            # A column with no values at all is read as floats, as pandas does
+            df[col] = values.to_numpy("float64", na_value=np.nan)
+        else:
+            df[col] = values.to_numpy(object, na_value=np.nan)
+    return df
+
+# Define the function to tell what a column of one chunk holds: "decimal", "integer", "other", or None if only nulls
+def column_kind(values: pd.Series):
+    if not values.notna().any():
+        return None
+    if pd.api.types.is_float_dtype(values.dtype):
+        return "decimal"
+    if pd.api.types.is_integer_dtype(values.dtype) or (
+            values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) == "integer"):
+        return "integer"
+    return "other"
+
+"""
+Define the column types of a stream of chunks.  Each chunk is parsed on its
+own, so a column of decimals can come out as whole numbers in a chunk that
+happens to hold no decimals; the first chunk with values in a column decides
+whether it holds decimals, and later chunks of a decimal column are turned into
+decimals too.  decimals maps each column decided so far to that decision; it
+is saved with checkpoints and append-mode runs, so a run carried on later
+types its chunks as one run over the whole file would.
+"""
+class StreamTypes:
+    def __init__(self, decimals: dict = None):
+        self.decimals = dict(decimals or {})
+
+    # List the columns of a chunk (described by their column_kind) that have to be turned into decimals
+    def casts(self, kinds: dict) -> list:
+        return [col for col, kind in kinds.items() if kind == "integer" and self.decimals.get(col)]
+
+    # Record the types of the columns a chunk is the first to hold values in
+    def update(self, kinds: dict):
+        new = {col: kind == "decimal" for col, kind in kinds.items() if kind is not None and col not in self.decimals}
+        # A new dictionary rather than an update, so a copy taken for a checkpoint never changes under it
+        if new:
+            self.decimals = {**self.decimals, **new}
+
+    # Bring one chunk in line with the types decided so far, and decide the new columns from it
+    def settle(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        for col in chunk.columns:
+            values = chunk[col]
+            if col not in self.decimals:
+                self.update({col: column_kind(values)})
+            elif self.decimals[col] and column_kind(values) == "integer":
+                chunk[col] = values.astype("float64")
+        return chunk
+
+    # Settle every chunk of a stream, in order
+    def iterate(self, chunks):
+        for chunk in chunks:
+            yield self.settle(chunk)
+
+##################################################
+
+"""
+Define the function to read a whole CSV file with the ingest settings.  The
+pyarrow engine reads through pyarrow directly rather than through pandas, which
+would parse text columns such as ZIP codes as numbers before casting them back
+to strings (and lose their leading zeros).
+"""
+def read_csv(input_csv: str, options: dict = None) -> pd.DataFrame:
+    kwargs = read_kwargs(input_csv, options)
+    if kwargs.pop("engine", "c") != "pyarrow":
+        return settle_types(pd.read_csv(input_csv, **kwargs), kwargs["dtype"])
+
+    from pyarrow import csv as pa_csv
+    table = pa_csv.read_csv(input_csv, convert_options=arrow_convert_options(kwargs, input_csv))
+    return _arrow_chunk(table, 0, kwargs["dtype"], kwargs["parse_dates"])
+
+# Define the function to read only the header of a CSV file, as an empty DataFrame
+def read_header(input_csv: str, options: dict = None) -> pd.DataFrame:
+    usecols = (options or {}).get("usecols")
+    return pd.read_csv(input_csv, nrows=0, usecols=usecols)
+
+##################################################
+
+"""
+Define the function to read a CSV file in chunks of chunk_size rows with the
+ingest settings.  The C parser streams natively; the pyarrow parser does not
+support chunksize in pandas, so its streaming reader is used directly and its
+record batches are regrouped into chunks of chunk_size rows.  Either way the
+chunks carry a continuous row index, as pandas' own chunked reader gives.
+With an offset (from record_offset), reading starts at that byte of the file
+instead of after the header, and first_row is the number of rows before it.
+With an end, reading stops at that byte (for example the end of the last
+complete record, from complete_records).  The columns are then named from the
+header as usual, and the pyarrow parser is given the column types it infers at
+the start of the file, so every chunk is typed exactly as it would have been
+in a read from the start.  column_types (a StreamTypes) carries the column
+types decided by an earlier part of the run over to this one.
+"""
+def iter_csv(input_csv: str, options: dict = None, chunk_size: int = 100_000, offset: int = 0,
+             first_row: int = 0, end: int = None, column_types: StreamTypes = None):
+    chunks = _read_chunks(input_csv, options, chunk_size, offset, first_row, end)
+    return (column_types or StreamTypes()).iterate(chunks)
+
+# Define the function to read the chunks of iter_csv, each typed on its own
+def _read_chunks(input_csv: str, options: dict, chunk_size: int, offset: int, first_row: int, end: int):
+    kwargs = read_kwargs(input_csv, options)
+    ranged = bool(offset) or end is not None
+    if ranged:
+        offset = offset or record_offset(input_csv, 0, 1)
+        names = pd.read_csv(input_csv, nrows=0).columns.tolist()
+    if kwargs.pop("engine", "c") != "pyarrow":
+        if not ranged:
+            for chunk in pd.read_csv(input_csv, chunksize=chunk_size, **kwargs):
+                yield settle_types(chunk, kwargs["dtype"])
+            return
+        with open_range(input_csv, offset, end) as f:
+            # Nothing is left to read if the range is empty (the parser would find no columns)
+            if not f.peek(1):
+                return
+            start = first_row
+            for chunk in pd.read_csv(f, chunksize=chunk_size, header=None, names=names, **kwargs):
+                # A range holding only blank lines gives one empty chunk
+                if not len(chunk):
+                    continue
+                chunk.index = pd.RangeIndex(start, start + len(chunk))
+                start += len(chunk)
+                yield settle_types(chunk, kwargs["dtype"])
+        return
+
+    from pyarrow import csv as pa_csv
+    dtypes, parse_dates = kwargs["dtype"], kwargs["parse_dates"]
+    read_options = pa_csv.ReadOptions(block_size=PYARROW_BLOCK_SIZE)
+    convert_options = arrow_convert_options(kwargs, input_csv)
+    if not ranged:
+        yield from _arrow_chunks(pa_csv.open_csv(input_csv, read_options=read_options,
+                                                 convert_options=convert_options),
+                                 0, chunk_size, dtypes, parse_dates)
+        return
+
+    # The types are those inferred from the first block of the file, as in a read from the start
+    schema = pa_csv.open_csv(input_csv, read_options=read_options, convert_options=convert_options).schema
+    convert_options.column_types = {field.name: field.type for field in schema}
+    read_options.column_names = names
+    with open_range(input_csv, offset, end) as f:
+        # An empty range leaves nothing to read (pyarrow would fail on no data)
+        if not f.peek(1):
+            return
+        reader = pa_csv.open_csv(f, read_options=read_options, convert_options=convert_options)
+        yield from _arrow_chunks(reader, first_row, chunk_size, dtypes, parse_dates)
+
+# Define the function to regroup the record batches of a pyarrow CSV reader into chunks of chunk_size rows
+def _arrow_chunks(reader, start: int, chunk_size: int, dtypes: dict, parse_dates: list):
+    import pyarrow as pa
+    pending = []
+    for batch in reader:
+        pending.append(batch)
+        rows = sum(len(b) for b in pending)
+        while rows >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield _arrow_chunk(table.slice(0, chunk_size), start, dtypes, parse_dates)
+            pending = table.slice(chunk_size).to_batches()
+            start += chunk_size
+            rows -= chunk_size
+    if any(len(b) for b in pending):
+        yield _arrow_chunk(pa.Table.from_batches(pending), start, dtypes, parse_dates)
+
+##################################################
+
+# Define a raw file that reads the bytes of another file from its current position up to end
+class _ByteRange(io.RawIOBase):
+    def __init__(self, f, end: int = None):
+        self.f = f
+        self.end = end
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = len(buffer)
+        if self.end is not None:
+            size = max(0, min(size, self.end - self.f.tell()))
+        return self.f.readinto(memoryview(buffer)[:size]) if size else 0
+
+    def close(self):
+        self.f.close()
+        super().close()
+
+# Define the function to open the bytes of a file from offset up to end (or the end of the file) for reading
+def open_range(input_csv: str, offset: int, end: int = None):
+    f = open(input_csv, "rb")
+    f.seek(offset)
+    return io.BufferedReader(_ByteRange(f, end), buffer_size=io.DEFAULT_BUFFER_SIZE * 16)
+
+##################################################
+
+"""
+Define the functions to find record boundaries in a CSV file.  Records are
+counted the way the parsers count rows: a newline inside a quoted value does
+not end a record, and blank lines are not records.  record_offset returns the
+byte offset just past the next records from the byte offset start (0 for the
+header); reading from it with iter_csv gives the rows after those records.
+complete_records returns the offset just past the last complete record from
+start, and how many records that is: a last line without its newline (or with
+a quoted value still open) may still be being written, so it is left out.
+"""
+def _record_ends(f):
+    in_quotes = False
+    while True:
+        line = f.readline()
+        if not line:
+            return
+        # Outside quotes, a line with nothing but whitespace is skipped like a blank line
+        if not in_quotes and not line.strip():
+            continue
+        # An odd number of quotes opens or closes a quoted value (a doubled quote counts twice)
+        if line.count(QUOTE) % 2:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            yield f.tell(), line.endswith(b"\n")
+
+def record_offset(input_csv: str, start: int, records: int) -> int:
+    with open(input_csv, "rb") as f:
+        f.seek(start)
+        if records <= 0:
+            return start
+        for n, (offset, _) in enumerate(_record_ends(f), start=1):
+            if n == records:
+                return offset
+        return f.tell()
+
+def complete_records(input_csv: str, start: int) -> tuple:
+    end, count = start, 0
+    with open(input_csv, "rb") as f:
+        f.seek(start)
+        for offset, complete in _record_ends(f):
+            if not complete:
+                break
+            end, count = offset, count + 1
+    return end, count
+
+# Define the function to estimate the average size of the records after byte offset start, in bytes
+def average_record_bytes(input_csv: str, start: int, sample: int = RECORD_SIZE_SAMPLE) -> float:
+    end, count = start, 0
+    with open(input_csv, "rb") as f:
+        f.seek(start)
+        for end, _ in _record_ends(f):
+            count += 1
+            if count == sample:
+                break
+    return (end - start) / count if count else 1.0
+
+##################################################
+
+"""
+Define the function to split a CSV file into byte ranges of about
+target_bytes each, from start (the end of the header by default) to end (the
+end of the file by default).  Every range ends just after a newline that is
+not inside a quoted value, so each one holds whole records, even when values
+such as free-text descriptions contain newlines.  Whether a newline is inside
+quotes follows from the number of quote characters before it, which is
+counted with numpy over a memory map of the file, one block at a time; like
+record_offset, this relies on quotes only appearing in quoted values (RFC
+4180).  Returns a list of (start, end) byte offsets, in file order.
+"""
+def partition_ranges(input_csv: str, target_bytes: int, start: int = None, end: int = None) -> list:
+    start = record_offset(input_csv, 0, 1) if start is None else start
+    with open(input_csv, "rb") as f:
+        size = os.fstat(f.fileno()).st_size if end is None else end
+        if size <= start:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = np.frombuffer(mm, dtype=np.uint8)
+            try:
+                boundaries = _range_boundaries(data, start, size, max(1, int(target_bytes)))
+            finally:
+                # The memory map cannot be closed while numpy still holds a view of it
+                del data
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+# Define the function to find the record boundaries closest after every target_bytes from start up to size
+def _range_boundaries(data: np.ndarray, start: int, size: int, target_bytes: int) -> list:
+    quote, newline = QUOTE[0], ord("\n")
+    boundaries = [start]
+    # Quotes counted from start up to position, so their parity tells whether position is inside a quoted value
+    position, quotes = start, 0
+    target = start + target_bytes
+    while target < size:
+        # Count the quotes up to the target, block by block
+        while position < target:
+            stop = min(target, position + PARTITION_SCAN_BLOCK_SIZE)
+            quotes += int(np.count_nonzero(data[position:stop] == quote))
+            position = stop
+        # Find the first newline from the target that is outside quotes
+        boundary = None
+        while position < size and boundary is None:
+            block = data[position:min(size, position + PARTITION_SEARCH_SIZE)]
+            quotes_before = quotes + np.cumsum(block == quote)
+            outside = np.flatnonzero((block == newline) & (quotes_before % 2 == 0))
+            if len(outside):
+                boundary = position + int(outside[0]) + 1
+                quotes = int(quotes_before[outside[0]])
+            else:
+                quotes = int(quotes_before[-1]) if len(block) else quotes
+            position = boundary if boundary is not None else position + len(block)
+        if boundary is None or boundary >= size:
+            break
+        boundaries.append(boundary)
+        target = max(boundary, target) + target_bytes
+    boundaries.append(size)
+    return boundaries
+
+##################################################
+
+"""
+Define the function to work out once, in the parent process, what every
+read_range call needs: the parser settings, the column names from the header,
+and for the pyarrow parser the column types it infers at the start of the
+file, so every range is typed the same way.
+"""
+def range_settings(input_csv: str, options: dict = None) -> dict:
+    kwargs = read_kwargs(input_csv, options)
+    settings = {"kwargs": kwargs, "names": pd.read_csv(input_csv, nrows=0).columns.tolist(), "column_types": None}
+    if kwargs.get("engine") == "pyarrow":
+        from pyarrow import csv as pa_csv
+        reader = pa_csv.open_csv(input_csv, read_options=pa_csv.ReadOptions(block_size=PYARROW_BLOCK_SIZE),
+                                 convert_options=arrow_convert_options(kwargs, input_csv))
+        settings["column_types"] = {field.name: field.type for field in reader.schema}
+    return settings
+
+"""
+Define the function to parse one byte range of a CSV file (from
+partition_ranges) with the settings from range_settings.  The file is memory
+mapped and the parser reads the range straight from the map, so no copy of
+the file is made; in a worker process only the pages of its own range are
+read.  Returns the range's rows as a DataFrame with a row index from 0.
+"""
+def read_range(input_csv: str, start: int, end: int, settings: dict) -> pd.DataFrame:
+    kwargs = dict(settings["kwargs"])
+    names = settings["names"]
+    columns = kwargs.get("usecols") or names
+    with open(input_csv, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)[start:end]
+        try:
+            if kwargs.pop("engine", "c") != "pyarrow":
+                try:
+                    return settle_types(pd.read_csv(io.BufferedReader(_MemoryRange(view)), header=None,
+                                                    names=names, **kwargs), kwargs["dtype"])
+                # A range of blank lines has no rows at all
+                except pd.errors.EmptyDataError:
+                    return pd.DataFrame({col: pd.Series(dtype=object) for col in columns})
+
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+            convert_options = arrow_convert_options(kwargs)
+            convert_options.column_types = settings["column_types"]
+            buffer = pa.py_buffer(view)
+            table = pa_csv.read_csv(pa.BufferReader(buffer), read_options=pa_csv.ReadOptions(column_names=names),
+                                    convert_options=convert_options)
+            df = _arrow_chunk(table, 0, kwargs["dtype"], kwargs["parse_dates"])
+            # The memory map cannot be closed while pyarrow still holds its buffer
+            del table, buffer
+            return df
+        finally:
+            view.release()
+
+# Define the function to read byte ranges one after another, as chunks with a continuous row index
+def iter_ranges(input_csv: str, ranges: list, settings: dict, first_row: int = 0, column_types: StreamTypes = None):
+    return (column_types or StreamTypes()).iterate(_read_ranges(input_csv, ranges, settings, first_row))
+
+# Define the function to read the ranges of iter_ranges, each typed on its own
+def _read_ranges(input_csv: str, ranges: list, settings: dict, first_row: int):
+    for start, end in ranges:
+        chunk = read_range(input_csv, start, end, settings)
+        # A range holding only blank lines has no rows
+        if not len(chunk):
+            continue
+        chunk.index = pd.RangeIndex(first_row, first_row + len(chunk))
+        first_row += len(chunk)
+        yield chunk
+
+# Define a raw file that reads from a memoryview, such as a range of a memory map
+class _MemoryRange(io.RawIOBase):
+    def __init__(self, view: memoryview):
+        self.view = view
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), len(self.view) - self.position)
+        buffer[:size] = self.view[self.position:self.position + size]
+        self.position += size
+        return size
+
+"""
+Define the function to build the pyarrow parser options for the ingest settings.
+pyarrow infers dates, times and timestamps from ISO text even with no
+timestamp parsers, and would write them back in its own format; given the
+file, the types inferred from its first block are checked and those columns
+are read as text, as the C parser reads them.
+"""
+def arrow_convert_options(kwargs: dict, input_csv: str = None):
+    from pyarrow import csv as pa_csv
+    import pyarrow as pa
+    # Text-like columns are kept as strings by the parser; other hints are applied after it
+    text_types = {
+        col: pa.string() for col, dtype in kwargs["dtype"].items()
+        if dtype in (str, "string", "string[pyarrow]", "category")
+    }
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=kwargs.get("usecols"), column_types=text_types, strings_can_be_null=True,
+        timestamp_parsers=[],
+    )
+    if input_csv is not None:
+        schema = pa_csv.open_csv(input_csv, read_options=pa_csv.ReadOptions(block_size=PYARROW_BLOCK_SIZE),
+                                 convert_options=convert_options).schema
+        text_types.update({field.name: pa.string() for field in schema if pa.types.is_temporal(field.type)})
+        convert_options.column_types = text_types
+    return convert_options
+
+# Define the function to map pyarrow integer types to pandas' nullable integers for Table.to_pandas
+def _nullable_integer(arrow_type):
+    import pyarrow as pa
+    return pd.api.types.pandas_dtype(str(arrow_type).capitalize().replace("Uint", "UInt")) \
+        if pa.types.is_integer(arrow_type) else None
+
+# Define the function to turn one Arrow table into a pandas chunk with the hinted types
+def _arrow_chunk(table, start: int, dtypes: dict, parse_dates: list) -> pd.DataFrame:
+    # Integers are read as nullable integers, so a null does not turn them into floats
+    df = settle_types(table.to_pandas(types_mapper=_nullable_integer))
+    df.index = pd.RangeIndex(start, start + len(df))
+    hinted = {col: dtype for col, dtype in dtypes.items() if dtype is not str}
+    if hinted:
+        df = df.astype(hinted)
+    for col in parse_dates:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+##################################################
@@ -0,0 +1,199 @@
+"""
+This module measures where the time and memory of a run go, so a slow run can
+be traced to a step (reading, cleaning, summarizing, exporting, rendering) or
+to a single field rule rather than guessed at from free-text log lines:
+1. RunMetrics.stage() is a context manager (and RunMetrics.timed() a
+   decorator) that adds the wall time of a step to a named stage.  A stage
+   entered many times, such as the reading of each chunk in streaming mode,
+   adds up its calls and time.  The process's peak RSS so far is noted at the
+   end of each stage, and with trace_memory the peak memory traced by
+   tracemalloc during the stage as well (tracemalloc slows the run down, so it
+   is only switched on with --profile).
+2. Per-rule costs (calls, time and changed values per column and rule) are
+   collected by the cleaner into each ChangeBatch and added with
+   add_rule_costs().
+3. profiled() runs a block under cProfile and dumps the stats to a file.
+The metrics are written to the log, a JSON file next to the log, and the
+"Run Timings" section of the HTML report.
+"""
+
+# Import necessary libraries
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# resource (for the peak RSS) is not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+##################################################
+
+# Bytes per megabyte, for the memory figures
+MB = 1024 * 1024
+
+# Number of functions listed in the log when a run is profiled
+PROFILE_TOP_FUNCTIONS = 20
+
+##################################################
+
+# Define the function to read the peak resident memory of the process so far, in MB
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (MB if sys.platform == "darwin" else 1024), 1)
+
+##################################################
+
+"""
+Define the metrics of one run.  Stages are kept in the order they were first
+entered.  Nested stages are allowed: with trace_memory, a stage's peak also
+covers the stages nested in it.  Stages may run on several threads at once (as
+in the staged pipeline); tracemalloc's peak is process-wide, so the traced
+peaks of concurrent stages then overlap.
+"""
+class RunMetrics:
+    def __init__(self, trace_memory: bool = False):
+        self.stages = {}
+        self.rule_costs = []
+        self.lock = threading.Lock()
+        # Each thread has its own stack of open stages' peaks
+        self.local = threading.local()
+        self.trace_memory = trace_memory
+        # Only stop tracemalloc at the end if this object started it
+        self.started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    # Return the peaks of the stages open in this thread, innermost last
+    @property
+    def peaks(self) -> list:
+        if not hasattr(self.local, "peaks"):
+            self.local.peaks = []
+        return self.local.peaks
+
+    # Time a block of code as one call of the named stage
+    @contextmanager
+    def stage(self, name: str):
+        if self.trace_memory:
+            # Fold the peak so far into the enclosing stage, then restart the peak for this one
+            peak = tracemalloc.get_traced_memory()[1]
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self.peaks.append(0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            peak = None
+            if self.trace_memory:
+                peak = max(self.peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+            with self.lock:
+                entry = self.stages.setdefault(name, {"stage": name, "calls": 0, "seconds": 0.0,
+                                                      "peak_traced_mb": None, "peak_rss_mb": None})
+                entry["calls"] += 1
+                entry["seconds"] += seconds
+                entry["peak_rss_mb"] = peak_rss_mb()
+                if peak is not None:
+                    entry["peak_traced_mb"] = max(entry["peak_traced_mb"] or 0.0, round(peak / MB, 1))
+
+    # Decorate a function so every call of it is timed as the named stage
+    def timed(self, name: str):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # Yield the items of an iterable, timing the production of each one as a call of the named stage
+    def iterate(self, name: str, iterable):
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    # Add the per-column, per-rule costs from the change statistics (ChangeTracker.stats)
+    def add_rule_costs(self, rule_costs: list):
+        self.rule_costs = list(rule_costs)
+
+    # Stop tracemalloc if this object started it
+    def close(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    # Return the metrics as a dictionary, for the JSON file and the HTML report
+    def as_dict(self) -> dict:
+        with self.lock:
+            stages = [{**entry, "seconds": round(entry["seconds"], 6)} for entry in self.stages.values()]
+        return {
+            "stages": stages,
+            "rule_costs": self.rule_costs,
+            "trace_memory": self.trace_memory,
+        }
+
+    # Write the metrics to a JSON file
+    def write_json(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2, default=str)
+        return path
+
+    # Format the stage timings and the costliest rules for the log
+    def format(self, top_rules: int = 10) -> str:
+        lines = ["--- RUN TIMINGS ---", f"{'Stage':<20} {'Calls':>6} {'Seconds':>9} {'Traced MB':>10} {'RSS MB':>8}"]
+        for entry in self.stages.values():
+            traced = f"{entry['peak_traced_mb']:.1f}" if entry["peak_traced_mb"] is not None else "-"
+            rss = f"{entry['peak_rss_mb']:.1f}" if entry["peak_rss_mb"] is not None else "-"
+            lines.append(f"{entry['stage']:<20} {entry['calls']:>6} {entry['seconds']:>9.3f} {traced:>10} {rss:>8}")
+        if self.rule_costs:
+            lines.append(f"\nCostliest rules (of {len(self.rule_costs)}):")
+            for cost in self.rule_costs[:top_rules]:
+                lines.append(f"  {cost['field']} / {cost['rule']}: {cost['seconds']:.3f}s over "
+                             f"{cost['calls']} call(s), {cost['changed']} value(s) changed")
+        return "\n".join(lines)
+
+##################################################
+
+# Define the function to time a block as a stage of metrics, or do nothing if there are no metrics
+def stage(metrics, name: str):
+    return metrics.stage(name) if metrics is not None else nullcontext()
+
+# Define a context manager that runs a block under cProfile, dumping the stats to profile_path
+@contextmanager
+def profiled(profile_path: str = None, logger=None, top: int = PROFILE_TOP_FUNCTIONS):
+    if not profile_path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+        if logger:
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+            logger.info(f"cProfile stats written to {profile_path}; top {top} by cumulative time:\n"
+                        + text.getvalue())
+
+##################################################
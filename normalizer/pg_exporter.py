@@ -0,0 +1,277 @@
+"""
+This module exports cleaned DataFrames to a PostgreSQL table, for loads into a
+shared warehouse rather than a local SQLite file.  Like the SQLite export it is
+a bulk load rather than pandas' to_sql:
+1. Connections come from a pooled SQLAlchemy engine, created once per URL and
+   shared by every file of a batch.
+2. The table is created with column types derived from the cleaned data;
+   columns whose nulls the field rules replace with text are always TEXT, as
+   a later chunk may fill a number column with "Not Specified".
+3. Rows are streamed with COPY ... FROM STDIN, batch_size rows at a time
+   through an in-memory CSV buffer, all inside one transaction, so readers
+   never see a half-loaded (or, in truncate mode, empty) table.
+The mode sets what happens to rows already in the table:
+    truncate: empty the table, then load (the default)
+    append:   add the rows to the table
+    upsert:   COPY into a temporary staging table, then INSERT ... ON CONFLICT
+              (primary_key) DO UPDATE, so new keys are inserted and existing
+              ones updated
+The connection URL is read from the postgres section of the config, or from
+the DNT_POSTGRES_URL environment variable so passwords stay out of the config:
+    postgres:
+      url: postgresql+psycopg2://user@localhost/warehouse
+      schema: public
+      table: complaints
+      mode: upsert
+      primary_key: UI_Key
+SQLAlchemy and psycopg2 are only imported when an export is run.
+"""
+
+# Import necessary libraries
+import io
+import os
+from functools import lru_cache
+import pandas as pd
+from normalizer.columnar_exporter import text_fill_columns
+from normalizer.sql_exporter import quote_identifier
+
+##################################################
+
+# Default number of rows sent in one COPY
+DEFAULT_BATCH_SIZE = 50_000
+
+# Default number of pooled connections kept per engine
+DEFAULT_POOL_SIZE = 5
+
+# Environment variable read when the config has no url
+URL_ENV_VAR = "DNT_POSTGRES_URL"
+
+# Load modes accepted in the postgres section
+POSTGRES_MODES = ("truncate", "append", "upsert")
+
+# Text written for missing values in the COPY buffer, so empty strings stay empty strings
+COPY_NULL = "\\N"
+
+##################################################
+
+# Define the function to read the optional postgres section of the YAML config
+def postgres_options(config: dict) -> dict:
+    options = (config or {}).get("postgres") or {}
+    if not isinstance(options, dict):
+        raise ValueError("The postgres section of the config must be a mapping")
+    unknown = set(options) - {"url", "schema", "table", "mode", "primary_key", "batch_size", "pool_size"}
+    if unknown:
+        raise ValueError(f"Unknown postgres option(s): {', '.join(sorted(map(str, unknown)))}")
+    for key, default in (("batch_size", DEFAULT_BATCH_SIZE), ("pool_size", DEFAULT_POOL_SIZE)):
+        value = options.get(key, default)
+        if not isinstance(value, int) or value < 1:
+            raise ValueError(f"postgres {key} must be a positive whole number, got: {value!r}")
+    mode = options.get("mode", "truncate")
+    if mode not in POSTGRES_MODES:
+        raise ValueError(f"postgres mode must be one of {', '.join(POSTGRES_MODES)}, got: {mode!r}")
+    # Upserts need a key column to match rows against
+    primary_key = options.get("primary_key")
+    if mode == "upsert" and (not isinstance(primary_key, str) or not primary_key):
+        raise ValueError("postgres mode 'upsert' needs a primary_key column name")
+    return {
+        "url": options.get("url") or os.environ.get(URL_ENV_VAR),
+        "schema": options.get("schema", "public"),
+        "table": options.get("table"),
+        "mode": mode,
+        "primary_key": primary_key,
+        "batch_size": options.get("batch_size", DEFAULT_BATCH_SIZE),
+        "pool_size": options.get("pool_size", DEFAULT_POOL_SIZE),
+        "text_columns": text_fill_columns(config),
+    }
+
+##################################################
+
+# Define the function to choose a PostgreSQL column type for each DataFrame column
+def postgres_column_types(df: pd.DataFrame, text_columns: list = ()) -> dict:
+    types = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        # Typed as text whatever the first chunk holds, so later replaced nulls still fit
+        if col in text_columns:
+            types[col] = "TEXT"
+            continue
+        # Categoricals are typed by their categories
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtype = dtype.categories.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            types[col] = "BOOLEAN"
+        elif pd.api.types.is_integer_dtype(dtype):
+            types[col] = "BIGINT"
+        elif pd.api.types.is_float_dtype(dtype):
+            types[col] = "DOUBLE PRECISION"
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            types[col] = "TIMESTAMP"
+        else:
+            # Object columns are typed by what they actually hold
+            kind = pd.api.types.infer_dtype(df[col], skipna=True)
+            if kind == "boolean":
+                types[col] = "BOOLEAN"
+            elif kind == "integer":
+                types[col] = "BIGINT"
+            elif kind in ("floating", "mixed-integer-float"):
+                types[col] = "DOUBLE PRECISION"
+            else:
+                types[col] = "TEXT"
+    return types
+
+##################################################
+
+# Define the function to create (once per URL) the pooled engine the exports share
+@lru_cache(maxsize=None)
+def postgres_engine(url: str, pool_size: int = DEFAULT_POOL_SIZE):
+    from sqlalchemy import create_engine
+    return create_engine(url, pool_size=pool_size, pool_pre_ping=True)
+
+##################################################
+
+"""
+Define the PostgreSQL COPY writer.  It holds one pooled connection and one
+transaction for the whole load, so the streaming pipeline can write many chunks
+into the same table: the first write creates the table if needed (and empties
+it in truncate mode), later writes add to it.  close() commits; abort() rolls
+the whole load back.  stats counts the rows written, and in upsert mode how
+many of them were inserted or updated.
+"""
+class PostgresCopyWriter:
+    def __init__(self, url: str, table: str, schema: str = "public", mode: str = "truncate",
+                 primary_key: str = None, batch_size: int = DEFAULT_BATCH_SIZE, pool_size: int = DEFAULT_POOL_SIZE,
+                 text_columns: list = ()):
+        if not url:
+            raise ValueError(f"No PostgreSQL URL: set postgres: url in the config or the {URL_ENV_VAR} variable")
+        if mode not in POSTGRES_MODES:
+            raise ValueError(f"postgres mode must be one of {', '.join(POSTGRES_MODES)}, got: {mode!r}")
+        self.table = table
+        self.schema = schema
+        self.mode = mode
+        self.primary_key = primary_key
+        self.batch_size = batch_size
+        self.text_columns = set(text_columns)
+        self.qualified_name = f"{quote_identifier(schema)}.{quote_identifier(table)}"
+        self.columns = None
+        self.stats = {"mode": mode, "rows": 0, "inserted": 0, "updated": 0}
+        self.conn = postgres_engine(url, pool_size).raw_connection()
+        self.cursor = self.conn.cursor()
+
+    # Read the columns of the table if it already exists
+    def existing_columns(self) -> list:
+        self.cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position",
+            (self.schema, self.table),
+        )
+        return [row[0] for row in self.cursor.fetchall()]
+
+    # Create the table from the first DataFrame written, or check the existing one matches it
+    def create_table(self, df: pd.DataFrame):
+        if self.mode == "upsert" and self.primary_key not in df.columns:
+            raise ValueError(f"Primary key column '{self.primary_key}' is not in the data")
+        existing = self.existing_columns()
+        if existing and set(existing) != set(map(str, df.columns)):
+            raise ValueError(
+                f"Table {self.schema}.{self.table} has columns {existing}, which do not match the cleaned data"
+            )
+        if not existing:
+            column_defs = ", ".join(
+                f"{quote_identifier(col)} {col_type}" + (" PRIMARY KEY" if col == self.primary_key else "")
+                for col, col_type in postgres_column_types(df, self.text_columns).items()
+            )
+            self.cursor.execute(f"CREATE TABLE {self.qualified_name} ({column_defs})")
+        elif self.mode == "truncate":
+            self.cursor.execute(f"TRUNCATE TABLE {self.qualified_name}")
+        if self.mode == "upsert":
+            # Rows are copied here first, then merged into the table
+            self.cursor.execute(
+                f"CREATE TEMPORARY TABLE dnt_staging (LIKE {self.qualified_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+
+    # Stream one batch of rows into a table with COPY, through an in-memory CSV buffer
+    def copy_rows(self, df: pd.DataFrame, table: str):
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False, na_rep=COPY_NULL, date_format="%Y-%m-%d %H:%M:%S.%f")
+        buffer.seek(0)
+        column_names = ", ".join(quote_identifier(col) for col in self.columns)
+        self.cursor.copy_expert(
+            f"COPY {table} ({column_names}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer
+        )
+
+    # Merge the staged rows into the table and count the inserted and updated ones
+    def merge_staged(self):
+        column_names = ", ".join(quote_identifier(col) for col in self.columns)
+        updates = ", ".join(
+            f"{quote_identifier(col)} = EXCLUDED.{quote_identifier(col)}" for col in self.columns
+            if col != self.primary_key
+        )
+        # xmax is 0 for a freshly inserted row version, and set for an updated one
+        self.cursor.execute(
+            f"WITH merged AS ("
+            f"INSERT INTO {self.qualified_name} ({column_names}) SELECT {column_names} FROM dnt_staging "
+            f"ON CONFLICT ({quote_identifier(self.primary_key)}) "
+            + (f"DO UPDATE SET {updates} " if updates else "DO NOTHING ")
+            + "RETURNING (xmax = 0) AS inserted) "
+            "SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged"
+        )
+        inserted, updated = self.cursor.fetchone()
+        self.stats["inserted"] += inserted
+        self.stats["updated"] += updated
+        self.cursor.execute("TRUNCATE TABLE dnt_staging")
+
+    # Load a DataFrame's rows in batches of batch_size rows
+    def write(self, df: pd.DataFrame):
+        if self.columns is None:
+            self.columns = [str(col) for col in df.columns]
+            self.create_table(df)
+        for start in range(0, len(df), self.batch_size):
+            batch = df.iloc[start:start + self.batch_size]
+            if self.mode == "upsert":
+                self.copy_rows(batch, "dnt_staging")
+                self.merge_staged()
+            else:
+                self.copy_rows(batch, self.qualified_name)
+                self.stats["inserted"] += len(batch)
+            self.stats["rows"] += len(batch)
+
+    # Roll the whole load back and return the connection to the pool
+    def abort(self):
+        if self.conn is not None:
+            try:
+                self.conn.rollback()
+            finally:
+                self.conn.close()
+                self.conn = None
+
+    # Commit the load and return the connection to the pool
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.commit()
+            finally:
+                self.conn.close()
+                self.conn = None
+
+    # Allow use as a context manager; an error rolls the load back
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+##################################################
+
+# Define the function to export a whole DataFrame to PostgreSQL; returns the load's row counts
+def export_to_postgres(df: pd.DataFrame, url: str, table: str, schema: str = "public", mode: str = "truncate",
+                       primary_key: str = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                       pool_size: int = DEFAULT_POOL_SIZE, text_columns: list = ()) -> dict:
+    with PostgresCopyWriter(url, table, schema=schema, mode=mode, primary_key=primary_key,
+                            batch_size=batch_size, pool_size=pool_size, text_columns=text_columns) as writer:
+        writer.write(df)
+    return writer.stats
+
+##################################################
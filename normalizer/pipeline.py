@@ -0,0 +1,413 @@
+"""
+This module provides the streaming (chunked) and parallel cleaning pipelines.
+1. Streaming: rather than loading the whole CSV into memory, the input is read in
+   fixed-size chunks, each chunk is cleaned with clean_dataframe and appended to
+   the cleaned CSV and (optionally) the SQLite table before moving on.  Peak memory
+   is therefore bounded by the chunk size instead of the file size.  Summaries for
+   the log and HTML report are gathered with mergeable DataProfile objects.
+   In pipelined mode the reading and each output's writing run on their own
+   threads (staged_pipeline.py), overlapping with the cleaning.  Long runs can
+   save a checkpoint every few chunks and be resumed from it (checkpoint.py).
+   A single large file can also be read in byte ranges split on record
+   boundaries, each read and cleaned by a worker process (partitioned reading).
+2. Parallel: cleaning is pure CPU work with no shared state, so row partitions (or
+   chunks in streaming mode) can be cleaned in a pool of worker processes.  Results
+   are always put back together in the original row order, so the output matches
+   a serial run byte for byte.
+Both pipelines can feed a ChangeTracker (change_tracker.py) with the changes made
+to every row, recorded in row order.
+"""
+
+# Import necessary libraries
+import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pandas.api.types import union_categoricals
+from normalizer import rules
+from normalizer.cleaner import as_plan, clean_dataframe, diff_row
+from normalizer.columnar_exporter import open_columnar_writer
+from normalizer.compression import codec_of, open_output
+from normalizer.ingest import (
+    StreamTypes, average_record_bytes, column_kind, iter_csv, iter_ranges, partition_ranges, range_settings,
+    read_header, read_range, record_offset,
+)
+from normalizer.instrumentation import stage
+from normalizer.pg_exporter import PostgresCopyWriter
+from normalizer.change_tracker import ChangeBatch
+from normalizer.checkpoint import rewind_outputs
+from normalizer.profiler import DataProfile
+from normalizer.sql_exporter import open_sqlite_writer
+from normalizer.staged_pipeline import DEFAULT_QUEUE_SIZE, StagedPipeline
+
+##################################################
+
+# Default number of rows read, cleaned and written at a time in streaming mode
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Streaming modes of clean_csv_in_chunks, all off by default:
+#   pipelined: read and write each output on its own thread (staged_pipeline.py), with queues of queue_size chunks
+#   checkpoint: a checkpoint.RunCheckpoint saved every few chunks; if it was loaded, the run carries on from it
+#   append_to: the offset and rows of an earlier run (append_mode.load_append_state) to append the rows after
+#   end: the byte offset to stop reading at
+#   partitioned: parse byte ranges split on record boundaries, in the worker processes when workers > 1
+#   csv_compression: the codec and level of the cleaned CSV (compression.output_compression)
+DEFAULT_STREAM_MODES = {
+    "pipelined": False, "queue_size": DEFAULT_QUEUE_SIZE, "checkpoint": None, "append_to": None, "end": None,
+    "partitioned": False, "csv_compression": None,
+}
+
+##################################################
+
+# Define the function to add one partition's change counts to the running totals
+def merge_change_counts(totals: dict, counts: dict) -> dict:
+    for field, count in counts.items():
+        totals[field] = totals.get(field, 0) + count
+    return totals
+
+##################################################
+
+"""
+Define the function run by each worker process.  It cleans one partition and
+also returns how much the worker's date cache counters moved, so the parent
+process can merge them and report run-wide cache statistics in the log.  With
+profile=True the worker also profiles the partition before and after cleaning,
+so that work is spread over the pool too; with track=True it also returns the
+partition's ChangeBatch.  The profiles and batch are None otherwise.
+"""
+def clean_partition(df: pd.DataFrame, plan, profile: bool = False, track: bool = False):
+    before = rules.date_cache_info()
+    changes = ChangeBatch() if track else None
+    cleaned_df, change_counts = clean_dataframe(df, plan, changes)
+    after = rules.date_cache_info()
+    cache_counts = {key: after[key] - before[key] for key in ("hits", "misses", "rejected", "vectorized")}
+    profiles = (DataProfile().update(df), DataProfile().update(cleaned_df)) if profile else None
+    return cleaned_df, change_counts, cache_counts, profiles, changes
+
+"""
+Define the function run by each worker process in partitioned reading.  It
+reads one byte range of the input (from ingest.partition_ranges) and cleans it
+as clean_partition does, so the parsing is spread over the pool as well as the
+cleaning.  The rows read are returned first, for the change tracker; without
+tracking only the last one is returned, as the parent only needs it for the
+report's example changes.  They are followed by the column_kind of each
+column read, so the parent can check the range against the stream's types.
+"""
+def read_and_clean_range(input_csv: str, start: int, end: int, settings: dict, plan, track: bool = False):
+    df = read_range(input_csv, start, end, settings)
+    kinds = {col: column_kind(df[col]) for col in df.columns}
+    return (df if track else df.iloc[-1:], kinds) + clean_partition(df, plan, True, track)
+
+##################################################
+
+# Define the function to put cleaned partitions back together in their original order
+def concat_partitions(frames: list) -> pd.DataFrame:
+    combined = pd.concat(frames)
+    # pd.concat turns categoricals with different categories into plain objects,
+    # so dictionary-encoded columns are rebuilt with the union of their categories
+    for col in combined.columns:
+        parts = [frame[col] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts) and \
+                not isinstance(combined[col].dtype, pd.CategoricalDtype):
+            combined[col] = pd.Series(union_categoricals(parts), index=combined.index)
+    return combined
+
+##################################################
+
+# Define the function to split a DataFrame into contiguous row partitions
+def split_rows(df: pd.DataFrame, partitions: int) -> list:
+    # Partition sizes differ by at most one row, and no partition is empty
+    partitions = max(1, min(partitions, len(df)))
+    size, extra = divmod(len(df), partitions)
+    parts, start = [], 0
+    for n in range(partitions):
+        stop = start + size + (1 if n < extra else 0)
+        parts.append(df.iloc[start:stop])
+        start = stop
+    return parts
+
+##################################################
+
+"""
+Define the function to clean a whole DataFrame using several worker processes.
+Each worker cleans one row partition with clean_dataframe; the partitions are
+concatenated in their original order and the per-worker change counts are merged.
+With a tracker, each partition's changes are recorded in row order.  With
+workers=1 this is simply clean_dataframe.
+"""
+def clean_dataframe_parallel(df: pd.DataFrame, config, workers: int = 1, tracker=None):
+    # Compile the config once here rather than once per worker
+    config = as_plan(config)
+    if workers <= 1 or len(df) < 2:
+        changes = ChangeBatch() if tracker else None
+        cleaned_df, change_counts = clean_dataframe(df, config, changes)
+        if tracker:
+            tracker.record(df, cleaned_df, changes)
+        return cleaned_df, change_counts
+
+    parts = split_rows(df, workers)
+    with ProcessPoolExecutor(max_workers=len(parts)) as pool:
+        # map() yields results in submission order, which keeps the rows in order
+        results = list(pool.map(clean_partition, parts, repeat(config), repeat(False), repeat(bool(tracker))))
+
+    change_counts = {}
+    for part, (cleaned, counts, cache_counts, _, changes) in zip(parts, results):
+        merge_change_counts(change_counts, counts)
+        rules.merge_date_cache_info(cache_counts)
+        if tracker:
+            tracker.record(part, cleaned, changes)
+    cleaned_df = concat_partitions([result[0] for result in results])
+    return cleaned_df, change_counts
+
+##################################################
+
+# Define the function to fill in the streaming modes that are not set, rejecting combinations that cannot work
+def stream_modes(modes: dict = None) -> dict:
+    unknown = set(modes or {}) - set(DEFAULT_STREAM_MODES)
+    if unknown:
+        raise ValueError(f"Unknown streaming mode(s): {', '.join(sorted(unknown))}")
+    modes = {**DEFAULT_STREAM_MODES, **(modes or {})}
+    if modes["partitioned"] and (modes["pipelined"] or modes["checkpoint"]):
+        raise ValueError("Partitioned reading cannot be combined with pipelined mode or checkpoints")
+    # A compressed CSV is one stream, which cannot be cut back or added to
+    if modes["csv_compression"] and (modes["checkpoint"] or modes["append_to"]):
+        raise ValueError("A compressed cleaned CSV cannot be checkpointed or appended to")
+    return modes
+
+##################################################
+
+"""
+Define the function to clean a CSV file chunk by chunk.  The cleaned rows are
+written to output_path, and to the SQLite, columnar and PostgreSQL outputs that
+are given, as each chunk is produced; with workers > 1 the chunks are cleaned
+in a process pool, at most two per worker in flight.  modes holds the
+streaming modes (see DEFAULT_STREAM_MODES).  Returns the row count, the
+pre/post-clean DataProfiles, the change counts, the changes made to the last
+row and the SQLite and PostgreSQL writers' counts.
+"""
+def clean_csv_in_chunks(
+    input_csv: str,
+    output_path: str,
+    config,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    db_path: str = None,
+    table_name: str = "cleaned_data",
+    workers: int = 1,
+    sqlite_options: dict = None,
+    tracker=None,
+    ingest_options: dict = None,
+    columnar_paths: dict = None,
+    columnar_options: dict = None,
+    postgres_options: dict = None,
+    metrics=None,
+    modes: dict = None,
+) -> dict:
+    modes = stream_modes(modes)
+    checkpoint, append_to, partitioned = modes["checkpoint"], modes["append_to"], modes["partitioned"]
+    if (partitioned or checkpoint or append_to) and codec_of(input_csv):
+        raise ValueError("Checkpoints, append mode and partitioned reading need an uncompressed input")
+    # Compile the config once for every chunk
+    config = as_plan(config)
+    state = {
+        "rows": 0,
+        "chunks": 0,
+        "pre_profile": DataProfile(),
+        "post_profile": DataProfile(),
+        "change_counts": {},
+        "example_changes": {},
+        "column_types": {},
+    }
+    # Cut the outputs of an interrupted run back to its checkpoint and carry on from there
+    saved = checkpoint.saved if checkpoint else None
+    if saved:
+        rewind_outputs(saved, output_path, db_path, table_name)
+        state.update(rows=saved["rows"], chunks=saved["chunks"], **saved["state"])
+        if tracker:
+            tracker.restore(saved["tracker"] or {"rows": saved["rows"]})
+    # Rows appended to a file since an earlier run keep their numbers in the file
+    if append_to and tracker:
+        tracker.row_offset = append_to["rows"]
+    # Chunks after a checkpoint or an earlier append-mode run keep the column types decided before them
+    stream_types = StreamTypes(state["column_types"] or (append_to or {}).get("column_types"))
+    appending = bool(saved or append_to)
+    staged = StagedPipeline(modes["queue_size"], metrics) if modes["pipelined"] else None
+    sqlite_settings = dict(sqlite_options or {}, if_exists="append") if appending else (sqlite_options or {})
+    writer = open_sqlite_writer(db_path, table_name, **sqlite_settings) if db_path else None
+    columnar_writers = {
+        fmt: open_columnar_writer(fmt, path, columnar_options, streaming=True)
+        for fmt, path in (columnar_paths or {}).items()
+    }
+    pg_writer = PostgresCopyWriter(**postgres_options) if postgres_options else None
+
+    # The first chunk creates the cleaned CSV, later chunks (and those of a resumed run) are appended;
+    # a compressed CSV is one stream, kept open until the run ends
+    csv_started = [True] if appending else []
+    csv_file = open_output(output_path, modes["csv_compression"]) if modes["csv_compression"] else None
+    def write_csv(frame):
+        if csv_file:
+            frame.to_csv(csv_file, index=False, header=not csv_started)
+        else:
+            frame.to_csv(output_path, index=False, mode="a" if csv_started else "w", header=not csv_started)
+        csv_started.append(True)
+
+    # Every output as (stage name, write function), each written in chunk order
+    outputs = [("write_csv", write_csv)]
+    if writer:
+        outputs.append(("export_sqlite", writer.write))
+    outputs += [(f"export_{fmt}", columnar_writer.write) for fmt, columnar_writer in columnar_writers.items()]
+    if pg_writer:
+        outputs.append(("export_postgres", pg_writer.write))
+
+    # In pipelined mode each output gets its own writer thread; otherwise they are written in turn
+    def write_outputs(frame):
+        if staged:
+            staged.send(frame)
+            return
+        for name, write in outputs:
+            with stage(metrics, name):
+                write(frame)
+
+    # Record one cleaned chunk's changes and write it to every output, in the order the chunks were read
+    def write_chunk(chunk, cleaned_chunk, chunk_counts, changes):
+        merge_change_counts(state["change_counts"], chunk_counts)
+        state["chunks"] += 1
+        if tracker:
+            with stage(metrics, "track_changes"):
+                tracker.record(chunk, cleaned_chunk, changes)
+        write_outputs(cleaned_chunk)
+
+        # Keep the changes made to the most recent row as the example for the report
+        # (the reader yields one empty chunk for an input with a header but no rows;
+        # a partitioned worker that is not tracking changes only returns the last row read)
+        if len(cleaned_chunk):
+            state["example_changes"] = diff_row(chunk.iloc[-1].to_dict(), cleaned_chunk.iloc[-1].to_dict())
+        state["rows"] += len(cleaned_chunk)
+
+        # Save a checkpoint once the writer threads have written every chunk so far
+        if checkpoint and checkpoint.due(state["chunks"]):
+            # Types decided from chunks the reader thread has read ahead are the same on resume, so they are kept
+            state["column_types"] = stream_types.decimals
+            with stage(metrics, "checkpoint"):
+                if staged:
+                    staged.flush()
+                checkpoint.save(state, output_path, tracker)
+
+    try:
+        # Read the CSV lazily, chunk_size rows at a time, on the reader thread in pipelined mode
+        if saved:
+            offset, first_row = saved["input_offset"], saved["rows"]
+        elif append_to:
+            offset, first_row = append_to["offset"], append_to["rows"]
+        else:
+            offset, first_row = 0, 0
+        if partitioned:
+            # Ranges of about chunk_size rows, from the size of the records at the start
+            offset = offset or record_offset(input_csv, 0, 1)
+            target_bytes = chunk_size * average_record_bytes(input_csv, offset)
+            with stage(metrics, "partition"):
+                ranges = partition_ranges(input_csv, target_bytes, offset, modes["end"])
+                settings = range_settings(input_csv, ingest_options)
+            reader = iter_ranges(input_csv, ranges, settings, first_row, column_types=stream_types)
+        else:
+            reader = iter_csv(input_csv, ingest_options, chunk_size, offset=offset, first_row=first_row,
+                              end=modes["end"], column_types=stream_types)
+        if staged:
+            for name, write in outputs:
+                staged.add_writer(name, write)
+            reader = staged.read(reader)
+        elif metrics is not None:
+            reader = metrics.iterate("read", reader)
+        if workers <= 1:
+            for chunk in reader:
+                changes = ChangeBatch() if tracker else None
+                with stage(metrics, "clean"):
+                    cleaned_chunk, chunk_counts = clean_dataframe(chunk, config, changes)
+                with stage(metrics, "summarize"):
+                    state["pre_profile"].update(chunk)
+                    state["post_profile"].update(cleaned_chunk)
+                write_chunk(chunk, cleaned_chunk, chunk_counts, changes)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                next_row = [first_row]
+                # Collect one finished chunk's results and write it
+                def finish_oldest():
+                    chunk, future = pending.popleft()
+                    with stage(metrics, "clean"):
+                        result = future.result()
+                    if partitioned:
+                        # The worker read the chunk itself, so its rows are numbered here, in file order
+                        (start, stop), (chunk, kinds), result = chunk, result[:2], result[2:]
+                        if stream_types.casts(kinds):
+                            # The range read a column of decimals as whole numbers, so it is read and cleaned
+                            # again here, with the types of the stream (the same as a serial run)
+                            with stage(metrics, "clean"):
+                                chunk = stream_types.settle(read_range(input_csv, start, stop, settings))
+                                result = clean_partition(chunk, config, True, bool(tracker))
+                        stream_types.update(kinds)
+                        rows = len(result[0])
+                        if not rows:
+                            return
+                        chunk.index = pd.RangeIndex(next_row[0] + rows - len(chunk), next_row[0] + rows)
+                        result[0].index = pd.RangeIndex(next_row[0], next_row[0] + rows)
+                        next_row[0] += rows
+                    cleaned_chunk, chunk_counts, cache_counts, (pre, post), changes = result
+                    rules.merge_date_cache_info(cache_counts)
+                    state["pre_profile"].merge(pre)
+                    state["post_profile"].merge(post)
+                    write_chunk(chunk, cleaned_chunk, chunk_counts, changes)
+
+                # Partitioned, each worker reads its own byte range; otherwise chunks are read here
+                if partitioned:
+                    tasks = (((start, stop), (read_and_clean_range, input_csv, start, stop, settings, config,
+                                              bool(tracker)))
+                             for start, stop in ranges)
+                else:
+                    tasks = ((chunk, (clean_partition, chunk, config, True, bool(tracker))) for chunk in reader)
+                for chunk, task in tasks:
+                    pending.append((chunk, pool.submit(*task)))
+                    # Write finished chunks in order, waiting for the oldest once enough work is queued
+                    while pending and (len(pending) >= workers * 2 or pending[0][1].done()):
+                        finish_oldest()
+                while pending:
+                    finish_oldest()
+
+        # An input with a header but no rows still gets a cleaned CSV (and table) with that header
+        if not state["chunks"] and not appending:
+            write_outputs(read_header(input_csv, ingest_options))
+        # Wait for the writer threads to write the last chunk
+        if staged:
+            staged.close()
+    except BaseException:
+        # Stop the other stages first, so no writer thread still uses a connection
+        if staged:
+            staged.abort()
+        # Leave the PostgreSQL table as it was before this run
+        if pg_writer:
+            pg_writer.abort()
+        raise
+    finally:
+        # Closing finishes the compressed CSV, builds the SQLite indexes and commits the PostgreSQL load,
+        # so it counts as write and export time
+        if csv_file:
+            with stage(metrics, "write_csv"):
+                csv_file.close()
+        if writer:
+            with stage(metrics, "export_sqlite"):
+                writer.close()
+        for fmt, columnar_writer in columnar_writers.items():
+            with stage(metrics, f"export_{fmt}"):
+                columnar_writer.close()
+        if pg_writer:
+            with stage(metrics, "export_postgres"):
+                pg_writer.close()
+    state["column_types"] = stream_types.decimals
+    state["sqlite_stats"] = getattr(writer, "stats", None)
+    state["postgres_stats"] = pg_writer.stats if pg_writer else None
+    # The run is complete, so there is nothing left to resume
+    if checkpoint:
+        checkpoint.clear()
+
+    return state
+
+##################################################
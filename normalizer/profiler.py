@@ -0,0 +1,237 @@
+"""
+This module profiles a DataFrame in a single pass over each column.  For every
+column it counts nulls and distinct values, finds the shortest and longest value
+(as text), and keeps the most frequent values.  All of this comes from one
+factorize() per column, so the separate isnull() and nunique() scans the old
+summary needed are no longer repeated for every report.
+Profiles are plain structured objects: they can be built per chunk or per worker
+and combined with merge(), and are turned into text by reporter.format_profile
+only when a log line or report needs it.
+Distinct counts are exact while a column has at most distinct_limit distinct
+values; past that the column switches to a HyperLogLog sketch (about 1% error)
+and a bounded frequent-items summary, so memory no longer grows with the data.
+"""
+
+# Import necessary libraries
+import numpy as np
+import pandas as pd
+
+##################################################
+
+# Columns with more distinct values than this switch to approximate counting
+DISTINCT_EXACT_LIMIT = 100_000
+
+# Number of most frequent values kept for each column in reports
+TOP_K = 5
+
+# HyperLogLog precision: 2**14 registers give a standard error of about 0.8%
+HLL_PRECISION = 14
+
+# Number of candidate values kept per column once its counts are approximate
+FREQUENT_ITEMS_CAPACITY = 1000
+
+##################################################
+
+"""
+Define a HyperLogLog sketch for approximate distinct counts.  Each value's
+64-bit hash picks one register with its top bits, and the register keeps the
+longest run of leading zeros seen in the remaining bits.  Two sketches merge by
+taking the larger register values, so partial sketches from chunks or workers
+combine into exactly the sketch of all their values together.
+"""
+class HyperLogLog:
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    # Add an array of 64-bit value hashes to the sketch
+    def add_hashes(self, hashes: np.ndarray):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # A guard bit keeps the remaining bits non-zero, bounding the rank at 64 - p + 1
+        rest = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        # Bit length of rest, found exactly from its high and low 32-bit halves
+        high = (rest >> np.uint64(32)).astype(np.float64)
+        low = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bit_length = np.where(
+            high > 0,
+            np.floor(np.log2(np.maximum(high, 1))) + 33,
+            np.floor(np.log2(np.maximum(low, 1))) + 1,
+        )
+        rank = (65 - bit_length).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    # Combine another sketch into this one
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    # Estimate the number of distinct values added so far
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Small cardinalities are counted more accurately from the empty registers
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+##################################################
+
+# Define the function to hash values consistently across chunks and processes
+def hash_values(values) -> np.ndarray:
+    # The values are already distinct, so hash_array's own factorize step is skipped
+    return pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+
+##################################################
+
+"""
+Define the profile of one column.  While the column is small enough, counts
+holds the exact number of times each distinct value was seen (a Series indexed
+by value), which gives the distinct count and the top values directly.  Once it
+passes distinct_limit, the distinct values are moved into a HyperLogLog sketch
+and counts is trimmed to a Misra-Gries frequent-items summary: every value
+occurring more than 1/FREQUENT_ITEMS_CAPACITY of the time is still kept, with a
+count that is at most that fraction of the rows too low.
+"""
+class ColumnProfile:
+    def __init__(self, distinct_limit: int = DISTINCT_EXACT_LIMIT):
+        self.distinct_limit = distinct_limit
+        self.rows = 0
+        self.nulls = 0
+        self.min_length = None
+        self.max_length = None
+        self.counts = pd.Series(dtype="int64")
+        self.sketch = None
+
+    # Whether the distinct count and top value counts are exact
+    @property
+    def exact(self) -> bool:
+        return self.sketch is None
+
+    # Number of distinct non-null values (estimated once the column is approximate)
+    @property
+    def distinct(self) -> int:
+        return len(self.counts) if self.exact else self.sketch.estimate()
+
+    # Most frequent non-null values with their counts, most frequent first
+    def top_values(self, k: int = TOP_K) -> list:
+        # Ties are ordered by the value's text, so the result does not depend on chunking
+        top = self.counts.nlargest(k, keep="all")
+        order = np.lexsort((top.index.astype(str), -top.to_numpy()))[:k]
+        return list(top.iloc[order].items())
+
+    # Add a column's values (one chunk of rows) to the profile
+    def update(self, values: pd.Series) -> "ColumnProfile":
+        # factorize() is the same hashing pass nunique() makes; counting its codes adds little
+        codes, uniques = pd.factorize(values)
+        present = codes >= 0
+        # Categoricals only factorize to the categories in use; their values are kept as objects
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            uniques = np.asarray(uniques, dtype=object)
+        value_counts = pd.Series(np.bincount(codes[present], minlength=len(uniques)), index=uniques)
+        self.rows += len(values)
+        self.nulls += len(values) - int(present.sum())
+        if len(value_counts):
+            # Lengths are measured once per distinct value rather than once per row
+            distinct = value_counts.index.to_numpy()
+            if value_counts.index.inferred_type != "string":
+                distinct = distinct.astype(str)
+            lengths = np.fromiter(map(len, distinct), dtype=np.int64, count=len(distinct))
+            self._add(value_counts, int(lengths.min()), int(lengths.max()))
+        return self
+
+    # Combine another profile of the same column (for example another chunk's) into this one
+    def merge(self, other: "ColumnProfile") -> "ColumnProfile":
+        self.rows += other.rows
+        self.nulls += other.nulls
+        if other.min_length is not None:
+            if other.sketch is not None:
+                if self.sketch is None:
+                    self._start_sketch()
+                self.sketch.merge(other.sketch)
+            self._add(other.counts, other.min_length, other.max_length)
+        return self
+
+    # Fold value counts and length bounds into the profile
+    def _add(self, counts: pd.Series, min_length: int, max_length: int):
+        self.min_length = min_length if self.min_length is None else min(self.min_length, min_length)
+        self.max_length = max_length if self.max_length is None else max(self.max_length, max_length)
+        if len(self.counts):
+            self.counts = self.counts.add(counts, fill_value=0).astype("int64")
+        else:
+            self.counts = counts.astype("int64")
+        if self.sketch is not None:
+            self.sketch.add_hashes(hash_values(counts.index))
+            self._trim_counts()
+        elif len(self.counts) > self.distinct_limit:
+            self._start_sketch()
+            self._trim_counts()
+
+    # Move the exact distinct values into a HyperLogLog sketch
+    def _start_sketch(self):
+        self.sketch = HyperLogLog()
+        if len(self.counts):
+            self.sketch.add_hashes(hash_values(self.counts.index))
+
+    # Shrink counts to a Misra-Gries summary of at most FREQUENT_ITEMS_CAPACITY values
+    def _trim_counts(self):
+        if len(self.counts) <= FREQUENT_ITEMS_CAPACITY:
+            return
+        # Subtract the count of the first value that does not fit from every value
+        cutoff = self.counts.nlargest(FREQUENT_ITEMS_CAPACITY + 1).iloc[-1]
+        self.counts = self.counts[self.counts > cutoff] - cutoff
+
+##################################################
+
+"""
+Define the profile of a whole DataFrame: the row count plus one ColumnProfile
+per column, in column order.  Feed it chunks with update() and combine
+profiles built elsewhere with merge(); the result is the same as profiling all
+the rows at once (exactly, while no column passes distinct_limit).
+"""
+class DataProfile:
+    def __init__(self, distinct_limit: int = DISTINCT_EXACT_LIMIT):
+        self.distinct_limit = distinct_limit
+        self.rows = 0
+        self.columns = {}
+
+    # Add one chunk of rows to the profile
+    def update(self, df: pd.DataFrame) -> "DataProfile":
+        self.rows += len(df)
+        for col in df.columns:
+            self._column(col).update(df[col])
+        return self
+
+    # Combine another profile (for example from another chunk or worker) into this one
+    def merge(self, other: "DataProfile") -> "DataProfile":
+        self.rows += other.rows
+        for col, column_profile in other.columns.items():
+            self._column(col).merge(column_profile)
+        return self
+
+    # Null count per column, in column order
+    @property
+    def null_counts(self) -> dict:
+        return {col: profile.nulls for col, profile in self.columns.items()}
+
+    # Distinct value count per column, in column order
+    @property
+    def distinct_counts(self) -> dict:
+        return {col: profile.distinct for col, profile in self.columns.items()}
+
+    # Get a column's profile, adding an empty one the first time the column is seen
+    def _column(self, col) -> ColumnProfile:
+        if col not in self.columns:
+            self.columns[col] = ColumnProfile(self.distinct_limit)
+        return self.columns[col]
+
+##################################################
+
+# Define the function to profile a whole DataFrame in one go
+def profile_dataframe(df: pd.DataFrame, distinct_limit: int = DISTINCT_EXACT_LIMIT) -> DataProfile:
+    return DataProfile(distinct_limit).update(df)
+
+##################################################
@@ -3,7 +3,8 @@ The Reporter.py module will log each run of the normalizer to a timestamped
 log file in the /logs/ folder. It will also provide a summary of the DataFrame's 
 shape (total rows and columns), null counts (to spot missing data), and unique 
 values (to detect potential issues like duplicates or outlier values) as an 
-HTML report using a Jinja2 template.
+HTML report using a Jinja2 template.  The numbers come from a DataFrame profile
+(profiler.py), computed once per dataset and formatted here.
 """
 
 # Import necessary libraries
@@ -12,6 +13,8 @@ import pandas as pd                                # For handling DataFrames
 import logging                                     # For logging messages to a file
 from datetime import datetime                      # For generating timestamped log files
 from jinja2 import Environment, FileSystemLoader   # For rendering HTML reports via templates
+from functools import lru_cache                    # For loading the report template only once
+from normalizer.profiler import TOP_K, profile_dataframe  # For single-pass column profiles
 
 ##################################################
 
@@ -35,18 +38,70 @@ def setup_logger():
 
 ##################################################
 
-# Define the function to log a message
-def summarize_dataframe(df: pd.DataFrame, label: str) -> str:
-    # Returns a summary of the DataFrame's shape, null counts, and unique values.
+"""
+Define the function to format a DataFrame profile (see profiler.py) for the log
+and the HTML report.  The first sections keep the layout of the original
+summary (shape, null counts, unique value counts); value lengths and the most
+frequent values follow.  Columns whose distinct count is a HyperLogLog estimate
+are listed under the unique counts.
+"""
+def format_profile(profile, label: str, top_k: int = TOP_K) -> str:
+    columns = list(profile.columns)
+    null_counts = pd.Series(list(profile.null_counts.values()), index=columns, dtype="int64")
+    unique_counts = pd.Series(list(profile.distinct_counts.values()), index=columns, dtype="int64")
+    lengths = pd.DataFrame(
+        [[col.min_length, col.max_length] for col in profile.columns.values()],
+        index=columns, columns=["Min", "Max"]
+    )
+
     summary = [f"--- {label.upper()} DATA SUMMARY ---"]
-    summary.append(f"Shape: {df.shape}")
-    summary.append("\nNull Counts:\n" + str(df.isnull().sum()))
-    summary.append("\nUnique Value Counts:\n" + str(df.nunique()))
+    summary.append(f"Shape: {(profile.rows, len(columns))}")
+    summary.append("\nNull Counts:\n" + str(null_counts))
+    summary.append("\nUnique Value Counts:\n" + str(unique_counts))
+    approximate = [str(col) for col, column_profile in profile.columns.items() if not column_profile.exact]
+    if approximate:
+        summary.append("(approximate: " + ", ".join(approximate) + ")")
+    summary.append("\nValue Lengths:\n" + str(lengths))
+    summary.append(f"\nTop {top_k} Values:")
+    for col, column_profile in profile.columns.items():
+        top = ", ".join(f"{value!r} ({count})" for value, count in column_profile.top_values(top_k))
+        summary.append(f"{col}: {top or '(no frequent values)'}")
     # Joins the summary list into a single string with newlines
     return "\n".join(summary)
 
 ##################################################
 
+# Define the function to profile a DataFrame and format the result in one step
+def summarize_dataframe(df: pd.DataFrame, label: str) -> str:
+    # Returns a summary of the DataFrame's shape, null counts, unique values, lengths and top values.
+    return format_profile(profile_dataframe(df), label)
+
+##################################################
+
+# Define the function to format a ChangeTracker's statistics for the log
+def format_change_stats(stats: dict) -> str:
+    summary = ["--- CHANGES ---", f"Changed {stats['changed_values']} value(s) in {stats['rows']} row(s)."]
+    for field in stats["fields"]:
+        rules = ", ".join(f"{rule}: {count}" for rule, count in field["rules"].items())
+        summary.append(f"{field['field']}: {field['changed']} ({field['percent']:.1f}% of rows) [{rules}]")
+    if stats["sample"]:
+        summary.append(f"\nSample of {len(stats['sample'])} change(s):")
+        for change in stats["sample"]:
+            summary.append(f"  row {change['row']}, {change['field']}: '{change['from']}' ➜ '{change['to']}'")
+    if stats["sidecar_path"]:
+        summary.append(f"\nEvery change: {stats['sidecar_path']}")
+    return "\n".join(summary)
+
+##################################################
+
+# Define the function to load the HTML report template once per process
+@lru_cache(maxsize=None)
+def report_template(templates_dir: str = "templates"):
+    env = Environment(loader=FileSystemLoader(templates_dir))
+    return env.get_template("report_template.html")
+
+##################################################
+
 # Define the function to generate an HTML report using Jinja2
 def write_html_report(
     input_filename: str,
@@ -57,18 +112,21 @@ def write_html_report(
     post_summary: str,
     changes: str,
     example_row_number: int,  
+    change_stats: dict = None,
+    output_path: str = None,
+    columnar_paths: dict = None,
+    metrics: dict = None,
 ):
 
     # Create reports directory if it doesn't exist
     os.makedirs("reports", exist_ok=True)
 
-    # Create timestamp for unique report name
+    # Create timestamp for unique report name, unless the caller chose the name
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    output_path = f"reports/run_{timestamp}.html"
+    output_path = output_path or f"reports/run_{timestamp}.html"
 
-    # Load the HTML template from templates/ folder
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("report_template.html")
+    # Load the HTML template from templates/ folder (cached after the first report)
+    template = report_template()
 
     # Render the HTML with dynamic data
     html_content = template.render(
@@ -77,10 +135,13 @@ def write_html_report(
         config_path=config_path,
         clean_data_path=clean_data_path,
         sqlite_path=sqlite_path,
+        columnar_paths=columnar_paths or {},
         pre_summary=pre_summary.replace("\n", "<br>"),
         post_summary=post_summary.replace("\n", "<br>"),
         changes=changes,
-        example_row_number=example_row_number
+        example_row_number=example_row_number,
+        change_stats=change_stats,
+        metrics=metrics
     )
 
     # Write to HTML file
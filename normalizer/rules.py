@@ -6,11 +6,19 @@ The normalizer performs the following tasks on the data:
 2. Case Normalization: Converts strings to case (lower, upper, title, sentence).
 3. Character Sanitization: Removes unwanted characters from strings.
 4. Date Format Conversion: Converts date strings from one format to another.
+Each rule has a scalar version (one value at a time, used by clean_row) and a
+column version ending in _series (a whole pandas Series of strings at once, used
+by clean_dataframe).  Both versions must produce identical results.
 """
 
 # Import Regular Expressions and datetime for date handling
+# Include pandas for the column (Series) versions of the rules
+# Include lru_cache to memoize date parsing and compiled character filters
 import re
+from collections import namedtuple
 from datetime import datetime
+from functools import lru_cache
+import pandas as pd
 
 ##################################################
 
@@ -44,32 +52,123 @@ def normalize_case(val, case_type="title"):
 
 ##################################################
 
+# Character classes kept by remove_invalid_chars, by profile name
+# Each is the inside of a regex [...] class; everything outside it is removed
+CHAR_PROFILES = {
+    # A-Z, a-z, 0-9, underscore, whitespace, hyphen, at sign, and period/dot
+    "default": r"\w\s\-@\.",
+    # Letters, digits and whitespace only
+    "alphanumeric": r"A-Za-z0-9\s",
+    # Digits, minus sign and decimal point
+    "numeric": r"\d\-\.",
+    # ZIP and ZIP+4 codes such as 10001-1234
+    "zip": r"\d\-",
+    # Email addresses, including plus addressing such as name+tag@site.com
+    "email": r"\w\-@\.\+",
+    # Free text keeps common punctuation as well
+    "text": r"\w\s\-@\.,;:!?'\"()&/#%$",
+}
+
+# The allowed character class used when remove_invalid_chars is simply true
+DEFAULT_ALLOWED_CHARS = CHAR_PROFILES["default"]
+
+# A compiled character filter: the regex matching unwanted characters, and a
+# str.translate table that deletes every allowed ASCII character
+CharFilter = namedtuple("CharFilter", ["pattern", "allowed_ascii"])
+
+##################################################
+
+# Define the function to compile a character filter once per allowed character class
+@lru_cache(maxsize=None)
+def compile_char_filter(allowed: str = DEFAULT_ALLOWED_CHARS) -> CharFilter:
+    # ^ inside the brackets means 'not these characters'
+    try:
+        pattern = re.compile(f"[^{allowed}]")
+    except re.error as e:
+        raise ValueError(f"Invalid allowed character class '{allowed}': {e}")
+    allowed_ascii = {code: None for code in range(128) if not pattern.match(chr(code))}
+    return CharFilter(pattern, allowed_ascii)
+
+##################################################
+
+# Define the function to look up the allowed character class of a named profile
+def char_profile(name: str) -> str:
+    if name not in CHAR_PROFILES:
+        raise ValueError(
+            f"Unknown remove_invalid_chars profile '{name}', expected one of: {', '.join(CHAR_PROFILES)}"
+        )
+    return CHAR_PROFILES[name]
+
+##################################################
+
 # Define the function to remove unwanted characters
-def remove_invalid_chars(val):
+def remove_invalid_chars(val, allowed=DEFAULT_ALLOWED_CHARS):
     # If value is a string, remove unwanted characters
-    # Using REGEX to keep A-Z, a-z, 0-9, whitespace, hyphen, at sign, and period/dot
+    # By default using REGEX to keep A-Z, a-z, 0-9, whitespace, hyphen, at sign, and period/dot
     # Removing special characters such as !@#$%^&*()_+={}[]|\:;"'<>,?/`~
+    # Other allow-lists can be passed as a regex character class, see CHAR_PROFILES
     if isinstance(val, str):
-        # Using regex to keep only wanted characters:
-        # ^ means 'not these characters'
-        # \w matches alphanumeric characters and underscores
-        # \s matches whitespace characters
-        # \- matches hyphen
-        # @ matches at sign
-        # \. matches period/dot
-        return re.sub(r"[^\w\s\-@\.]", "", val)
+        char_filter = compile_char_filter(allowed)
+        # Fast path: a pure-ASCII value made only of allowed characters is already clean,
+        # deleting those characters with str.translate leaves nothing behind
+        if val.isascii() and not val.translate(char_filter.allowed_ascii):
+            return val
+        return char_filter.pattern.sub("", val)
     # If not a string, return the value unchanged
     # Prevents errors when non-string types are passed
     return val
 
 ##################################################
 
-# Define the function to fix date formats
-def fix_date_format(val, input_format="%m/%d/%Y", output_format="%Y-%m-%d"):
-    # If value is string, converts date strings from one format to another.
-    # Returns original value if conversion fails.
-    if not isinstance(val, str):
-        return val 
+# Maximum number of (value, input_format, output_format) results kept in the date cache
+DATE_CACHE_SIZE = 65536
+
+# strptime directives that only ever match digits (plus a leading space for %d and %I)
+NUMERIC_DATE_DIRECTIVES = set("dfGHIjmMSuUVwWyY")
+
+# Date parsing counters that are not tracked by lru_cache itself: values parsed
+# column-wise by fix_date_format_series (which never reach the cache), values
+# rejected by the pre-check, and counts merged in from worker processes
+_date_cache_stats = {"hits": 0, "misses": 0, "rejected": 0, "vectorized": 0}
+
+##################################################
+
+"""
+Define the function to build a fast pre-check pattern for a date format.
+If every directive in the format is numeric (like %m/%d/%Y %H:%M), a matching
+value can only contain digits, whitespace and the format's literal characters.
+Values with any other character cannot match, so strptime is never tried on
+them.  Returns None for formats with text directives (%b, %A, %p, %z, ...).
+The pattern is deliberately loose: it never rejects a value strptime accepts.
+"""
+@lru_cache(maxsize=None)
+def date_precheck_pattern(input_format: str):
+    allowed = set()
+    i = 0
+    while i < len(input_format):
+        char = input_format[i]
+        if char == "%" and i + 1 < len(input_format):
+            directive = input_format[i + 1]
+            if directive == "%":
+                allowed.add("%")
+            elif directive in NUMERIC_DATE_DIRECTIVES:
+                allowed.add(" ")
+            else:
+                return None
+            i += 2
+        else:
+            allowed.add(char)
+            i += 1
+    # strptime matches any run of whitespace where the format has whitespace
+    chars = "".join(re.escape(c) for c in sorted(allowed) if not c.isspace())
+    space = r"\s" if any(c.isspace() for c in allowed) else ""
+    return re.compile(rf"[\d{chars}{space}]+", re.IGNORECASE)
+
+##################################################
+
+# Define the cached date conversion, which also caches values that fail to parse
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _convert_date(val, input_format, output_format):
     try:
         # Tries to parse a string into a datetime object using the input_format
         dt = datetime.strptime(val, input_format)
@@ -79,5 +178,129 @@ def fix_date_format(val, input_format="%m/%d/%Y", output_format="%Y-%m-%d"):
     # It will raise a ValueError, which is caught, and returns the original value
     except ValueError:
         return val
-    
-##################################################
\ No newline at end of file
+
+##################################################
+
+# Define the function to fix date formats
+def fix_date_format(val, input_format="%m/%d/%Y", output_format="%Y-%m-%d"):
+    # If value is string, converts date strings from one format to another.
+    # Returns original value if conversion fails.
+    if not isinstance(val, str):
+        return val
+    # Skip strptime for values that clearly cannot match the format
+    pattern = date_precheck_pattern(input_format)
+    if pattern is not None and not pattern.fullmatch(val):
+        _date_cache_stats["rejected"] += 1
+        return val
+    # Timestamps repeat heavily, so each distinct value is only parsed once
+    return _convert_date(val, input_format, output_format)
+
+##################################################
+
+# Define the function to report the date cache counters, for the run log
+def date_cache_info() -> dict:
+    info = _convert_date.cache_info()
+    return {
+        "hits": info.hits + _date_cache_stats["hits"],
+        "misses": info.misses + _date_cache_stats["misses"],
+        "rejected": _date_cache_stats["rejected"],
+        "vectorized": _date_cache_stats["vectorized"],
+        "size": info.currsize,
+    }
+
+# Define the function to describe the date counters in one line of the run log
+def date_cache_summary() -> str:
+    info = date_cache_info()
+    return (f"Date parsing: {info['vectorized']} values parsed column-wise by pandas; "
+            f"the date cache had {info['hits']} hits and {info['misses']} misses on the values pandas "
+            f"could not parse and on row-by-row cleaning; {info['rejected']} values skipped by the format pre-check.")
+
+##################################################
+
+# Define the function to add counters collected elsewhere (e.g. a worker process)
+def merge_date_cache_info(counts: dict):
+    for key in ("hits", "misses", "rejected", "vectorized"):
+        _date_cache_stats[key] += counts.get(key, 0)
+
+##################################################
+
+# Define the function to empty the date cache and reset its counters
+def clear_date_cache():
+    _convert_date.cache_clear()
+    for key in _date_cache_stats:
+        _date_cache_stats[key] = 0
+
+##################################################
+
+# Define the column version of strip_whitespace
+def strip_whitespace_series(values: pd.Series) -> pd.Series:
+    # Expects a Series that only holds strings, see cleaner.clean_column
+    return values.str.strip()
+
+##################################################
+
+# Define the column version of normalize_case
+def normalize_case_series(values: pd.Series, case_type="title") -> pd.Series:
+    # Expects a Series that only holds strings, see cleaner.clean_column
+    if case_type == "lower":
+        return values.str.lower()
+    elif case_type == "upper":
+        return values.str.upper()
+    elif case_type == "title":
+        return values.str.title()
+    elif case_type == "sentence":
+        return values.str[:1].str.upper() + values.str[1:].str.lower()
+    # If case_type is not recognized, return the original values
+    return values
+
+##################################################
+
+# Define the column version of remove_invalid_chars
+def remove_invalid_chars_series(values: pd.Series, allowed=DEFAULT_ALLOWED_CHARS) -> pd.Series:
+    # Same compiled pattern as remove_invalid_chars, applied to the whole column at once
+    # Only values that contain an unwanted character are rewritten
+    pattern = compile_char_filter(allowed).pattern
+    dirty = values.str.contains(pattern)
+    if not dirty.any():
+        return values
+    cleaned = values.copy()
+    cleaned[dirty] = values[dirty].str.replace(pattern, "", regex=True)
+    return cleaned
+
+##################################################
+
+# Define the column version of fix_date_format
+def fix_date_format_series(values: pd.Series, input_format="%m/%d/%Y", output_format="%Y-%m-%d") -> pd.Series:
+    # Expects a Series that only holds strings, see cleaner.clean_column
+    # Values that fail the pre-check cannot be dates, so they are left as they are
+    pattern = date_precheck_pattern(input_format)
+    if pattern is not None:
+        candidates = values.str.fullmatch(pattern)
+        _date_cache_stats["rejected"] += int((~candidates).sum())
+        if not candidates.any():
+            return values
+        if not candidates.all():
+            converted = values.copy()
+            converted[candidates] = fix_date_format_series(values[candidates], input_format, output_format)
+            return converted
+
+    # pd.to_datetime treats the literal strings "now" and "today" as the current time,
+    # where datetime.strptime rejects them, so those are left for the scalar fallback
+    special = values.isin(["now", "today"])
+    try:
+        parsed = pd.to_datetime(values.mask(special), format=input_format, errors="coerce")
+        converted = parsed.dt.strftime(output_format).astype(object).copy()
+    # Mixed UTC offsets and similar edge cases cannot be held in a single datetime column
+    except (ValueError, TypeError, AttributeError):
+        return values.map(lambda v: fix_date_format(v, input_format, output_format))
+    # Values pandas could not parse (including out-of-bounds years) go through the
+    # cached scalar rule so that the result always matches datetime.strptime exactly
+    failed = parsed.isna()
+    _date_cache_stats["vectorized"] += len(failed) - int(failed.sum())
+    if failed.any():
+        converted[failed] = values[failed].map(
+            lambda v: fix_date_format(v, input_format, output_format)
+        )
+    return converted
+
+##################################################
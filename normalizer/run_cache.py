@@ -0,0 +1,130 @@
+"""
+This module provides the content-addressed run cache.  Each run is identified by
+a key built from a hash of the input file's bytes, a hash of the normalized
+config, the toolkit version, and any run options that change the output.  The
+outputs of a finished run (cleaned CSV, SQLite DB, HTML report) are recorded in
+a manifest under that key.  When the same input is cleaned again with the same
+config, the recorded outputs are reused instead of cleaning everything again,
+as long as they still exist unchanged on disk.
+"""
+
+# Import necessary libraries
+import hashlib
+import json
+import os
+import threading
+from normalizer import __version__
+
+##################################################
+
+# Directory and file holding the run cache manifest
+CACHE_DIR = ".dnt_cache"
+MANIFEST_NAME = "manifest.json"
+
+# Files are hashed in blocks of this many bytes
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Serializes manifest updates when several files are cleaned at once in one process
+_manifest_lock = threading.Lock()
+
+##################################################
+
+# Define the function to hash a file's bytes without reading it all into memory
+def file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+##################################################
+
+# Define the function to hash a config, so key order and formatting do not matter
+def config_digest(config: dict) -> str:
+    normalized = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+##################################################
+
+# Define the function to record a file's size and modification time
+def file_stamp(path: str) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+##################################################
+
+# Define the functions to load and save the manifest of cached runs
+def load_manifest(cache_dir: str = CACHE_DIR) -> dict:
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    # A missing or damaged manifest simply means nothing is cached yet
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_manifest(manifest: dict, cache_dir: str = CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    # Write to a temporary file first so an interrupted save never leaves half a manifest
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+##################################################
+
+"""
+Define the function to build the cache key for a run.  If the manifest already
+holds the input file's hash for the same size and modification time, that hash
+is reused, so checking an unchanged multi-gigabyte file costs a stat() rather
+than a full read.  Returns the key and the input's hash and stamp for record_run.
+"""
+def run_cache_key(input_path: str, config: dict, options: dict = None, cache_dir: str = CACHE_DIR):
+    stamp = file_stamp(input_path)
+    entry = load_manifest(cache_dir).get(os.path.abspath(input_path), {})
+    if entry.get("input_stamp") == stamp:
+        input_hash = entry["input_hash"]
+    else:
+        input_hash = file_digest(input_path)
+    parts = {
+        "input": input_hash,
+        "config": config_digest(config),
+        "version": __version__,
+        "options": options or {},
+    }
+    key = hashlib.blake2b(json.dumps(parts, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+    return key, {"input_hash": input_hash, "input_stamp": stamp}
+
+##################################################
+
+# Define the function to find the outputs of an earlier run with the same key
+def lookup_run(input_path: str, key: str, cache_dir: str = CACHE_DIR):
+    entry = load_manifest(cache_dir).get(os.path.abspath(input_path))
+    if not entry or entry.get("key") != key:
+        return None
+    # Every recorded output must still be there, untouched since the run
+    for output in entry["outputs"].values():
+        if output is None:
+            continue
+        if not os.path.exists(output["path"]) or file_stamp(output["path"]) != output["stamp"]:
+            return None
+    return {name: output["path"] if output else None for name, output in entry["outputs"].items()}
+
+##################################################
+
+# Define the function to record the outputs of a finished run under its key
+def record_run(input_path: str, key: str, input_info: dict, outputs: dict, cache_dir: str = CACHE_DIR):
+    entry = {
+        "key": key,
+        **input_info,
+        "outputs": {
+            name: {"path": os.path.abspath(path), "stamp": file_stamp(path)} if path else None
+            for name, path in outputs.items()
+        },
+    }
+    with _manifest_lock:
+        manifest = load_manifest(cache_dir)
+        manifest[os.path.abspath(input_path)] = entry
+        save_manifest(manifest, cache_dir)
+
+##################################################
@@ -0,0 +1,347 @@
+"""
+This module runs the cleaning of one CSV file from start to finish, without any
+prompts: run cache lookup, profiling, cleaning (in memory or streamed in chunks),
+CSV and optional SQLite, Parquet, Arrow and PostgreSQL export, change
+statistics, and the HTML report.  Every step is timed as a stage of a
+RunMetrics (instrumentation.py); the timings are logged, shown in the report,
+and written to a JSON file if asked.
+Both the interactive main.py and the headless batch CLI (cli.py) call
+clean_file, so a batch can clean many files in one process while sharing the
+loaded config, its compiled CleaningPlan and the report template.
+Long streaming runs can save checkpoints and be resumed from the last one
+(checkpoint.py), and files that only grow can be cleaned in append mode, one
+batch of new rows at a time (append_mode.py).  Inputs compressed with gzip,
+bzip2 or Zstandard are read directly, and the cleaned CSV can be written
+compressed (compression.py).
+"""
+
+# Import necessary libraries
+import os
+import re
+import time
+import logging
+from normalizer.cleaner import as_plan, diff_row
+from normalizer.append_mode import append_identity, load_append_state, save_append_state
+from normalizer.change_tracker import ChangeTracker
+from normalizer.checkpoint import DEFAULT_CHECKPOINT_EVERY, RunCheckpoint, run_identity
+from normalizer.columnar_exporter import FORMAT_EXTENSIONS, export_columnar, export_options
+from normalizer.compression import (
+    CODEC_EXTENSIONS, check_input, codec_of, csv_stem, open_output, output_compression,
+)
+from normalizer.ingest import complete_records, ingest_options, read_csv, record_offset
+from normalizer.instrumentation import RunMetrics
+from normalizer.pg_exporter import export_to_postgres, postgres_options
+from normalizer.pipeline import DEFAULT_CHUNK_SIZE, clean_csv_in_chunks, clean_dataframe_parallel
+from normalizer.profiler import profile_dataframe
+from normalizer.reporter import format_change_stats, format_profile, write_html_report
+from normalizer.run_cache import lookup_run, record_run, run_cache_key
+from normalizer.sql_exporter import export_to_sqlite, sqlite_options
+
+##################################################
+
+# Output folders for the cleaned CSV and SQLite files
+CSV_EXPORT_DIR = "data/2-CSV-Export"
+SQLITE_EXPORT_DIR = "data/3-SQLite-Export"
+COLUMNAR_EXPORT_DIR = "data/4-Columnar-Export"
+
+##################################################
+
+# Define the function to build the cleaned CSV path for an input CSV, ending in the codec's extension if compressed
+def csv_export_path(input_csv: str, compression: dict = None) -> str:
+    os.makedirs(CSV_EXPORT_DIR, exist_ok=True)
+    # Append file name with "_CLEANED" to clearly indicate post-cleaning status
+    name = csv_stem(input_csv) + "_CLEANED.csv"
+    return os.path.join(CSV_EXPORT_DIR, name + (CODEC_EXTENSIONS[compression["codec"]] if compression else ""))
+
+# Define the function to build the SQLite export path for an input CSV
+def sqlite_export_path(input_csv: str) -> str:
+    # Ensure the directory exists for SQLite export
+    os.makedirs(SQLITE_EXPORT_DIR, exist_ok=True)
+    # Append "_CLEANED" to the database name to match the cleaned CSV
+    return os.path.join(SQLITE_EXPORT_DIR, csv_stem(input_csv) + "_CLEANED.db")
+
+# Define the function to build the default PostgreSQL table name for an input CSV
+def postgres_table_name(input_csv: str) -> str:
+    return re.sub(r"[^0-9a-z_]+", "_", csv_stem(input_csv).lower()) + "_cleaned"
+
+# Define the function to build the Parquet or Arrow export path for an input CSV
+def columnar_export_path(input_csv: str, fmt: str) -> str:
+    os.makedirs(COLUMNAR_EXPORT_DIR, exist_ok=True)
+    return os.path.join(COLUMNAR_EXPORT_DIR, csv_stem(input_csv) + "_CLEANED" + FORMAT_EXTENSIONS[fmt])
+
+# Run modes of clean_file, all off by default; each one implies streaming mode:
+#   pipelined: overlap reading, cleaning and writing on separate threads
+#   checkpoint_every: save a checkpoint every that many chunks (cleaned CSV and replace-mode SQLite only)
+#   resume: carry on from the file's last checkpoint, if it was saved with the same input, config and outputs
+#   append: clean only the rows added since the last append-mode run, or the whole file (logging why)
+#   partitioned: read the file in byte ranges on record boundaries, parsed by the worker processes
+# Checkpoints, append mode and partitioned reading work with byte offsets, so they need uncompressed files.
+DEFAULT_RUN_MODES = {"pipelined": False, "checkpoint_every": None, "resume": False, "append": False,
+                     "partitioned": False}
+
+# Define the function to read the run modes from the command-line flags shared by main.py and the batch CLI
+def run_modes(args) -> dict:
+    return {"pipelined": args.pipelined, "checkpoint_every": args.checkpoint_every, "resume": args.resume,
+            "append": args.append, "partitioned": args.partitioned_read}
+
+##################################################
+
+# Define a logger adapter that prefixes every message with the file it is about
+class FileLogger(logging.LoggerAdapter):
+    def process(self, msg, kwargs):
+        return f"[{self.extra['file']}] {msg}", kwargs
+
+##################################################
+
+"""
+Define the function to clean one CSV file with an already loaded config (compiled
+unless a plan is passed in), reusing the outputs of an identical earlier run
+from the run cache unless force is set.  formats adds columnar formats to those
+of the config, and modes holds the run modes (see DEFAULT_RUN_MODES); outputs
+and modes that cannot be combined raise ValueError.  Every step is timed in
+metrics.  Returns the run's status ("cleaned", "cached" or "appended"), row
+count, seconds and output paths.
+"""
+def clean_file(
+    input_csv: str,
+    raw_config: dict,
+    config_path: str,
+    plan=None,
+    export_sqlite: bool = False,
+    chunk_size: int = None,
+    workers: int = 1,
+    force: bool = False,
+    sidecar_path: str = None,
+    report_path: str = None,
+    logger=None,
+    formats: list = None,
+    export_postgres: bool = False,
+    metrics: RunMetrics = None,
+    metrics_path: str = None,
+    modes: dict = None,
+) -> dict:
+    started = time.perf_counter()
+    logger = logger or logging.getLogger()
+    metrics = metrics if metrics is not None else RunMetrics()
+
+    # Log the timings and write them to the metrics file, if there is one
+    def finish_metrics():
+        logger.info(metrics.format())
+        return metrics.write_json(metrics_path) if metrics_path else None
+
+    plan = as_plan(plan if plan is not None else raw_config)
+    unknown = set(modes or {}) - set(DEFAULT_RUN_MODES)
+    if unknown:
+        raise ValueError(f"Unknown run mode(s): {', '.join(sorted(unknown))}")
+    modes = {**DEFAULT_RUN_MODES, **(modes or {})}
+    pipelined, checkpoint_every, resume, append, partitioned = (
+        modes[key] for key in ("pipelined", "checkpoint_every", "resume", "append", "partitioned")
+    )
+    # The staged pipeline works on chunks, so it implies streaming mode
+    # So do checkpoints, which are taken between chunks, and append mode and partitioned reading,
+    # which read ranges of the file
+    if (pipelined or checkpoint_every or resume or append or partitioned) and not chunk_size:
+        chunk_size = DEFAULT_CHUNK_SIZE
+    sql_settings = sqlite_options(raw_config)
+    read_settings = ingest_options(raw_config)
+    export_settings = export_options(raw_config, formats)
+    csv_compression = output_compression(input_csv, export_settings["csv"])
+    output_path = csv_export_path(input_csv, csv_compression)
+    db_path = sqlite_export_path(input_csv) if export_sqlite else None
+    columnar_paths = {fmt: columnar_export_path(input_csv, fmt) for fmt in export_settings["formats"]}
+    pg_settings = None
+    if export_postgres:
+        pg_settings = postgres_options(raw_config)
+        pg_settings["table"] = pg_settings["table"] or postgres_table_name(input_csv)
+    pg_table = f"{pg_settings['schema']}.{pg_settings['table']}" if pg_settings else None
+
+    # Byte offsets only point at records in an uncompressed file
+    check_input(input_csv)
+    if (checkpoint_every or resume or append or partitioned) and (codec_of(input_csv) or csv_compression):
+        raise ValueError(
+            "Checkpoints, append mode and partitioned reading need an uncompressed input and cleaned CSV, "
+            "since they work with byte offsets in those files"
+        )
+
+    # Only outputs that can be cut back to a checkpoint's position can be resumed
+    checkpoint = None
+    if checkpoint_every or resume:
+        if columnar_paths or pg_settings or sql_settings.get("mode") == "incremental":
+            raise ValueError(
+                "Checkpoints only support the cleaned CSV and a SQLite export in replace mode, "
+                "not columnar formats, PostgreSQL or incremental SQLite updates"
+            )
+        identity = run_identity(input_csv, raw_config, {
+            "chunk_size": chunk_size, "output": os.path.abspath(output_path),
+            "sqlite": os.path.abspath(db_path) if db_path else None,
+        })
+        checkpoint = RunCheckpoint(input_csv, identity, every=checkpoint_every or DEFAULT_CHECKPOINT_EVERY,
+                                   resume=resume)
+        if checkpoint.saved:
+            logger.info(f"Resuming from the checkpoint after row {checkpoint.saved['rows']} "
+                        f"(chunk {checkpoint.saved['chunks']}): {checkpoint.path}")
+        elif resume:
+            logger.info("No checkpoint to resume from; cleaning from the start.")
+
+    # In append mode, carry on after the rows of the last append-mode run if the file has only grown since
+    append_state, append_end, append_id = None, None, None
+    if append:
+        if columnar_paths or pg_settings or sql_settings.get("delete_missing"):
+            raise ValueError(
+                "Append mode only writes the cleaned CSV and SQLite (without delete_missing), "
+                "not columnar formats or PostgreSQL"
+            )
+        if checkpoint:
+            raise ValueError("Append mode cannot be combined with checkpoints")
+        append_id = append_identity(raw_config, {
+            "output": os.path.abspath(output_path), "sqlite": os.path.abspath(db_path) if db_path else None,
+        })
+        append_state, reason = load_append_state(input_csv, append_id)
+        start = append_state["offset"] if append_state else record_offset(input_csv, 0, 1)
+        append_end, new_rows = complete_records(input_csv, start)
+        if append_state:
+            logger.info(f"Append mode: {new_rows} new row(s) after row {append_state['rows']} (byte {start}).")
+        else:
+            logger.info(f"Append mode: cleaning the whole file, since {reason}.")
+
+    # Reuse the outputs of an earlier run if nothing has changed since
+    run_options = {"chunk_size": chunk_size, "sqlite": export_sqlite, "output": os.path.abspath(output_path),
+                   "formats": export_settings["formats"]}
+    with metrics.stage("run_cache"):
+        cache_key, input_info = run_cache_key(input_csv, raw_config, run_options)
+        # A checkpoint means the last run with these outputs did not finish; a sidecar is only written by cleaning
+        cached = None if force or export_postgres or append or sidecar_path or (checkpoint and checkpoint.saved) \
+            else lookup_run(input_csv, cache_key)
+    if cached:
+        logger.info(f"Input and config unchanged since an earlier run (cache key {cache_key}); reusing its outputs.")
+        columnar = {fmt: cached.pop(fmt) for fmt in columnar_paths}
+        return {"input": input_csv, "status": "cached", "rows": None,
+                "seconds": time.perf_counter() - started, **cached, "columnar": columnar, "postgres": None,
+                "sidecar": None, "metrics": finish_metrics()}
+
+    # Count and sample the changes; the full list of changes only goes to the sidecar file
+    tracker = ChangeTracker(sidecar_path=sidecar_path)
+    try:
+        # Streaming mode: read, clean and write the CSV (and SQLite table) chunk by chunk
+        if chunk_size:
+            logger.info(f"Streaming mode with chunk size {chunk_size}" + (", pipelined." if pipelined else
+                        ", partitioned read." if partitioned else "."))
+            result = clean_csv_in_chunks(
+                input_csv, output_path, plan, chunk_size=chunk_size, db_path=db_path,
+                workers=workers, sqlite_options=sql_settings, tracker=tracker,
+                ingest_options=read_settings, columnar_paths=columnar_paths, columnar_options=export_settings,
+                postgres_options=pg_settings, metrics=metrics,
+                modes={"pipelined": pipelined, "checkpoint": checkpoint, "append_to": append_state,
+                       "end": append_end, "partitioned": partitioned, "csv_compression": csv_compression},
+            )
+            rows = result["rows"]
+            pre_summary = format_profile(result["pre_profile"], "Pre-Clean")
+            post_summary = format_profile(result["post_profile"], "Post-Clean")
+            changes = result["example_changes"]
+            sqlite_stats = result["sqlite_stats"]
+            pg_stats = result["postgres_stats"]
+            logger.info(pre_summary)
+
+        # In-memory mode: load the whole CSV at once
+        else:
+            # Read with the config's dtype hints, usecols and engine
+            with metrics.stage("read"):
+                df = read_csv(input_csv, read_settings)
+            rows = len(df)
+            with metrics.stage("summarize"):
+                pre_summary = format_profile(profile_dataframe(df), "Pre-Clean")
+            logger.info(pre_summary)
+
+            # Each field's rule chain is applied to the whole column at once,
+            # on row partitions spread over several processes if workers > 1
+            with metrics.stage("clean"):
+                cleaned_df, _ = clean_dataframe_parallel(df, plan, workers=workers, tracker=tracker)
+            # Use the last row as the example of the changes made
+            changes = diff_row(df.iloc[-1].to_dict(), cleaned_df.iloc[-1].to_dict()) if len(df) else {}
+            with metrics.stage("summarize"):
+                post_summary = format_profile(profile_dataframe(cleaned_df), "Post-Clean")
+
+            with metrics.stage("write_csv"):
+                with open_output(output_path, csv_compression) as f:
+                    cleaned_df.to_csv(f, index=False)
+            sqlite_stats = None
+            if export_sqlite:
+                with metrics.stage("export_sqlite"):
+                    sqlite_stats = export_to_sqlite(cleaned_df, db_path, table_name="cleaned_data", **sql_settings)
+            for fmt, path in columnar_paths.items():
+                with metrics.stage(f"export_{fmt}"):
+                    export_columnar(cleaned_df, path, fmt, export_settings)
+            pg_stats = None
+            if pg_settings:
+                with metrics.stage("export_postgres"):
+                    pg_stats = export_to_postgres(cleaned_df, **pg_settings)
+    finally:
+        tracker.close()
+
+    # Remember how far this run got, so the next append-mode run only cleans the rows added after it
+    rows_before = append_state["rows"] if append_state else 0
+    if append:
+        # Append mode implies streaming mode, so the column types of the stream are there to carry over
+        save_append_state(input_csv, append_id, append_end, rows_before + rows, [output_path, db_path],
+                          column_types=result["column_types"])
+
+    # Log the changes per field and rule, with a bounded sample of examples
+    change_stats = tracker.stats()
+    metrics.add_rule_costs(tracker.rule_costs())
+    logger.info(format_change_stats(change_stats))
+    logger.info(post_summary)
+    logger.info(f"Cleaned CSV: {os.path.abspath(output_path)}")
+    if export_sqlite:
+        logger.info(f"SQLite export: {os.path.abspath(db_path)}")
+        # In incremental mode, log how many rows actually had to be written
+        if sqlite_stats:
+            logger.info(
+                f"Incremental SQLite update: {sqlite_stats['inserted']} inserted, "
+                f"{sqlite_stats['updated']} updated, {sqlite_stats['unchanged']} unchanged, "
+                f"{sqlite_stats['deleted']} deleted"
+                + (" (table rebuilt for incremental mode)" if sqlite_stats["rebuilt"] else "")
+            )
+    for fmt, path in columnar_paths.items():
+        logger.info(f"{fmt.capitalize()} export: {os.path.abspath(path)}")
+    if pg_stats:
+        logger.info(
+            f"PostgreSQL export to {pg_table} ({pg_stats['mode']}): {pg_stats['rows']} rows copied, "
+            f"{pg_stats['inserted']} inserted, {pg_stats['updated']} updated"
+        )
+
+    # Create the post-cleaning HTML report for user review, with the timings of every step before it
+    with metrics.stage("report"):
+        report_path = write_html_report(
+            input_filename=os.path.basename(input_csv),
+            config_path=config_path,
+            clean_data_path=output_path,
+            sqlite_path=db_path,
+            columnar_paths=columnar_paths,
+            pre_summary=pre_summary,
+            post_summary=post_summary,
+            changes=changes if changes else None,
+            example_row_number=rows_before + rows if changes else None,
+            change_stats=change_stats,
+            output_path=report_path,
+            metrics=metrics.as_dict(),
+        )
+
+    # Record the outputs so an identical re-run can reuse them
+    with metrics.stage("run_cache"):
+        record_run(input_csv, cache_key, input_info,
+                   {"csv": output_path, "sqlite": db_path, "report": report_path, **columnar_paths})
+    return {
+        "input": input_csv,
+        "status": "appended" if append_state else "cleaned",
+        "rows": rows,
+        "seconds": time.perf_counter() - started,
+        "csv": os.path.abspath(output_path),
+        "sqlite": os.path.abspath(db_path) if db_path else None,
+        "report": os.path.abspath(report_path),
+        "columnar": {fmt: os.path.abspath(path) for fmt, path in columnar_paths.items()},
+        "postgres": pg_table,
+        "sidecar": sidecar_path,
+        "metrics": finish_metrics(),
+    }
+
+##################################################
@@ -1,7 +1,17 @@
 """
 This module provides the function to export cleaned DataFrames to SQLite.
-This export allows users to save their cleaned data for further analysis, 
+This export allows users to save their cleaned data for further analysis,
 reporting, or integration with other database systems.
+Rather than pandas' to_sql, the export is a bulk load:
+1. The table is created with column types derived from the cleaned data.
+2. Rows are inserted with executemany in large batches inside one transaction.
+3. WAL journaling, relaxed syncing and a large page cache are switched on for the
+   duration of the load, and the previous journal mode is restored afterwards.
+4. Indexes listed in the YAML config are built once the rows are loaded.
+In incremental mode (sqlite: mode: incremental) the table is keyed on a
+configured primary key and keeps a content hash per row.  Re-runs then only
+insert new rows, update rows whose hash changed with INSERT ... ON CONFLICT DO
+UPDATE, and (optionally) delete rows whose key no longer appears in the input.
 """
 
 # Import necessary libraries
@@ -10,10 +20,301 @@ import sqlite3
 
 ##################################################
 
+# Default number of rows sent to executemany at a time
+DEFAULT_BATCH_SIZE = 50_000
+
+# Name of the per-row content hash column kept in incremental mode
+ROW_HASH_COLUMN = "_row_hash"
+
+# Pragmas set while rows are being loaded (cache_size is negative to mean KiB, so 256 MiB)
+LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "cache_size": -262144,
+    "temp_store": "MEMORY",
+}
+
+##################################################
+
+# Define the function to quote a table, column or index name for SQLite
+def quote_identifier(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+##################################################
+
+# Define the function to choose a declared SQLite type for each DataFrame column
+def sqlite_column_types(df: pd.DataFrame) -> dict:
+    types = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        # Categoricals are typed by their categories
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtype = dtype.categories.dtype
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+            types[col] = "INTEGER"
+        elif pd.api.types.is_float_dtype(dtype):
+            types[col] = "REAL"
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            types[col] = "TIMESTAMP"
+        else:
+            # Object columns are typed by what they actually hold
+            kind = pd.api.types.infer_dtype(df[col], skipna=True)
+            if kind in ("integer", "boolean"):
+                types[col] = "INTEGER"
+            elif kind in ("floating", "mixed-integer-float"):
+                types[col] = "REAL"
+            else:
+                types[col] = "TEXT"
+    return types
+
+##################################################
+
+# Define the function to turn a slice of a DataFrame into rows that sqlite3 accepts
+def dataframe_rows(df: pd.DataFrame) -> list:
+    columns = []
+    for col in df.columns:
+        values = df[col]
+        # sqlite3 cannot bind Timestamps, so datetimes are stored as text like to_sql does
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            values = values.map(lambda ts: None if pd.isna(ts) else ts.isoformat(sep=" "))
+        # tolist() converts numpy scalars to Python ones; nulls then become None
+        items = values.tolist()
+        for position in values.isna().to_numpy().nonzero()[0]:
+            items[position] = None
+        columns.append(items)
+    return list(zip(*columns))
+
+# Define the function to hash each row by the text of its values, so the hash does not depend on the column dtypes
+def row_hashes(df: pd.DataFrame) -> list:
+    text = df.astype(str).mask(df.isna(), "")
+    return pd.util.hash_pandas_object(text, index=False).to_numpy().view("int64").tolist()
+
+##################################################
+
+# Define the function to read the optional sqlite section of the YAML config
+def sqlite_options(config: dict) -> dict:
+    options = (config or {}).get("sqlite") or {}
+    if not isinstance(options, dict):
+        raise ValueError("The sqlite section of the config must be a mapping")
+    unknown = set(options) - {"batch_size", "indexes", "mode", "primary_key", "delete_missing"}
+    if unknown:
+        raise ValueError(f"Unknown sqlite option(s): {', '.join(sorted(map(str, unknown)))}")
+    batch_size = options.get("batch_size", DEFAULT_BATCH_SIZE)
+    if not isinstance(batch_size, int) or batch_size < 1:
+        raise ValueError(f"sqlite batch_size must be a positive whole number, got: {batch_size!r}")
+    # Each index is a column name or a list of column names
+    indexes = []
+    for index in options.get("indexes") or []:
+        columns = [index] if isinstance(index, str) else index
+        if not isinstance(columns, list) or not columns or not all(isinstance(c, str) for c in columns):
+            raise ValueError(f"Each sqlite index must be a column name or a list of column names, got: {index!r}")
+        indexes.append(columns)
+    # Incremental mode needs a primary key column to match rows between runs
+    mode = options.get("mode", "replace")
+    if mode not in ("replace", "incremental"):
+        raise ValueError(f"sqlite mode must be 'replace' or 'incremental', got: {mode!r}")
+    result = {"batch_size": batch_size, "indexes": indexes}
+    if mode == "incremental":
+        primary_key = options.get("primary_key")
+        if not isinstance(primary_key, str) or not primary_key:
+            raise ValueError("sqlite mode 'incremental' needs a primary_key column name")
+        result.update(mode=mode, primary_key=primary_key, delete_missing=bool(options.get("delete_missing", False)))
+    return result
+
+##################################################
+
+"""
+Define the bulk SQLite writer.  It keeps one connection open so the streaming
+pipeline can write many chunks into the same table: the first write creates
+(or replaces) the table, later writes append to it, and close() builds the
+indexes and restores the database's journal mode.
+"""
+class SQLiteBulkWriter:
+    def __init__(self, db_path: str, table_name: str = "cleaned_data", if_exists: str = "replace",
+                 batch_size: int = DEFAULT_BATCH_SIZE, indexes=None):
+        if if_exists not in ("replace", "append", "fail"):
+            raise ValueError(f"if_exists must be 'replace', 'append' or 'fail', got: {if_exists!r}")
+        self.db_path = db_path
+        self.table_name = table_name
+        self.if_exists = if_exists
+        self.batch_size = batch_size
+        self.indexes = indexes or []
+        self.columns = None
+        # The staged pipeline writes from its own writer thread; the writer is never used by two threads at once
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Remember the journal mode so it can be restored once the load is done
+        self.previous_journal_mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        for pragma, value in LOAD_PRAGMAS.items():
+            self.conn.execute(f"PRAGMA {pragma} = {value}")
+
+    # Create the table from the first DataFrame written
+    def create_table(self, df: pd.DataFrame):
+        table = quote_identifier(self.table_name)
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table_name,)
+        ).fetchone()
+        if exists and self.if_exists == "fail":
+            raise ValueError(f"Table '{self.table_name}' already exists in {self.db_path}")
+        if exists and self.if_exists == "replace":
+            self.conn.execute(f"DROP TABLE {table}")
+        column_defs = ", ".join(
+            f"{quote_identifier(col)} {col_type}" for col, col_type in sqlite_column_types(df).items()
+        )
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_defs})")
+
+    # Insert a DataFrame's rows in batches, all inside one transaction
+    def write(self, df: pd.DataFrame):
+        if self.columns is None:
+            self.columns = list(df.columns)
+            self.create_table(df)
+        placeholders = ", ".join("?" for _ in self.columns)
+        column_names = ", ".join(quote_identifier(col) for col in self.columns)
+        sql = f"INSERT INTO {quote_identifier(self.table_name)} ({column_names}) VALUES ({placeholders})"
+        with self.conn:
+            for start in range(0, len(df), self.batch_size):
+                self.conn.executemany(sql, dataframe_rows(df.iloc[start:start + self.batch_size]))
+
+    # Build the configured indexes, restore the journal mode, and close the connection
+    def close(self):
+        try:
+            if self.columns is not None:
+                with self.conn:
+                    for columns in self.indexes:
+                        name = f"idx_{self.table_name}_{'_'.join(columns)}"
+                        column_list = ", ".join(quote_identifier(col) for col in columns)
+                        self.conn.execute(
+                            f"CREATE INDEX IF NOT EXISTS {quote_identifier(name)} "
+                            f"ON {quote_identifier(self.table_name)} ({column_list})"
+                        )
+            self.conn.execute(f"PRAGMA journal_mode = {self.previous_journal_mode}")
+        finally:
+            self.conn.close()
+
+    # Allow use as a context manager
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+##################################################
+
+"""
+Define the incremental SQLite writer.  The table is created with primary_key as
+its PRIMARY KEY plus a _row_hash column holding a content hash of each row.
+On open, the (key, hash) pairs already in the table are read; each write then
+skips unchanged rows and upserts only new or changed ones.  With delete_missing,
+close() deletes rows whose key was not written during this run.  A table from
+a full (non-incremental) export lacks the hash column and is rebuilt once.
+"""
+class SQLiteUpsertWriter(SQLiteBulkWriter):
+    def __init__(self, db_path: str, table_name: str = "cleaned_data", primary_key: str = None,
+                 delete_missing: bool = False, batch_size: int = DEFAULT_BATCH_SIZE, indexes=None):
+        super().__init__(db_path, table_name, if_exists="append", batch_size=batch_size, indexes=indexes)
+        self.primary_key = primary_key
+        self.delete_missing = delete_missing
+        self.existing = {}
+        self.seen = set()
+        self.stats = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "rebuilt": False}
+
+    # Create the keyed table, or reuse it if it already has the expected layout
+    def create_table(self, df: pd.DataFrame):
+        if self.primary_key not in df.columns:
+            raise ValueError(f"Primary key column '{self.primary_key}' is not in the data")
+        table = quote_identifier(self.table_name)
+        info = {row[1]: row[5] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        expected = set(df.columns) | {ROW_HASH_COLUMN}
+        if info and (set(info) != expected or not info.get(self.primary_key)):
+            # Layout changed, or the table came from a full export: rebuild it once
+            self.conn.execute(f"DROP TABLE {table}")
+            self.stats["rebuilt"] = True
+            info = {}
+        if not info:
+            column_defs = ", ".join(
+                f"{quote_identifier(col)} {col_type}" + (" PRIMARY KEY" if col == self.primary_key else "")
+                for col, col_type in sqlite_column_types(df).items()
+            )
+            self.conn.execute(f"CREATE TABLE {table} ({column_defs}, {quote_identifier(ROW_HASH_COLUMN)} INTEGER)")
+        # Read the keys and hashes already stored, to compare against the new rows
+        self.existing = dict(self.conn.execute(
+            f"SELECT {quote_identifier(self.primary_key)}, {quote_identifier(ROW_HASH_COLUMN)} FROM {table}"
+        ))
+
+    # Upsert the new and changed rows of a DataFrame, skipping unchanged ones
+    def write(self, df: pd.DataFrame):
+        if self.columns is None:
+            self.columns = list(df.columns)
+            self.create_table(df)
+        keys = df[self.primary_key]
+        if keys.isna().any():
+            raise ValueError(f"Primary key column '{self.primary_key}' contains empty values")
+        key_list = keys.tolist()
+        if keys.duplicated().any() or not self.seen.isdisjoint(key_list):
+            raise ValueError(f"Primary key column '{self.primary_key}' contains duplicate values")
+        self.seen.update(key_list)
+
+        # Hash each row's cleaned values; stored as a signed 64-bit integer
+        hashes = row_hashes(df[self.columns])
+        changed = [self.existing.get(key) != row_hash for key, row_hash in zip(key_list, hashes)]
+        inserted = sum(1 for key, is_changed in zip(key_list, changed) if is_changed and key not in self.existing)
+        self.stats["inserted"] += inserted
+        self.stats["updated"] += sum(changed) - inserted
+        self.stats["unchanged"] += len(changed) - sum(changed)
+
+        changed_df = df[self.columns][changed]
+        changed_hashes = [row_hash for row_hash, is_changed in zip(hashes, changed) if is_changed]
+        columns = self.columns + [ROW_HASH_COLUMN]
+        column_names = ", ".join(quote_identifier(col) for col in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(
+            f"{quote_identifier(col)} = excluded.{quote_identifier(col)}" for col in columns if col != self.primary_key
+        )
+        sql = (
+            f"INSERT INTO {quote_identifier(self.table_name)} ({column_names}) VALUES ({placeholders}) "
+            f"ON CONFLICT({quote_identifier(self.primary_key)}) DO UPDATE SET {updates}"
+        )
+        with self.conn:
+            for start in range(0, len(changed_df), self.batch_size):
+                rows = dataframe_rows(changed_df.iloc[start:start + self.batch_size])
+                batch_hashes = changed_hashes[start:start + self.batch_size]
+                self.conn.executemany(sql, [row + (row_hash,) for row, row_hash in zip(rows, batch_hashes)])
+
+    # Delete rows that were not in this run's input, then finish like a bulk load
+    def close(self):
+        try:
+            if self.delete_missing and self.columns is not None:
+                missing = [(key,) for key in self.existing if key not in self.seen]
+                with self.conn:
+                    self.conn.executemany(
+                        f"DELETE FROM {quote_identifier(self.table_name)} "
+                        f"WHERE {quote_identifier(self.primary_key)} = ?", missing
+                    )
+                self.stats["deleted"] = len(missing)
+        finally:
+            super().close()
+
+##################################################
+
+# Define the function to open the right SQLite writer for the configured mode
+def open_sqlite_writer(db_path: str, table_name: str = "cleaned_data", if_exists: str = "replace",
+                       batch_size: int = DEFAULT_BATCH_SIZE, indexes=None, mode: str = "replace",
+                       primary_key: str = None, delete_missing: bool = False):
+    if mode == "incremental":
+        return SQLiteUpsertWriter(db_path, table_name, primary_key=primary_key, delete_missing=delete_missing,
+                                  batch_size=batch_size, indexes=indexes)
+    return SQLiteBulkWriter(db_path, table_name, if_exists=if_exists, batch_size=batch_size, indexes=indexes)
+
+##################################################
+
 # Define function to export DataFrame to SQLite
-def export_to_sqlite(df: pd.DataFrame, db_path: str, table_name: str = "cleaned_data"):
-    conn = sqlite3.connect(db_path)
-    df.to_sql(table_name, conn, if_exists='replace', index=False)
-    conn.close()
+# Use if_exists='append' to add further chunks of rows to a table created earlier
+# In incremental mode, returns counts of inserted, updated, unchanged and deleted rows
+def export_to_sqlite(df: pd.DataFrame, db_path: str, table_name: str = "cleaned_data", if_exists: str = "replace",
+                     batch_size: int = DEFAULT_BATCH_SIZE, indexes=None, mode: str = "replace",
+                     primary_key: str = None, delete_missing: bool = False):
+    with open_sqlite_writer(db_path, table_name, if_exists=if_exists, batch_size=batch_size, indexes=indexes,
+                            mode=mode, primary_key=primary_key, delete_missing=delete_missing) as writer:
+        writer.write(df)
+    return getattr(writer, "stats", None)
 
-##################################################
\ No newline at end of file
+##################################################
@@ -0,0 +1,191 @@
+"""
+This module provides a staged pipeline executor, so reading, cleaning and
+writing overlap instead of taking turns.  In plain streaming mode one thread
+reads a chunk, cleans it, then writes it to every output: the disk is idle
+while a chunk is cleaned and the CPU is idle while it is written.  Here each
+stage runs on its own and the stages are connected by bounded queues:
+1. A reader thread reads the next chunks while the current one is cleaned.
+2. The cleaning stage runs in the calling thread (and may hand chunks to a
+   process pool), taking chunks from the reader's queue.
+3. Every output (CSV, SQLite, Parquet, PostgreSQL, ...) has its own writer
+   thread and queue.  Each cleaned chunk is sent to every writer, so the
+   outputs are written at the same time, each in chunk order.
+The queues hold at most queue_size chunks, so a slow stage holds back the
+stages before it (backpressure) and memory stays bounded: at most about
+queue_size * (writers + 1) chunks are buffered besides those being processed.
+The first error in any stage stops every stage and is raised again in the
+calling thread, so a failed write aborts the run just like in plain mode.
+Pandas parsing, sqlite3, file writes and network I/O release the GIL for much
+of their work, which is what lets the threads overlap; on slow (e.g.
+NFS-backed) inputs most of the read latency is hidden behind the cleaning.
+"""
+
+# Import necessary libraries
+import queue
+import threading
+from normalizer.instrumentation import stage
+
+##################################################
+
+# Default number of chunks each queue holds
+DEFAULT_QUEUE_SIZE = 2
+
+# Seconds a blocked stage waits before checking whether another stage failed
+POLL_SECONDS = 0.1
+
+# Marker sent after the last chunk
+END = object()
+
+##################################################
+
+"""
+Define the staged pipeline.  read() starts the reader thread and returns an
+iterator over its chunks; add_writer() starts one writer thread per output;
+send() queues a cleaned chunk for every writer.  close() waits until every
+writer has written every chunk and raises the first error of any stage;
+flush() waits the same way but leaves the writers running (for checkpoints);
+abort() stops all stages after an error in the calling thread.  Used as a
+context manager, an error inside the block aborts, otherwise the block's end
+closes.  With metrics, reading and each writer are timed as their named
+stages, one call per chunk.
+"""
+class StagedPipeline:
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE, metrics=None):
+        if not isinstance(queue_size, int) or queue_size < 1:
+            raise ValueError(f"queue_size must be a positive whole number, got: {queue_size!r}")
+        self.queue_size = queue_size
+        self.metrics = metrics
+        self.failed = threading.Event()
+        self.error = None
+        self.error_lock = threading.Lock()
+        self.threads = []
+        self.writer_queues = []
+
+    # Keep the first error of any stage and tell every other stage to stop
+    def fail(self, error: BaseException):
+        with self.error_lock:
+            if self.error is None:
+                self.error = error
+        self.failed.set()
+
+    # Raise the first error of another stage, if there was one
+    def check(self):
+        if self.failed.is_set() and self.error is not None:
+            raise self.error
+
+    # Put an item on a queue, waiting while it is full unless the pipeline has failed
+    def put(self, items: queue.Queue, item) -> bool:
+        while not self.failed.is_set():
+            try:
+                items.put(item, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # Take an item from a queue, waiting while it is empty unless the pipeline has failed
+    def get(self, items: queue.Queue):
+        while not self.failed.is_set():
+            try:
+                return items.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return END
+
+    # Start a daemon thread running one stage, recording its error if it fails
+    def start(self, name: str, target, *args):
+        def run():
+            try:
+                target(*args)
+            except BaseException as exc:
+                self.fail(exc)
+        thread = threading.Thread(target=run, name=f"dnt-{name}", daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    # Start the reader thread over chunks and return an iterator over what it reads
+    def read(self, chunks, name: str = "read"):
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+
+        def reader():
+            source = iter(chunks)
+            try:
+                while not self.failed.is_set():
+                    with stage(self.metrics, name):
+                        chunk = next(source, END)
+                    if chunk is END or not self.put(chunk_queue, chunk):
+                        break
+            finally:
+                # Close a generator that was not read to the end, so its file is closed too
+                if hasattr(source, "close"):
+                    source.close()
+            self.put(chunk_queue, END)
+
+        self.start(name, reader)
+        return self.iterate(chunk_queue)
+
+    # Yield the chunks from the reader's queue until the end marker
+    def iterate(self, chunk_queue: queue.Queue):
+        while True:
+            chunk = self.get(chunk_queue)
+            if chunk is END:
+                # The queue only ends early if a stage failed
+                self.check()
+                return
+            yield chunk
+
+    # Start a writer thread that passes every chunk sent to the pipeline to write
+    def add_writer(self, name: str, write):
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        self.writer_queues.append(chunk_queue)
+
+        def writer():
+            while True:
+                chunk = self.get(chunk_queue)
+                if chunk is END:
+                    return
+                with stage(self.metrics, name):
+                    write(chunk)
+                chunk_queue.task_done()
+
+        self.start(name, writer)
+
+    # Queue a cleaned chunk for every writer, waiting while a writer is behind
+    def send(self, chunk):
+        for chunk_queue in self.writer_queues:
+            if not self.put(chunk_queue, chunk):
+                break
+        self.check()
+
+    # Wait until every writer has written every chunk sent so far, then raise the first error of any stage
+    def flush(self):
+        for chunk_queue in self.writer_queues:
+            with chunk_queue.all_tasks_done:
+                while chunk_queue.unfinished_tasks and not self.failed.is_set():
+                    chunk_queue.all_tasks_done.wait(POLL_SECONDS)
+        self.check()
+
+    # Wait for every writer to finish, then raise the first error of any stage
+    def close(self):
+        for chunk_queue in self.writer_queues:
+            self.put(chunk_queue, END)
+        for thread in self.threads:
+            thread.join()
+        self.check()
+
+    # Stop every stage after an error in the calling thread and wait for the threads
+    def abort(self):
+        self.failed.set()
+        for thread in self.threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+##################################################
@@ -0,0 +1,147 @@
+"""
+Test cases for append mode.
+Verifies that a last line still being written is left for the next run, that
+each append-mode run cleans only the rows added since the last one and
+appends them to the cleaned CSV and SQLite table, with the same result as
+cleaning the whole file (with the same column types), and that a truncated or
+rewritten file, a changed config or a changed output falls back to a full run.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import glob
+import sqlite3
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+from normalizer.append_mode import append_state_path
+from normalizer.ingest import complete_records, record_offset
+from normalizer.runner import clean_file
+
+##################################################
+
+# Config with rules that change every row of the test input
+CONFIG = {
+    "field_rules": {
+        "Name": {"trim_whitespace": True, "normalize_case": "title"},
+        "Zip": {"remove_invalid_chars": "zip"},
+    }
+}
+
+# Name of the test input, used for its outputs under data/
+NAME = "append_test_feed"
+
+##################################################
+
+# Define a helper to format rows of the test input
+def lines(start, stop):
+    return "".join(f"  name {i} ,{10000 + i}-x\n" for i in range(start, stop))
+
+# Define a helper to clean the test input in append mode and return the result and the cleaned rows
+def run_append(input_csv, config=CONFIG, append=True, **options):
+    result = clean_file(input_csv, config, "config.yaml", export_sqlite=True, chunk_size=2, modes={"append": append},
+                        report_path=os.path.join(os.path.dirname(input_csv), "report.html"), **options)
+    with open(result["csv"], encoding="utf-8") as f:
+        csv_text = f.read()
+    with sqlite3.connect(result["sqlite"]) as conn:
+        rows = conn.execute("SELECT Name, Zip FROM cleaned_data").fetchall()
+    return result, csv_text, rows
+
+# Define a fixture giving the test input's path and removing its outputs and append state afterwards
+@pytest.fixture
+def feed(tmp_path):
+    input_csv = str(tmp_path / f"{NAME}.csv")
+    yield input_csv
+    for path in glob.glob(f"data/*/{NAME}_CLEANED.*") + [append_state_path(input_csv)]:
+        if os.path.exists(path):
+            os.remove(path)
+
+##################################################
+
+# Test case for the last complete record leaving out a line that is still being written
+def test_complete_records(tmp_path):
+    path = tmp_path / "growing.csv"
+    path.write_text('Name,Zip\na,1\n\nb,"2\n3"\nc,"4', encoding="utf-8")
+    start = record_offset(str(path), 0, 1)
+    assert complete_records(str(path), start) == (len("Name,Zip\na,1\n\nb,\"2\n3\"\n"), 2)
+    # An unfinished line without a quote is left out too, until its newline is written
+    path.write_text("Name,Zip\na,1\nb,", encoding="utf-8")
+    assert complete_records(str(path), start) == (len("Name,Zip\na,1\n"), 1)
+
+##################################################
+
+# Test case for each run appending only the new rows, matching a clean of the whole file
+def test_append_only_new_rows(feed):
+    with open(feed, "w", encoding="utf-8") as f:
+        f.write("Name,Zip\n" + lines(0, 5) + "  half written")
+    first, _, _ = run_append(feed)
+    assert first["status"] == "cleaned" and first["rows"] == 5
+
+    # The half-written line is finished and more rows are added
+    with open(feed, "a", encoding="utf-8") as f:
+        f.write(" ,10099-x\n" + lines(5, 8))
+    second, csv_text, rows = run_append(feed)
+    assert second["status"] == "appended" and second["rows"] == 4
+
+    # Nothing new: nothing is appended
+    third, csv_again, _ = run_append(feed)
+    assert third["status"] == "appended" and third["rows"] == 0
+    assert csv_again == csv_text
+
+    # A full clean of the same file gives the same CSV and table
+    full, full_csv, full_rows = run_append(feed, force=True, append=False)
+    assert full["status"] == "cleaned"
+    assert csv_text == full_csv and rows == full_rows
+    assert "Half Written,10099-" in csv_text
+
+# Test case for appended whole numbers in a column of decimals being written as decimals, as in a full clean
+def test_append_keeps_column_types(feed):
+    with open(feed, "w", encoding="utf-8") as f:
+        f.write("Name,Zip,Score\n" + "".join(f"n{i},{10000 + i},{i}.5\n" for i in range(3)))
+    run_append(feed)
+    with open(feed, "a", encoding="utf-8") as f:
+        f.write("".join(f"n{i},{10000 + i},{i}\n" for i in range(3, 6)))
+    appended, csv_text, _ = run_append(feed)
+    assert appended["status"] == "appended" and ",4.0\n" in csv_text
+    assert csv_text == run_append(feed, force=True, append=False)[1]
+
+##################################################
+
+# Test case for a truncated or rewritten file, changed config or changed output falling back to a full run
+def test_fallback_to_full_run(feed):
+    with open(feed, "w", encoding="utf-8") as f:
+        f.write("Name,Zip\n" + lines(0, 6))
+    run_append(feed)
+
+    # Rewritten with different rows but the same header and a larger size
+    with open(feed, "w", encoding="utf-8") as f:
+        f.write("Name,Zip\n" + lines(10, 18))
+    result, csv_text, _ = run_append(feed)
+    assert result["status"] == "cleaned" and result["rows"] == 8
+    assert "Name 0," not in csv_text
+
+    # Truncated
+    with open(feed, "w", encoding="utf-8") as f:
+        f.write("Name,Zip\n" + lines(10, 12))
+    assert run_append(feed)[0]["status"] == "cleaned"
+
+    # Config changed
+    changed = {"field_rules": {"Name": {"normalize_case": "upper"}}}
+    assert run_append(feed, config=changed)[0]["status"] == "cleaned"
+    assert run_append(feed, config=changed)[0]["status"] == "appended"
+
+    # Cleaned CSV edited since the last run
+    with open(f"data/2-CSV-Export/{NAME}_CLEANED.csv", "a", encoding="utf-8") as f:
+        f.write("edited,by hand\n")
+    assert run_append(feed, config=changed)[0]["status"] == "cleaned"
+
+# Test case for outputs that cannot be appended to being rejected
+def test_unsupported_outputs(feed):
+    with open(feed, "w", encoding="utf-8") as f:
+        f.write("Name,Zip\n" + lines(0, 2))
+    with pytest.raises(ValueError, match="Append mode"):
+        clean_file(feed, dict(CONFIG, export={"formats": ["parquet"]}), "config.yaml", modes={"append": True})
+    with pytest.raises(ValueError, match="checkpoints"):
+        clean_file(feed, CONFIG, "config.yaml", modes={"append": True, "checkpoint_every": 1})
+
+##################################################
@@ -0,0 +1,49 @@
+"""
+Test cases for the benchmark suite.
+Verifies that the synthetic data generator honours its settings and is
+repeatable, and that a small run of the stage benchmark times every stage and
+writes JSON results that can be compared with an earlier run.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+from benchmarks.bench_stages import format_results, main, run_benchmark
+from benchmarks.synthetic import generate_311_data, write_311_csv
+
+##################################################
+
+# Test case for the generator settings and its seeded output
+def test_synthetic_data_settings(tmp_path):
+    assert generate_311_data(500).equals(generate_311_data(500))
+    df = generate_311_data(5000, cardinality=200, null_rate=0.2, mixed_dates=0.5)
+    assert df["Complaint Type"].nunique() == 200
+    assert 0.15 < df["Agency"].isna().mean() < 0.25
+    # Roughly half the dates are not in the usual m/d/Y format
+    assert 0.4 < (~df["Created_Date"].str.match(r"\d{1,2}/\d{1,2}/\d{4} ")).mean() < 0.6
+
+    # A file written in pieces has consecutive keys and shares the variants of every piece
+    path = write_311_csv(str(tmp_path / "bench.csv"), 2500, piece_rows=1000, cardinality=50)
+    written = pd.read_csv(path)
+    assert written["UI_Key"].tolist() == list(range(60_000_000, 60_002_500))
+    assert written["Agency"].nunique() == 50
+
+# Test case for a small benchmark run timing every stage
+def test_stage_benchmark(tmp_path):
+    results = run_benchmark(300, row_sample=50)
+    names = [stage["stage"] for stage in results["stages"]]
+    assert names[0] == "read" and names[-1] == "render_report"
+    assert {"rules.fix_date_format", "clean_row", "clean_dataframe", "export_sqlite"} <= set(names)
+    assert results["meta"]["rows"] == 300
+
+    # The command writes JSON results and compares them with a baseline
+    output = tmp_path / "bench.json"
+    main(["--rows", "300", "--row-sample", "50", "--output", str(output)])
+    saved = json.loads(output.read_text(encoding="utf-8"))
+    assert [stage["stage"] for stage in saved["stages"]] == names
+    assert "%" in format_results(saved, results)
+
+##################################################
@@ -0,0 +1,98 @@
+"""
+Test cases for the change tracker.
+Verifies per-field and per-rule change counts (plain and dictionary-encoded),
+the bounded reservoir sample, the JSON lines sidecar, and that parallel and
+streaming runs record the same changes as a serial run.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+from normalizer.change_tracker import ChangeBatch, ChangeTracker
+from normalizer.cleaner import clean_dataframe
+from normalizer.config_loader import load_config
+from normalizer.pipeline import clean_csv_in_chunks, clean_dataframe_parallel
+
+##################################################
+
+# Set the sample input, config and a small config with several rules per field
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+CONFIG_PATH = "config/config.yaml"
+RULES_CONFIG = {
+    "field_rules": {
+        "Name": {"trim_whitespace": True, "normalize_case": "title",
+                 "replace_nulls_with": {"enabled": True, "value": "Unknown"}},
+        "Zip": {"remove_invalid_chars": "zip"},
+    }
+}
+
+##################################################
+
+# Test case for changes being counted per field and per rule
+def test_rule_counts():
+    df = pd.DataFrame({"Name": ["  ann ", "Bob", None, "cy"], "Zip": ["10001", "1000 2", "x9", "10003"]})
+    changes = ChangeBatch()
+    cleaned_df, change_counts = clean_dataframe(df, RULES_CONFIG, changes)
+    assert changes.field_counts == change_counts == {"Name": 3, "Zip": 2}
+    assert changes.rule_counts["Name"] == {"replace_nulls_with": 1, "trim_whitespace": 1, "normalize_case": 2}
+    assert changes.rule_counts["Zip"] == {"remove_invalid_chars": 2}
+    assert changes.positions["Name"].tolist() == [0, 2, 3]
+
+##################################################
+
+# Test case for dictionary-encoded columns counting every row, not every distinct value
+def test_rule_counts_with_dictionary_encoding():
+    df = pd.DataFrame({"Name": ["  ann ", "Bob", None, "cy"] * 500, "Zip": ["10001", "x9"] * 1000})
+    encoded = ChangeBatch()
+    clean_dataframe(df, {**RULES_CONFIG, "dictionary_encoding": {"min_rows": 1}}, encoded)
+    plain = ChangeBatch()
+    clean_dataframe(df, {**RULES_CONFIG, "dictionary_encoding": {"enabled": False}}, plain)
+    assert encoded.rule_counts == plain.rule_counts
+    assert encoded.rule_counts["Name"]["normalize_case"] == 1000
+    assert encoded.field_counts == plain.field_counts
+
+##################################################
+
+# Test case for the sample staying bounded and the sidecar holding every change
+def test_sample_and_sidecar(tmp_path):
+    df = pd.DataFrame({"Name": [f" name {n} " for n in range(1000)], "Zip": ["10001"] * 1000})
+    sidecar = tmp_path / "changes.ndjson"
+    with ChangeTracker(sample_size=10, sidecar_path=str(sidecar)) as tracker:
+        for start in range(0, len(df), 300):
+            chunk = df.iloc[start:start + 300]
+            changes = ChangeBatch()
+            cleaned, _ = clean_dataframe(chunk, RULES_CONFIG, changes)
+            tracker.record(chunk, cleaned, changes)
+
+    stats = tracker.stats()
+    assert stats["rows"] == 1000 and stats["changed_values"] == 1000
+    assert len(stats["sample"]) == 10
+    # Sampled changes come from all over the file, with correct row numbers
+    assert max(change["row"] for change in stats["sample"]) > 300
+    for change in stats["sample"]:
+        assert change["from"] == df["Name"].iloc[change["row"] - 1]
+
+    lines = [json.loads(line) for line in sidecar.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 1000
+    assert lines[-1] == {"row": 1000, "field": "Name", "from": " name 999 ", "to": "Name 999"}
+
+##################################################
+
+# Test case for parallel and streaming runs recording the same changes as a serial run
+def test_parallel_and_streaming_tracking_match_serial(tmp_path):
+    config = load_config(CONFIG_PATH)
+    df = pd.read_csv(SAMPLE_CSV_PATH, low_memory=False)
+    serial = ChangeTracker()
+    clean_dataframe_parallel(df, config, tracker=serial)
+    parallel = ChangeTracker()
+    clean_dataframe_parallel(df, config, workers=2, tracker=parallel)
+    streaming = ChangeTracker()
+    clean_csv_in_chunks(SAMPLE_CSV_PATH, str(tmp_path / "out.csv"), config, chunk_size=2,
+                        workers=2, tracker=streaming)
+    assert parallel.stats() == serial.stats()
+    assert streaming.stats() == serial.stats()
+
+##################################################
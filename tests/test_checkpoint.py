@@ -0,0 +1,178 @@
+"""
+Test cases for checkpointing and resuming streaming runs.
+Verifies that the record scanner finds the same row boundaries as the parsers,
+that a run interrupted after a checkpoint and then resumed writes the same CSV,
+SQLite rows, summaries and change statistics as a run that was never
+interrupted (plain, pipelined, with worker processes and with the pyarrow
+engine), that a checkpoint is only resumed by the same run, and that outputs
+which cannot be cut back are rejected.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import sqlite3
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+import pytest
+from normalizer.change_tracker import ChangeTracker
+from normalizer.checkpoint import RunCheckpoint, run_identity
+from normalizer.ingest import iter_csv, record_offset
+from normalizer.pipeline import clean_csv_in_chunks
+from normalizer.reporter import format_profile
+from normalizer.runner import clean_file
+
+##################################################
+
+# Config with rules that change most rows of the test input
+CONFIG = {
+    "field_rules": {
+        "Name": {"trim_whitespace": True, "normalize_case": "title",
+                 "replace_nulls_with": {"enabled": True, "value": "Unknown"}},
+        "Notes": {"trim_whitespace": True},
+        "Zip": {"remove_invalid_chars": "zip"},
+    }
+}
+
+# Rows per chunk, and chunks between checkpoints
+CHUNK_SIZE = 3
+EVERY = 2
+
+##################################################
+
+# Define a helper to write a CSV with quoted newlines, doubled quotes and blank lines between rows;
+# with scores, a Score column holds decimals in the first chunk and whole numbers after it
+def write_input(path, rows=20, scores=False):
+    lines = ["Name,Notes,Zip" + (",Score" if scores else "")]
+    for i in range(rows):
+        notes = f'"line one\nline ""two"" of {i}"' if i % 4 == 0 else f"note {i}"
+        score = (f",{i}.5" if i < CHUNK_SIZE else f",{i}") if scores else ""
+        lines.append(f"  name {i} ,{notes},{10000 + i}-x{score}")
+        if i % 5 == 0:
+            lines.append("")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+# Define a change tracker that fails once a given number of rows has been recorded
+class FailingTracker(ChangeTracker):
+    def __init__(self, fail_after: int, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_after = fail_after
+
+    def record(self, original, cleaned, batch):
+        if self.rows >= self.fail_after:
+            raise KeyboardInterrupt("killed")
+        super().record(original, cleaned, batch)
+
+# Define a helper to run the pipeline and return its outputs and summaries
+def run(tmp_path, input_csv, tracker, checkpoint=None, config=CONFIG, pipelined=False, **options):
+    result = clean_csv_in_chunks(input_csv, str(tmp_path / "out.csv"), config, chunk_size=CHUNK_SIZE,
+                                 db_path=str(tmp_path / "out.db"), tracker=tracker,
+                                 modes={"checkpoint": checkpoint, "pipelined": pipelined}, **options)
+    tracker.close()
+    with sqlite3.connect(tmp_path / "out.db") as conn:
+        rows = conn.execute("SELECT * FROM cleaned_data").fetchall()
+    summary = {
+        "rows": result["rows"],
+        "change_counts": result["change_counts"],
+        "example_changes": result["example_changes"],
+        "pre": format_profile(result["pre_profile"], "Pre"),
+        "post": format_profile(result["post_profile"], "Post"),
+        "changes": {key: value for key, value in tracker.stats().items() if key != "sidecar_path"},
+    }
+    return (tmp_path / "out.csv").read_text(encoding="utf-8"), rows, summary
+
+##################################################
+
+# Test case for the record scanner finding the same row boundaries as both parsers
+def test_record_offset(tmp_path):
+    input_csv = write_input(tmp_path / "input.csv")
+    engines = [None]
+    try:
+        import pyarrow  # noqa: F401
+        engines.append({"engine": "pyarrow", "usecols": None, "dtype": {}, "parse_dates": []})
+    except ImportError:
+        pass
+    header_end = record_offset(input_csv, 0, 1)
+    for options in engines:
+        chunks = list(iter_csv(input_csv, options, CHUNK_SIZE))
+        for n in range(len(chunks)):
+            offset = record_offset(input_csv, header_end, n * CHUNK_SIZE)
+            resumed = list(iter_csv(input_csv, options, CHUNK_SIZE, offset=offset, first_row=n * CHUNK_SIZE))
+            assert len(resumed) == len(chunks) - n
+            for chunk, expected in zip(resumed, chunks[n:]):
+                pd.testing.assert_frame_equal(chunk, expected)
+        # Past the last row nothing is left to read
+        end = record_offset(input_csv, header_end, 1000)
+        assert end == os.path.getsize(input_csv)
+        assert list(iter_csv(input_csv, options, CHUNK_SIZE, offset=end, first_row=20)) == []
+
+##################################################
+
+# Test case for an interrupted and resumed run matching an uninterrupted one
+@pytest.mark.parametrize("options", [{}, {"pipelined": True}, {"workers": 2}, {"engine": "pyarrow"}])
+def test_resume_matches_uninterrupted(tmp_path, options):
+    config = CONFIG
+    if options.pop("engine", None):
+        pytest.importorskip("pyarrow")
+        options["ingest_options"] = {"engine": "pyarrow", "usecols": None, "dtype": {}, "parse_dates": []}
+        config = dict(CONFIG, ingest={"engine": "pyarrow"})
+    input_csv = write_input(tmp_path / "input.csv", scores=True)
+    expected = run(tmp_path, input_csv, ChangeTracker(sidecar_path=str(tmp_path / "full.ndjson")), **options)
+    # The whole numbers after the first chunk are written as decimals, like the first chunk's
+    assert ",3.0\n" in expected[0]
+    full_sidecar = (tmp_path / "full.ndjson").read_text(encoding="utf-8")
+
+    # The run dies on its fourth chunk, after the checkpoint of chunk two and the write of chunk three
+    identity = run_identity(input_csv, config, {"chunk_size": CHUNK_SIZE})
+    path = str(tmp_path / "checkpoint.pkl")
+    interrupted = FailingTracker(3 * CHUNK_SIZE, sidecar_path=str(tmp_path / "first.ndjson"))
+    with pytest.raises(KeyboardInterrupt):
+        run(tmp_path, input_csv, interrupted, RunCheckpoint(input_csv, identity, EVERY, path=path), **options)
+    interrupted.close()
+    assert os.path.exists(path)
+
+    checkpoint = RunCheckpoint(input_csv, identity, EVERY, resume=True, path=path)
+    assert checkpoint.saved["rows"] == EVERY * CHUNK_SIZE
+    resumed_tracker = ChangeTracker(sidecar_path=str(tmp_path / "resumed.ndjson"))
+    assert run(tmp_path, input_csv, resumed_tracker, checkpoint, **options) == expected
+    assert (tmp_path / "resumed.ndjson").read_text(encoding="utf-8") == full_sidecar
+    # A finished run leaves nothing to resume
+    assert not os.path.exists(path)
+    assert RunCheckpoint(input_csv, identity, EVERY, resume=True, path=path).saved is None
+
+##################################################
+
+# Test case for a checkpoint only being resumed with the same config, options and input
+def test_resume_checks_identity(tmp_path):
+    input_csv = write_input(tmp_path / "input.csv")
+    identity = run_identity(input_csv, CONFIG, {"chunk_size": CHUNK_SIZE})
+    path = str(tmp_path / "checkpoint.pkl")
+    with pytest.raises(KeyboardInterrupt):
+        run(tmp_path, input_csv, FailingTracker(3 * CHUNK_SIZE), RunCheckpoint(input_csv, identity, EVERY, path=path))
+
+    changed_config = {"field_rules": {"Name": {"normalize_case": "upper"}}}
+    with pytest.raises(ValueError, match="config has changed"):
+        RunCheckpoint(input_csv, run_identity(input_csv, changed_config, {"chunk_size": CHUNK_SIZE}),
+                      resume=True, path=path)
+    with pytest.raises(ValueError, match="chunk size or outputs"):
+        RunCheckpoint(input_csv, run_identity(input_csv, CONFIG, {"chunk_size": 5}), resume=True, path=path)
+    with open(input_csv, "a", encoding="utf-8") as f:
+        f.write("late,row,10099\n")
+    with pytest.raises(ValueError, match="input file has changed"):
+        RunCheckpoint(input_csv, run_identity(input_csv, CONFIG, {"chunk_size": CHUNK_SIZE}),
+                      resume=True, path=path)
+    with pytest.raises(ValueError):
+        RunCheckpoint(input_csv, identity, every=0, path=path)
+
+# Test case for outputs that cannot be cut back to a checkpoint being rejected
+def test_unsupported_outputs(tmp_path):
+    input_csv = write_input(tmp_path / "input.csv")
+    with pytest.raises(ValueError, match="Checkpoints only support"):
+        clean_file(input_csv, dict(CONFIG, export={"formats": ["parquet"]}), "config.yaml",
+                   modes={"checkpoint_every": 1})
+    with pytest.raises(ValueError, match="Checkpoints only support"):
+        clean_file(input_csv, dict(CONFIG, sqlite={"mode": "incremental", "primary_key": "Zip"}), "config.yaml",
+                   export_sqlite=True, modes={"resume": True})
+
+##################################################
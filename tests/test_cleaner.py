@@ -9,7 +9,10 @@ import pytest
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from normalizer.cleaner import clean_row
+import pandas as pd
+import dataclasses
+from normalizer.cleaner import clean_row, clean_dataframe, compile_plan
+from normalizer.config_loader import load_config
 
 ##################################################
 
@@ -181,4 +184,153 @@ def test_numeric_field_pass_through():
     cleaned, _ = clean_row(row, config)
     assert cleaned["BBL"] == 1234567890
 
-##################################################
\ No newline at end of file
+##################################################
+
+# Helper to clean a DataFrame the original way, one clean_row call per row
+def clean_rows_one_by_one(df, config):
+    cleaned_rows = [clean_row(row, config)[0] for row in df.to_dict("records")]
+    return pd.DataFrame(cleaned_rows, columns=df.columns)
+
+##################################################
+
+# Test case for parity between the column-wise engine and the row path on the sample CSV
+def test_clean_dataframe_matches_clean_row_on_sample_csv():
+    df = pd.read_csv("data/1-CSV-Raw/test_input_sample.csv", low_memory=False)
+    config = load_config("config/config.yaml")
+
+    expected = clean_rows_one_by_one(df, config)
+    cleaned_df, change_counts = clean_dataframe(df, config)
+
+    # Output must be identical once written to CSV
+    assert cleaned_df.to_csv(index=False) == expected.to_csv(index=False)
+    assert change_counts["Created_Date"] == len(df)
+    assert "UI_Key" not in change_counts
+
+##################################################
+
+# Test case for parity on messy values covering every rule, nulls, and non-strings
+def test_clean_dataframe_matches_clean_row_on_messy_values():
+    df = pd.DataFrame({
+        "Name": ["  JOHN DOE  ", None, "mary-ann o'neil", 42],
+        "Email": ["JOHN@EMAIL.COM", " x@Y.org ", float("nan"), "A@B.C"],
+        "Message": ["Hello/#$% there!!!", "", "ÉCOLE élève", None],
+        "Date": ["5/2/2025", "now", "bad-date", "02/29/2024"],
+        "Agency": ["   NYPD   ", None, "dsny", "HPD"],
+        "Count": [1, 2, 3, 4],
+        "Unconfigured": ["  keep  ", None, "AS IS", "x"],
+    })
+    config = {"field_rules": dict(sample_config["field_rules"])}
+    config["field_rules"]["Agency"] = {"ignore": True, "normalize_case": "lower"}
+    config["field_rules"]["Count"] = {
+        "replace_nulls_with": {"enabled": True, "value": "Not Specified"},
+        "normalize_case": "upper",
+        "remove_invalid_chars": True,
+    }
+    config["field_rules"]["Name"] = dict(config["field_rules"]["Name"])
+    config["field_rules"]["Name"]["replace_nulls_with"] = {"enabled": True, "value": "Unknown"}
+
+    expected = clean_rows_one_by_one(df, config)
+    cleaned_df, _ = clean_dataframe(df, config)
+
+    assert cleaned_df.to_csv(index=False) == expected.to_csv(index=False)
+    assert cleaned_df["Date"].tolist() == ["2025-05-02", "now", "bad-date", "2024-02-29"]
+    assert cleaned_df["Name"].tolist() == ["John Doe", "Unknown", "Mary-Ann O'Neil", 42]
+
+##################################################
+
+# Test case for the compiled plan dropping no-op steps and binding defaults
+def test_compile_plan_builds_ordered_steps():
+    plan = compile_plan(sample_config)
+
+    # Only enabled rules become steps, in the fixed rule order
+    assert [step.name for step in plan.field("Message").steps] == [
+        "trim_whitespace", "normalize_case", "remove_invalid_chars"
+    ]
+    assert [step.name for step in plan.field("Date").steps] == ["trim_whitespace", "fix_date_format"]
+    assert plan.field("Unconfigured").steps == ()
+
+    # Date formats left out of the config fall back to the defaults at compile time
+    date_plan = compile_plan({"field_rules": {"D": {"fix_date_format": {}}}}).field("D")
+    assert date_plan.steps[0].apply.keywords == {"input_format": "%m/%d/%Y", "output_format": "%Y-%m-%d"}
+
+    # The plan cannot be modified after it is compiled
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        plan.field("Name").ignore = True
+
+    # Running the compiled plan gives the same result as passing the raw config
+    assert clean_row(sample_row, plan) == clean_row(sample_row, sample_config)
+
+##################################################
+
+# Test case for bad rules being rejected when the plan is compiled
+def test_compile_plan_rejects_bad_rules():
+    with pytest.raises(ValueError, match="Unknown rule"):
+        compile_plan({"field_rules": {"Name": {"trim_whitespaces": True}}})
+    with pytest.raises(ValueError, match="normalize_case"):
+        compile_plan({"field_rules": {"Name": {"normalize_case": "banana"}}})
+    with pytest.raises(ValueError, match="fix_date_format"):
+        compile_plan({"field_rules": {"Date": {"fix_date_format": "%m/%d/%Y"}}})
+    with pytest.raises(ValueError, match="profile 'postcode'"):
+        compile_plan({"field_rules": {"Zip": {"remove_invalid_chars": "postcode"}}})
+    with pytest.raises(ValueError, match="Invalid allowed character class"):
+        compile_plan({"field_rules": {"Zip": {"remove_invalid_chars": {"allowed": "z-a"}}}})
+
+##################################################
+
+# Test case for per-column character allow-lists set in the config
+def test_remove_invalid_chars_per_column_settings():
+    row = {"Zip": " 10001-1234!", "Email": "Jo+news@Mail.com;", "Code": "AB#12"}
+    config = {
+        "field_rules": {
+            "Zip": {"trim_whitespace": True, "remove_invalid_chars": "zip"},
+            "Email": {"remove_invalid_chars": {"profile": "email"}},
+            "Code": {"remove_invalid_chars": {"allowed": "A-Z"}},
+        }
+    }
+    cleaned, _ = clean_row(row, config)
+    assert cleaned == {"Zip": "10001-1234", "Email": "Jo+news@Mail.com", "Code": "AB"}
+    cleaned_df, _ = clean_dataframe(pd.DataFrame([row]), config)
+    assert cleaned_df.iloc[0].to_dict() == cleaned
+
+##################################################
+
+# Test case for dictionary-encoded cleaning of low-cardinality columns
+def test_dictionary_encoded_columns_match_row_path():
+    df = pd.DataFrame({
+        "Agency": [" nypd", "NYPD ", None, "dsny", "NYPD#"] * 40,
+        "Complaint Type": ["noise - RESIDENTIAL", "Heat/Hot Water!", None, "noise", 7] * 40,
+        "UI_Key": [str(n) for n in range(200)],
+    })
+    config = {
+        "dictionary_encoding": {"min_rows": 100},
+        "field_rules": {
+            name: {
+                "replace_nulls_with": {"enabled": True, "value": "not specified"},
+                "trim_whitespace": True,
+                "normalize_case": "title",
+                "remove_invalid_chars": True,
+            }
+            for name in df.columns
+        },
+    }
+
+    expected = clean_rows_one_by_one(df, config)
+    cleaned_df, change_counts = clean_dataframe(df, config)
+
+    # Low-cardinality columns come out categorical, with merged duplicate results
+    assert isinstance(cleaned_df["Agency"].dtype, pd.CategoricalDtype)
+    assert sorted(cleaned_df["Agency"].cat.categories) == ["Dsny", "Not Specified", "Nypd"]
+    # Every value is distinct in UI_Key, so it is cleaned value by value
+    assert not isinstance(cleaned_df["UI_Key"].dtype, pd.CategoricalDtype)
+
+    assert cleaned_df.to_csv(index=False) == expected.to_csv(index=False)
+    assert change_counts["Agency"] == 200
+    assert change_counts["Complaint Type"] == 160
+
+    # Turning dictionary encoding off gives plain object columns with the same values
+    config["dictionary_encoding"] = {"enabled": False}
+    plain_df, _ = clean_dataframe(df, config)
+    assert plain_df["Agency"].dtype == object
+    assert plain_df.to_csv(index=False) == expected.to_csv(index=False)
+
+##################################################
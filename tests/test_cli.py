@@ -0,0 +1,130 @@
+"""
+Test cases for the headless batch CLI.
+Runs the batch subcommand as a subprocess over copies of the sample CSV and
+checks every file is cleaned, exported and timed, and then reused from the
+run cache on the next run, and that files that would write to the same outputs
+are refused.  Also tests the file discovery helper and the validate command.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import glob
+import shutil
+import logging
+import subprocess
+import pandas as pd
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from normalizer.cli import load_configs, main
+from normalizer.file_selector import find_csv_files
+
+##################################################
+
+# Set the sample input copied for the batch
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+
+##################################################
+
+# Test case for directories, files and glob patterns expanding to CSV files
+def test_find_csv_files(tmp_path):
+    for name in ("b.csv", "a.csv", "notes.txt"):
+        (tmp_path / name).write_text("x\n1\n", encoding="utf-8")
+    assert find_csv_files([str(tmp_path)]) == [str(tmp_path / "a.csv"), str(tmp_path / "b.csv")]
+    assert find_csv_files([str(tmp_path / "b*.csv"), str(tmp_path / "b.csv")]) == [str(tmp_path / "b.csv")]
+    assert find_csv_files([str(tmp_path / "missing.csv")]) == []
+
+# Test case for per-file configs never overwriting the shared config, even for an input named config.csv
+def test_regen_config_keeps_shared_config(tmp_path, monkeypatch):
+    input_csv = tmp_path / "config.csv"
+    shutil.copy(SAMPLE_CSV_PATH, input_csv)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "config.yaml").write_text("field_rules: {}\n", encoding="utf-8")
+    configs = load_configs([str(input_csv)], "config/config.yaml", True, logging.getLogger("test"))
+    assert configs[str(input_csv)][0] == os.path.join("config", "config.config.yaml")
+    assert (tmp_path / "config" / "config.config.yaml").exists()
+    assert (tmp_path / "config" / "config.yaml").read_text(encoding="utf-8") == "field_rules: {}\n"
+
+# Test case for a chunk size below 1 being refused before anything runs
+def test_chunk_size_must_be_positive():
+    with pytest.raises(SystemExit):
+        main(["batch", SAMPLE_CSV_PATH, "--chunk-size", "0"])
+
+# Test case for directories listing CSV files whatever the case of their extensions
+def test_find_csv_files_any_case(tmp_path):
+    for name in ("A.CSV", "b.csv", "C.Csv.GZ", "d.txt"):
+        (tmp_path / name).write_text("x\n1\n", encoding="utf-8")
+    assert find_csv_files([str(tmp_path)]) == [str(tmp_path / name) for name in ("A.CSV", "C.Csv.GZ", "b.csv")]
+
+##################################################
+
+# Test case for a batch run cleaning several files in one process
+def test_batch_cleans_every_file(tmp_path):
+    names = ["batch_test_a", "batch_test_b"]
+    for name in names:
+        shutil.copy(SAMPLE_CSV_PATH, tmp_path / f"{name}.csv")
+    command = [sys.executable, "-m", "normalizer.cli", "batch", str(tmp_path / "*.csv"), "--jobs", "2", "--sqlite"]
+    try:
+        first = subprocess.run(command + ["--force"], text=True, capture_output=True)
+        assert first.returncode == 0, first.stderr
+        for name in names:
+            assert os.path.exists(f"data/2-CSV-Export/{name}_CLEANED.csv")
+            assert os.path.exists(f"data/3-SQLite-Export/{name}_CLEANED.db")
+            assert f"{name}.csv" in first.stdout
+        assert first.stdout.count("cleaned") == 2
+
+        # Nothing changed, so the second run reuses both files' outputs
+        second = subprocess.run(command, text=True, capture_output=True)
+        assert second.returncode == 0, second.stderr
+        assert second.stdout.count("cached") == 2
+    finally:
+        for name in names:
+            for path in glob.glob(f"data/*/{name}_CLEANED.*") + glob.glob(f"reports/*_{name}.html"):
+                os.remove(path)
+
+##################################################
+
+# Test case for --format writing Parquet and Arrow files next to the cleaned CSV
+def test_batch_writes_columnar_formats(tmp_path):
+    pytest.importorskip("pyarrow")
+    name = "batch_test_columnar"
+    shutil.copy(SAMPLE_CSV_PATH, tmp_path / f"{name}.csv")
+    command = [sys.executable, "-m", "normalizer.cli", "batch", str(tmp_path / f"{name}.csv"),
+               "--format", "parquet", "--format", "arrow", "--chunk-size", "2", "--force"]
+    try:
+        result = subprocess.run(command, text=True, capture_output=True)
+        assert result.returncode == 0, result.stderr
+        cleaned = pd.read_csv(f"data/2-CSV-Export/{name}_CLEANED.csv", dtype=str)
+        for loaded in (pd.read_parquet(f"data/4-Columnar-Export/{name}_CLEANED.parquet"),
+                       pd.read_feather(f"data/4-Columnar-Export/{name}_CLEANED.arrow")):
+            assert loaded.astype(str).values.tolist() == cleaned.values.tolist()
+    finally:
+        for path in glob.glob(f"data/*/{name}_CLEANED.*") + glob.glob(f"reports/*_{name}.html"):
+            os.remove(path)
+
+##################################################
+
+# Test case for a batch over files that would write to the same outputs being refused before cleaning
+def test_batch_rejects_duplicate_names(tmp_path, capsys):
+    for path in ("a/dup_test.csv", "b/dup_test.csv", "b/other_test.csv", "b/Other_Test.csv.gz"):
+        (tmp_path / path).parent.mkdir(exist_ok=True)
+        (tmp_path / path).write_text("x\n1\n", encoding="utf-8")
+    assert main(["batch", str(tmp_path / "a"), str(tmp_path / "b")]) == 1
+    out = capsys.readouterr().out
+    assert f"{tmp_path / 'a' / 'dup_test.csv'}, {tmp_path / 'b' / 'dup_test.csv'}" in out
+    assert "other_test.csv" in out and "Other_Test.csv.gz" in out
+    assert not glob.glob("data/*/dup_test_CLEANED.*")
+
+# Test case for the validate command accepting a good config and reporting a bad one
+def test_validate_config(tmp_path, capsys):
+    assert main(["validate", "--config", "config/config.yaml"]) == 0
+    assert "Config OK" in capsys.readouterr().out
+
+    bad_config = tmp_path / "bad.yaml"
+    bad_config.write_text("field_rules:\n  Name:\n    normalize_case: shouting\n", encoding="utf-8")
+    assert main(["validate", "--config", str(bad_config)]) == 1
+    assert "Invalid config" in capsys.readouterr().out
+    assert main(["validate", "--config", str(tmp_path / "missing.yaml")]) == 1
+
+##################################################
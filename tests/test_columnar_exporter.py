@@ -0,0 +1,122 @@
+"""
+Test cases for the Parquet and Arrow IPC exporters.
+Verifies that the export section is validated, that both formats round-trip
+the cleaned data, that streaming mode writes one Parquet row group per chunk
+with the same rows as the in-memory export, and that numeric columns whose
+nulls are replaced with text are written as text.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import glob
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+import pytest
+from normalizer.cleaner import clean_dataframe
+from normalizer.columnar_exporter import export_columnar, export_options, open_columnar_writer
+from normalizer.config_loader import load_config
+from normalizer.pipeline import clean_csv_in_chunks
+from normalizer.runner import clean_file
+
+##################################################
+
+# Every test here writes files with pyarrow
+pq = pytest.importorskip("pyarrow.parquet")
+
+# Set the sample input and config used by every test
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+CONFIG_PATH = "config/config.yaml"
+
+##################################################
+
+# Test case for reading and validating the export section of the config
+def test_export_options():
+    options = export_options({"export": {"formats": ["arrow"], "parquet": {"compression": "zstd"}}}, ["parquet", "arrow"])
+    assert options["formats"] == ["arrow", "parquet"]
+    assert options["parquet"] == {"compression": "zstd", "compression_level": None, "row_group_size": 100_000}
+    assert options["arrow"] == {"compression": "none"}
+    assert export_options({})["formats"] == []
+
+    with pytest.raises(ValueError):
+        export_options({}, ["orc"])
+    with pytest.raises(ValueError):
+        export_options({"export": {"parquet": {"compression": "lzo"}}})
+    with pytest.raises(ValueError):
+        export_options({"export": {"parquet": {"row_group_size": 0}}})
+    with pytest.raises(ValueError):
+        export_options({"export": {"arrow": {"level": 3}}})
+
+##################################################
+
+# Test case for both formats reading back as the cleaned DataFrame
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_round_trip(tmp_path, fmt):
+    cleaned_df, _ = clean_dataframe(pd.read_csv(SAMPLE_CSV_PATH), load_config(CONFIG_PATH))
+    options = export_options({"export": {"parquet": {"compression": "zstd", "row_group_size": 2},
+                                         "arrow": {"compression": "lz4"}}})
+    path = export_columnar(cleaned_df, str(tmp_path / f"out.{fmt}"), fmt, options)
+    loaded = pd.read_parquet(path) if fmt == "parquet" else pd.read_feather(path)
+    pd.testing.assert_frame_equal(loaded, cleaned_df)
+    if fmt == "parquet":
+        # 5 rows in row groups of 2
+        assert pq.ParquetFile(path).metadata.num_row_groups == 3
+
+# Test case for streaming mode writing one row group per chunk
+def test_streaming_writes_a_row_group_per_chunk(tmp_path):
+    config = load_config(CONFIG_PATH)
+    paths = {"parquet": str(tmp_path / "out.parquet"), "arrow": str(tmp_path / "out.arrow")}
+    clean_csv_in_chunks(SAMPLE_CSV_PATH, str(tmp_path / "out.csv"), config, chunk_size=2,
+                        columnar_paths=paths, columnar_options=export_options({}, list(paths)))
+    assert pq.ParquetFile(paths["parquet"]).metadata.num_row_groups == 3
+
+    cleaned_df, _ = clean_dataframe(pd.read_csv(SAMPLE_CSV_PATH), config)
+    expected = cleaned_df.astype(object)
+    pd.testing.assert_frame_equal(pd.read_parquet(paths["parquet"]).astype(object), expected)
+    pd.testing.assert_frame_equal(pd.read_feather(paths["arrow"]).astype(object), expected)
+
+# Test case for later chunks being cast to the schema of the first one
+def test_chunks_are_cast_to_the_first_schema(tmp_path):
+    path = str(tmp_path / "out.parquet")
+    with open_columnar_writer("parquet", path, streaming=True) as writer:
+        writer.write(pd.DataFrame({"Count": [1, 2], "Note": [None, None]}))
+        writer.write(pd.DataFrame({"Count": [3.0, None], "Note": ["a", "b"]}))
+    loaded = pd.read_parquet(path)
+    assert loaded["Note"].tolist() == [None, None, "a", "b"]
+    assert loaded["Count"].tolist()[:3] == [1, 2, 3]
+
+    # A column that turns from numbers into text cannot be cast, and is named in the error
+    with pytest.raises(ValueError, match="Count"):
+        with open_columnar_writer("parquet", str(tmp_path / "bad.parquet"), streaming=True) as writer:
+            writer.write(pd.DataFrame({"Count": [1]}))
+            writer.write(pd.DataFrame({"Count": ["one"]}))
+
+##################################################
+
+# Test case for a numeric column with a null replaced by text, in memory and with the null in a later chunk
+@pytest.mark.parametrize("chunk_size", [None, 2])
+def test_null_replaced_in_numeric_column(tmp_path, chunk_size):
+    input_csv = tmp_path / "numeric_nulls_feed.csv"
+    input_csv.write_text("Name,Zip\nann,10001\nbob,10002\ncal,\n", encoding="utf-8")
+    config = {"field_rules": {"Zip": {"replace_nulls_with": {"enabled": True, "value": "Not Specified"}}}}
+    try:
+        result = clean_file(str(input_csv), config, CONFIG_PATH, formats=["parquet", "arrow"], chunk_size=chunk_size,
+                            force=True, report_path=str(tmp_path / "report.html"))
+        expected = pd.read_csv(result["csv"], dtype=str)["Zip"].tolist()
+        assert expected[-1] == "Not Specified"
+        assert pd.read_parquet(result["columnar"]["parquet"])["Zip"].tolist() == expected
+        assert pd.read_feather(result["columnar"]["arrow"])["Zip"].tolist() == expected
+    finally:
+        for path in glob.glob("data/*/numeric_nulls_feed_CLEANED.*"):
+            os.remove(path)
+
+# Test case for columns mixing numbers and text being written as text
+def test_mixed_column_is_text(tmp_path):
+    path = str(tmp_path / "out.parquet")
+    with open_columnar_writer("parquet", path) as writer:
+        writer.write(pd.DataFrame({"Zip": [10001.0, "Not Specified"], "Count": [1, 2.5]}))
+    loaded = pd.read_parquet(path)
+    assert loaded["Zip"].tolist() == ["10001.0", "Not Specified"]
+    assert loaded["Count"].tolist() == [1.0, 2.5]
+
+##################################################
@@ -0,0 +1,149 @@
+"""
+Test cases for compressed input and output.
+Verifies that compressed CSVs are recognized and found and their outputs
+named whatever the case of the extensions, that the export csv
+settings are checked, that gzip and bzip2 inputs are cleaned directly (in
+memory, streamed and pipelined) with the same rows as the plain file, that the
+cleaned CSV is compressed with the configured codec and level, and that
+features working with byte offsets reject compressed files.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import bz2
+import os
+import sys
+import glob
+import gzip
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+from normalizer.columnar_exporter import export_options
+from normalizer.compression import codec_of, csv_stem, is_csv, open_output, output_compression, strip_codec
+from normalizer.config_loader import load_config
+from normalizer.file_selector import find_csv_files
+from normalizer.runner import clean_file, columnar_export_path, csv_export_path, sqlite_export_path
+
+##################################################
+
+# Set the sample input and config used by every test
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+CONFIG_PATH = "config/config.yaml"
+
+# Name of the compressed test inputs, used for their outputs under data/
+NAME = "compressed_test_feed"
+
+##################################################
+
+# Define a helper to clean a file and return the result and the cleaned CSV's bytes, decompressed
+def run(input_csv, config=None, **options):
+    result = clean_file(input_csv, config or load_config(CONFIG_PATH), CONFIG_PATH, force=True,
+                        report_path=os.path.join(os.path.dirname(input_csv), "report.html"), **options)
+    opener = {"gzip": gzip.open, "bz2": bz2.open, None: open}[codec_of(result["csv"])]
+    with opener(result["csv"], "rb") as f:
+        return result, f.read()
+
+# Define a fixture writing the sample as a gzip and a bzip2 file, and removing their outputs afterwards
+@pytest.fixture
+def inputs(tmp_path):
+    with open(SAMPLE_CSV_PATH, "rb") as f:
+        raw = f.read()
+    paths = {"gzip": str(tmp_path / f"{NAME}.csv.gz"), "bz2": str(tmp_path / f"{NAME}.csv.bz2")}
+    with gzip.open(paths["gzip"], "wb") as f:
+        f.write(raw)
+    with bz2.open(paths["bz2"], "wb") as f:
+        f.write(raw)
+    yield paths
+    for path in glob.glob(f"data/*/{NAME}_CLEANED.*"):
+        os.remove(path)
+
+##################################################
+
+# Test case for compressed CSV names being recognized and found
+def test_names(tmp_path):
+    assert is_csv("a.csv") and is_csv("a.CSV.GZ") and is_csv("a.csv.bz2") and is_csv("a.csv.zst")
+    assert not is_csv("a.gz") and not is_csv("a.txt")
+    assert codec_of("a.csv.zst") == "zstd" and codec_of("a.csv") is None
+    assert strip_codec("dir/a.csv.gz") == "dir/a.csv" and strip_codec("a.csv") == "a.csv"
+    assert csv_stem("dir/Feed.CSV.GZ") == csv_stem("Feed.csv") == "Feed"
+    # Output names are built the same way whatever the case of the extensions
+    assert csv_export_path("DATA.CSV").endswith("DATA_CLEANED.csv")
+    assert csv_export_path("data.csv.GZ", {"codec": "gzip", "level": 6}).endswith("data_CLEANED.csv.gz")
+    assert sqlite_export_path("DATA.CSV").endswith("DATA_CLEANED.db")
+    assert columnar_export_path("DATA.CSV", "parquet").endswith("DATA_CLEANED.parquet")
+    for name in ("b.csv.gz", "a.csv", "c.csv.bz2", "notes.txt.gz"):
+        (tmp_path / name).write_text("x\n", encoding="utf-8")
+    assert find_csv_files([str(tmp_path)]) == [str(tmp_path / name) for name in ("a.csv", "b.csv.gz", "c.csv.bz2")]
+
+# Test case for the export csv settings being resolved and checked
+def test_settings():
+    settings = export_options({})["csv"]
+    assert output_compression("a.csv", settings) is None
+    assert output_compression("a.csv.gz", settings) == {"codec": "gzip", "level": 6}
+    settings = export_options({"export": {"csv": {"compression": "bz2", "compression_level": 3}}})["csv"]
+    assert output_compression("a.csv.gz", settings) == {"codec": "bz2", "level": 3}
+    assert output_compression("a.csv.gz", {"compression": "none"}) is None
+    with pytest.raises(ValueError, match="compression must be one of"):
+        export_options({"export": {"csv": {"compression": "lzma"}}})
+    with pytest.raises(ValueError, match="from 1 to 9"):
+        export_options({"export": {"csv": {"compression": "bz2", "compression_level": 0}}})
+    with pytest.raises(ValueError, match="whole number"):
+        export_options({"export": {"csv": {"compression_level": "fast"}}})
+    with pytest.raises(ValueError, match="Unknown export csv"):
+        export_options({"export": {"csv": {"level": 3}}})
+
+##################################################
+
+# Test case for compressed inputs giving the same cleaned rows as the plain file, compressed the same way
+@pytest.mark.parametrize("options", [{}, {"chunk_size": 2}, {"modes": {"pipelined": True}, "chunk_size": 2}])
+def test_compressed_input_matches_plain(tmp_path, inputs, options):
+    plain_input = str(tmp_path / f"{NAME}.csv")
+    with open(SAMPLE_CSV_PATH, "rb") as src, open(plain_input, "wb") as dst:
+        dst.write(src.read())
+    plain, expected = run(plain_input, **options)
+    assert plain["csv"].endswith(f"{NAME}_CLEANED.csv")
+    for codec, input_csv in inputs.items():
+        result, cleaned = run(input_csv, export_sqlite=True, **options)
+        assert codec_of(result["csv"]) == codec
+        assert result["sqlite"].endswith(f"{NAME}_CLEANED.db")
+        assert cleaned == expected and result["rows"] == plain["rows"]
+
+# Test case for the configured codec and level being used for the cleaned CSV
+def test_configured_output(tmp_path, inputs):
+    config = load_config(CONFIG_PATH)
+    for level, flag in ((1, 4), (9, 2)):
+        # The gzip header flags the fastest (4) and the best (2) compression levels
+        export = {"csv": {"compression": "gzip", "compression_level": level}}
+        result, _ = run(inputs["bz2"], dict(config, export=export), chunk_size=2)
+        assert result["csv"].endswith(f"{NAME}_CLEANED.csv.gz")
+        with open(result["csv"], "rb") as f:
+            assert f.read(9)[8] == flag
+    # Streamed and in-memory runs write the same compressed bytes
+    with open(result["csv"], "rb") as f:
+        streamed = f.read()
+    result, _ = run(inputs["bz2"], dict(config, export={"csv": {"compression": "gzip", "compression_level": 9}}))
+    with open(result["csv"], "rb") as f:
+        assert f.read() == streamed
+    result, _ = run(inputs["gzip"], dict(config, export={"csv": {"compression": "none"}}))
+    assert result["csv"].endswith(f"{NAME}_CLEANED.csv")
+
+# Test case for Zstandard, when the optional zstandard package is installed
+def test_zstd(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = str(tmp_path / "out.csv.zst")
+    with open_output(path, {"codec": "zstd", "level": 3}) as f:
+        f.write("A,B\n1,2\n")
+    with open(path, "rb") as f:
+        assert zstandard.ZstdDecompressor().stream_reader(f).read() == b"A,B\n1,2\n"
+
+##################################################
+
+# Test case for features working with byte offsets rejecting compressed files
+def test_byte_offset_features_rejected(inputs):
+    config = load_config(CONFIG_PATH)
+    for modes in ({"checkpoint_every": 1}, {"append": True}, {"partitioned": True}):
+        with pytest.raises(ValueError, match="uncompressed"):
+            clean_file(inputs["gzip"], config, CONFIG_PATH, modes=modes)
+        with pytest.raises(ValueError, match="uncompressed"):
+            clean_file(SAMPLE_CSV_PATH, dict(config, export={"csv": {"compression": "gzip"}}), CONFIG_PATH,
+                       modes=modes)
+
+##################################################
@@ -1,7 +1,8 @@
 """
 Test cases for the configuration builder module.
 Creates a sample CSV file, builds a YAML configuration from it,
-and verifies the structure and content of the generated YAML.
+and verifies the structure and content of the generated YAML.  Also checks
+that large files are sampled in whole records from all over the file.
 """
 
 # Import necessary libraries and set path to normalizer module
@@ -10,7 +11,8 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import pandas as pd
 import yaml
-from normalizer.config_builder import build_field_rules_config
+from normalizer import config_builder
+from normalizer.config_builder import build_field_rules_config, infer_column_type, read_sample
 
 ##################################################
 
@@ -28,12 +30,14 @@ def setup_module(module):
             "ID": 1,
             "Name": "Alice",
             "Email": "ALICE@EXAMPLE.COM",
+            "Created": "5/26/2025 23:59",
             "Resolution Description": "police RESPONDED and left"
         },
         {
             "ID": 2,
             "Name": "Bob",
             "Email": "bob@example.com",
+            "Created": " 12/1/2025 8:05",
             "Resolution Description": "officers ARRIVED at location"
         }
     ])
@@ -93,4 +97,76 @@ def test_all_fields_have_expected_keys():
     for field_config in config["field_rules"].values():
         assert expected_keys.issubset(set(field_config.keys()))
 
-##################################################
\ No newline at end of file
+##################################################
+
+# Function to test that rules follow each column's inferred type
+def test_rules_follow_inferred_types():
+    build_field_rules_config(SAMPLE_CSV_PATH, SAMPLE_YAML_PATH)
+    with open(SAMPLE_YAML_PATH, "r", encoding="utf-8") as f:
+        field_rules = yaml.safe_load(f)["field_rules"]
+
+    # Numeric columns get no case, character or date rules
+    assert field_rules["ID"]["normalize_case"] is False
+    assert field_rules["ID"]["remove_invalid_chars"] is False
+    assert field_rules["ID"]["fix_date_format"] is False
+
+    # Only the date column gets a date rule, with the format its values parse with
+    assert field_rules["Created"]["fix_date_format"] == {
+        "input_format": "%m/%d/%Y %H:%M", "output_format": "%Y-%m-%d %H:%M"
+    }
+    assert field_rules["Name"]["fix_date_format"] is False
+    assert field_rules["Name"]["normalize_case"] == "title"
+    assert field_rules["Email"]["remove_invalid_chars"] == "email"
+
+##################################################
+
+# Function to test the column type inference on typical values
+def test_infer_column_type():
+    assert infer_column_type(pd.Series(["10029", "11201", None])) == ("numeric", None)
+    assert infer_column_type(pd.Series(["10029-1234", "11201"])) == ("zip", None)
+    assert infer_column_type(pd.Series(["2025-05-26", "2025-12-01"])) == ("date", "%Y-%m-%d")
+    assert infer_column_type(pd.Series(["Noise", "2025-12-01"])) == ("text", None)
+    assert infer_column_type(pd.Series([None, None], dtype=object)) == ("text", None)
+
+##################################################
+
+# Function to test that large files are sampled from random offsets, not read whole
+def test_large_file_is_sampled(tmp_path, monkeypatch):
+    path = tmp_path / "large.csv"
+    pd.DataFrame({"ID": range(20_000), "Name": ["x"] * 20_000}).to_csv(path, index=False)
+    monkeypatch.setattr(config_builder, "RANDOM_SAMPLE_BYTES", 1024)
+    sample = read_sample(str(path), sample_size=200)
+    assert list(sample.columns) == ["ID", "Name"]
+    assert 150 <= len(sample) <= 200
+    # Rows come from all over the file, not only from the top
+    assert sample["ID"].astype(int).max() > 10_000
+
+# Function to test that sampled blocks never start inside a quoted value spanning lines
+def test_large_file_with_multiline_values(tmp_path, monkeypatch):
+    path = tmp_path / "multiline.csv"
+    notes = [f"line one of {i}\nID,{i + 100_000}\nline three" for i in range(5_000)]
+    pd.DataFrame({"ID": range(5_000), "Note": notes, "Zip": ["10001"] * 5_000}).to_csv(path, index=False)
+    monkeypatch.setattr(config_builder, "RANDOM_SAMPLE_BYTES", 1024)
+    sample = read_sample(str(path), sample_size=200)
+    assert list(sample.columns) == ["ID", "Note", "Zip"]
+    assert 150 <= len(sample) <= 200
+    # Every row is a whole record: no line of a note is read as a row of its own
+    ids = sample["ID"].astype(int)
+    assert ids.is_unique and ids.max() < 5_000 and ids.max() > 2_500
+    assert (sample["Note"] == [notes[i] for i in ids]).all()
+    assert (sample["Zip"] == "10001").all()
+
+# Function to test that blocks with no whole record are made up from the top of the file
+def test_unplaced_blocks_fall_back_to_top(tmp_path, monkeypatch):
+    path = tmp_path / "long_values.csv"
+    notes = ["\n".join(f"ID,{i},{n}" for n in range(20)) for i in range(500)]
+    pd.DataFrame({"ID": range(500), "Note": notes}).to_csv(path, index=False)
+    monkeypatch.setattr(config_builder, "RANDOM_SAMPLE_BYTES", 1024)
+    # A block is shorter than one record, so no random block can be checked
+    monkeypatch.setattr(config_builder, "SAMPLE_BLOCK_BYTES", 64)
+    sample = read_sample(str(path), sample_size=200)
+    assert list(sample.columns) == ["ID", "Note"]
+    assert sample["ID"].astype(int).tolist() == list(range(200))
+    assert (sample["Note"] == notes[:200]).all()
+
+##################################################
@@ -0,0 +1,176 @@
+"""
+Test cases for the typed CSV ingestion.
+Verifies that dtype hints, usecols and ignored columns are applied during the
+read, that bad settings are rejected, that the pyarrow engine (when installed)
+reads the same frames and chunks as the C engine, and that a file is written
+the same way whether it is read at once or in chunks.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+import pytest
+from normalizer.cleaner import compile_plan
+from normalizer.ingest import ingest_options, iter_csv, read_csv, read_header
+from normalizer.pipeline import clean_csv_in_chunks
+
+##################################################
+
+# Set the sample input used by every test
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+
+# Config with one of each kind of hint over the sample columns
+HINTED_CONFIG = {
+    "field_rules": {
+        "UI_Key": {"ignore": True},
+        "Agency": {"dtype": "category", "trim_whitespace": True},
+        "Zip": {"dtype": "string"},
+        "Closed_Date": {"dtype": "datetime"},
+    }
+}
+
+##################################################
+
+# Define a helper to write a CSV with leading zeros and more rows than one chunk
+def write_wide_csv(path, rows=25):
+    lines = ["Code,Count,Name"]
+    lines += [f"{i:05d},{i},  name {i % 3}  " for i in range(rows)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+##################################################
+
+# Test case for dtype hints and ignored columns being applied while reading
+def test_hints_are_applied():
+    df = read_csv(SAMPLE_CSV_PATH, ingest_options(HINTED_CONFIG))
+    assert isinstance(df["Agency"].dtype, pd.CategoricalDtype)
+    assert df["Zip"].dtype == "string"
+    assert pd.api.types.is_datetime64_any_dtype(df["Closed_Date"])
+    # Ignored and unhinted columns are still plain text
+    assert df["UI_Key"].dtype == object
+    assert df["UI_Key"].iloc[0] == "65070824"
+
+# Test case for ignored columns keeping their exact text
+def test_ignored_column_is_raw_text(tmp_path):
+    input_csv = write_wide_csv(tmp_path / "codes.csv")
+    config = {"field_rules": {"Code": {"ignore": True}, "Count": {"dtype": "int"}}}
+    df = read_csv(input_csv, ingest_options(config))
+    assert df["Code"].iloc[1] == "00001"
+    assert df["Count"].dtype == "Int64"
+
+# Test case for reading only some of the columns
+def test_usecols(tmp_path):
+    input_csv = write_wide_csv(tmp_path / "codes.csv")
+    options = ingest_options({"ingest": {"usecols": ["Name", "Code"]}, "field_rules": {"Count": {"dtype": "int"}}})
+    assert read_csv(input_csv, options).columns.tolist() == ["Code", "Name"]
+    assert read_header(input_csv, options).columns.tolist() == ["Code", "Name"]
+    assert all(chunk.columns.tolist() == ["Code", "Name"] for chunk in iter_csv(input_csv, options, 10))
+    with pytest.raises(ValueError):
+        read_csv(input_csv, ingest_options({"ingest": {"usecols": ["Code", "Missing"]}}))
+
+# Test case for rejecting bad ingest settings and hints
+def test_bad_settings_are_rejected():
+    with pytest.raises(ValueError):
+        ingest_options({"ingest": {"engine": "python"}})
+    with pytest.raises(ValueError):
+        ingest_options({"ingest": {"usecols": "Agency"}})
+    with pytest.raises(ValueError):
+        ingest_options({"ingest": {"chunks": 10}})
+    with pytest.raises(ValueError):
+        ingest_options({"field_rules": {"Zip": {"dtype": "decimal"}}})
+    # A parsed date could not be reformatted by the string date rule
+    with pytest.raises(ValueError):
+        ingest_options({"field_rules": {"Created_Date": {
+            "dtype": "datetime", "fix_date_format": {"input_format": "%m/%d/%Y %H:%M", "output_format": "%Y-%m-%d"}
+        }}})
+
+# Test case for the dtype key being accepted by the cleaning plan
+def test_plan_accepts_dtype_key():
+    plan = compile_plan(HINTED_CONFIG)
+    assert plan.field("Zip").steps == ()
+
+##################################################
+
+# Test case for the pyarrow engine reading the same frames and chunks as the C engine
+@pytest.mark.parametrize("chunk_size", [7, 10, 100])
+def test_pyarrow_matches_c_engine(tmp_path, chunk_size):
+    pytest.importorskip("pyarrow")
+    input_csv = write_wide_csv(tmp_path / "codes.csv")
+    config = {"field_rules": {"Code": {"ignore": True}, "Name": {"dtype": "category"}, "Count": {"dtype": "float"}}}
+    c_options = ingest_options(config)
+    arrow_options = ingest_options({**config, "ingest": {"engine": "pyarrow"}})
+
+    pd.testing.assert_frame_equal(read_csv(input_csv, arrow_options), read_csv(input_csv, c_options))
+    c_chunks = list(iter_csv(input_csv, c_options, chunk_size))
+    arrow_chunks = list(iter_csv(input_csv, arrow_options, chunk_size))
+    assert [len(chunk) for chunk in arrow_chunks] == [len(chunk) for chunk in c_chunks]
+    for arrow_chunk, c_chunk in zip(arrow_chunks, c_chunks):
+        # Categories can differ per chunk; the values and row index must not
+        pd.testing.assert_frame_equal(arrow_chunk.astype({"Name": object}), c_chunk.astype({"Name": object}))
+
+# Test case for streaming a hinted file through the pipeline with either engine
+def test_streaming_engines_match(tmp_path):
+    pytest.importorskip("pyarrow")
+    input_csv = write_wide_csv(tmp_path / "codes.csv")
+    config = {"field_rules": {
+        "Code": {"ignore": True},
+        "Name": {"dtype": "category", "trim_whitespace": True, "normalize_case": "title"},
+    }}
+    outputs = []
+    for engine in ("c", "pyarrow"):
+        output_path = tmp_path / f"{engine}_CLEANED.csv"
+        options = ingest_options({**config, "ingest": {"engine": engine}})
+        clean_csv_in_chunks(input_csv, str(output_path), config, chunk_size=10, ingest_options=options)
+        outputs.append(output_path.read_text(encoding="utf-8"))
+    assert outputs[0] == outputs[1]
+    assert "00007,7,Name 1" in outputs[0]
+
+# Test case for ISO dates, timestamps and numbers with string rules being cleaned the same by either engine
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_engines_match_on_date_columns(tmp_path, partitioned):
+    pytest.importorskip("pyarrow")
+    input_csv = str(tmp_path / "dates.csv")
+    with open(input_csv, "w", encoding="utf-8") as f:
+        f.write("Opened,Closed,Seen,Ref\n")
+        f.writelines(f"2024-01-{day:02d} 10:00,2024-01-{day:02d},2024-02-{day:02d},3.50\n" for day in range(1, 21))
+    config = {"field_rules": {
+        "Opened": {"fix_date_format": {"input_format": "%Y-%m-%d %H:%M", "output_format": "%m/%d/%Y"}},
+        "Closed": {"fix_date_format": {"input_format": "%Y-%m-%d", "output_format": "%m/%d/%Y"}},
+        "Ref": {"trim_whitespace": True},
+    }}
+    outputs = []
+    for engine in ("c", "pyarrow"):
+        output_path = tmp_path / f"{engine}_CLEANED.csv"
+        options = ingest_options({**config, "ingest": {"engine": engine}})
+        clean_csv_in_chunks(input_csv, str(output_path), config, chunk_size=7, ingest_options=options,
+                            modes={"partitioned": partitioned})
+        outputs.append(output_path.read_text(encoding="utf-8"))
+    assert outputs[0] == outputs[1]
+    assert "01/05/2024,01/05/2024,2024-02-05,3.50\n" in outputs[0]
+
+# Test case for chunks writing the same values as one read when a null or decimal is outside the first chunk
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_chunks_match_single_read(tmp_path, engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    input_csv = tmp_path / "zips.csv"
+    input_csv.write_text("Name,Zip,Score\nann,10000,1.5\nbob,10001,2.5\ncal,10002,3.5\n"
+                         "dan,10003,4\neve,,5\nfay,10005,6\n", encoding="utf-8")
+    options = ingest_options({"ingest": {"engine": engine}})
+
+    expected = read_csv(str(input_csv), options).to_csv(index=False)
+    chunks = list(iter_csv(str(input_csv), options, chunk_size=3))
+    assert len(chunks) == 2
+    assert pd.concat(chunks).to_csv(index=False) == expected
+    assert "dan,10003,4.0\neve,,5.0\n" in expected
+
+    outputs = []
+    for chunk_size in (3, 100):
+        output_path = tmp_path / f"zips_{chunk_size}_CLEANED.csv"
+        clean_csv_in_chunks(str(input_csv), str(output_path), {}, chunk_size=chunk_size, ingest_options=options)
+        outputs.append(output_path.read_text(encoding="utf-8"))
+    assert outputs[0] == outputs[1] == expected
+
+##################################################
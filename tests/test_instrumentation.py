@@ -0,0 +1,157 @@
+"""
+Test cases for the run instrumentation.
+Verifies stage timings (context manager, decorator and timed iteration),
+peak memory tracing of nested stages, per-rule costs collected while cleaning,
+the timed stages of the streaming pipeline, the JSON file, the report section,
+and the cProfile dump.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import json
+import pstats
+import logging
+import tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+from normalizer.change_tracker import ChangeBatch, ChangeTracker
+from normalizer.cleaner import clean_dataframe
+from normalizer.config_loader import load_config
+from normalizer.instrumentation import RunMetrics, profiled
+from normalizer.pipeline import clean_csv_in_chunks
+from normalizer.reporter import write_html_report
+
+##################################################
+
+# Set the sample input, config and a small config with several rules per field
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+CONFIG_PATH = "config/config.yaml"
+RULES_CONFIG = {
+    "field_rules": {
+        "Name": {"trim_whitespace": True, "normalize_case": "title",
+                 "replace_nulls_with": {"enabled": True, "value": "Unknown"}},
+        "Zip": {"remove_invalid_chars": "zip"},
+    }
+}
+
+##################################################
+
+# Test case for stages adding up their calls and time, in the order first entered
+def test_stages_add_up():
+    metrics = RunMetrics()
+    for _ in range(3):
+        with metrics.stage("read"):
+            pass
+    with metrics.stage("clean"):
+        pass
+
+    # The decorator and timed iteration count one call per function call or item
+    double = metrics.timed("write")(lambda value: value * 2)
+    assert double(4) == 8
+    assert list(metrics.iterate("chunks", iter([1, 2]))) == [1, 2]
+
+    stages = metrics.as_dict()["stages"]
+    assert [stage["stage"] for stage in stages] == ["read", "clean", "write", "chunks"]
+    assert [stage["calls"] for stage in stages] == [3, 1, 1, 3]
+    assert all(stage["seconds"] >= 0 and stage["peak_traced_mb"] is None for stage in stages)
+
+# Test case for a stage that raises still being timed
+def test_failed_stage_is_timed():
+    metrics = RunMetrics()
+    try:
+        with metrics.stage("export"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert metrics.stages["export"]["calls"] == 1
+
+# Test case for an inner stage's peak memory also counting for the outer stage
+def test_nested_peak_memory():
+    metrics = RunMetrics(trace_memory=True)
+    try:
+        with metrics.stage("outer"):
+            with metrics.stage("inner"):
+                block = bytearray(8 * 1024 * 1024)
+                del block
+            with metrics.stage("small"):
+                pass
+    finally:
+        metrics.close()
+    assert not tracemalloc.is_tracing()
+    assert metrics.stages["inner"]["peak_traced_mb"] >= 8
+    assert metrics.stages["outer"]["peak_traced_mb"] >= metrics.stages["inner"]["peak_traced_mb"]
+    assert metrics.stages["small"]["peak_traced_mb"] < 8
+
+##################################################
+
+# Test case for the calls, time and changed values of every rule in every field
+def test_rule_costs():
+    df = pd.DataFrame({"Name": ["  ann ", "Bob", None, "cy"], "Zip": ["10001", "1000 2", "x9", "10003"]})
+    changes = ChangeBatch()
+    cleaned_df, _ = clean_dataframe(df, RULES_CONFIG, changes)
+    assert set(changes.rule_times["Name"]) == {"replace_nulls_with", "trim_whitespace", "normalize_case"}
+
+    # Two batches of the same rows add up their calls
+    tracker = ChangeTracker()
+    tracker.record(df, cleaned_df, changes)
+    tracker.record(df, cleaned_df, changes)
+    costs = {(cost["field"], cost["rule"]): cost for cost in tracker.rule_costs()}
+    assert costs[("Name", "normalize_case")]["calls"] == 2
+    assert costs[("Name", "normalize_case")]["changed"] == 4
+    assert costs[("Zip", "remove_invalid_chars")]["changed"] == 4
+    seconds = [cost["seconds"] for cost in tracker.rule_costs()]
+    assert seconds == sorted(seconds, reverse=True)
+
+##################################################
+
+# Test case for the streaming pipeline timing each chunk's steps, and the JSON file
+def test_streaming_stages(tmp_path):
+    metrics = RunMetrics()
+    tracker = ChangeTracker()
+    clean_csv_in_chunks(SAMPLE_CSV_PATH, str(tmp_path / "out.csv"), load_config(CONFIG_PATH), chunk_size=2,
+                        db_path=str(tmp_path / "out.db"), tracker=tracker, metrics=metrics)
+    metrics.add_rule_costs(tracker.rule_costs())
+    chunks = -(-tracker.rows // 2)
+    assert metrics.stages["clean"]["calls"] == chunks
+    assert metrics.stages["write_csv"]["calls"] == chunks
+    # One more read finds the end of the file, and closing the writer builds the indexes
+    assert metrics.stages["read"]["calls"] == chunks + 1
+    assert metrics.stages["export_sqlite"]["calls"] == chunks + 1
+
+    path = metrics.write_json(str(tmp_path / "metrics.json"))
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert [stage["stage"] for stage in saved["stages"]] == list(metrics.stages)
+    assert saved["rule_costs"] == tracker.rule_costs()
+    assert "clean" in metrics.format()
+
+# Test case for the timings appearing in the HTML report
+def test_report_section(tmp_path):
+    metrics = RunMetrics()
+    with metrics.stage("clean"):
+        pass
+    metrics.add_rule_costs([{"field": "Name", "rule": "normalize_case", "calls": 1, "seconds": 0.5, "changed": 3}])
+    path = write_html_report("input.csv", CONFIG_PATH, "out.csv", None, "pre", "post", None, None,
+                             output_path=str(tmp_path / "report.html"), metrics=metrics.as_dict())
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    assert "Run Timings" in html
+    assert "<td>normalize_case</td>" in html
+
+##################################################
+
+# Test case for profiled() dumping cProfile stats and logging the top functions
+def test_profiled(tmp_path, caplog):
+    profile_path = str(tmp_path / "run.prof")
+    with caplog.at_level(logging.INFO):
+        with profiled(profile_path, logging.getLogger()):
+            sorted(range(1000), key=lambda n: -n)
+    assert pstats.Stats(profile_path).total_calls > 0
+    assert "cumulative" in caplog.text
+
+    # Without a path nothing is profiled
+    with profiled(None):
+        pass
+
+##################################################
@@ -0,0 +1,141 @@
+"""
+Test cases for partitioned reading of a single CSV file.
+Verifies that the file is split into byte ranges on record boundaries, never
+inside a quoted value with newlines, that the ranges read one by one give the
+same rows as the chunked reader (with both engines), and that a partitioned
+streaming run, with and without worker processes, writes the same outputs and
+summaries (and column types) as a plain one.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import sqlite3
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+import pytest
+from normalizer.change_tracker import ChangeTracker
+from normalizer.ingest import iter_csv, partition_ranges, range_settings, read_range, record_offset
+from normalizer.pipeline import clean_csv_in_chunks
+from normalizer.reporter import format_profile
+
+##################################################
+
+# Config with rules that change most rows of the test input
+CONFIG = {
+    "field_rules": {
+        "Name": {"trim_whitespace": True, "normalize_case": "title"},
+        "Resolution_Description": {"trim_whitespace": True, "normalize_case": "upper"},
+        "Zip": {"remove_invalid_chars": "zip"},
+    }
+}
+
+# Settings of the pyarrow engine, as returned by ingest_options
+PYARROW = {"engine": "pyarrow", "usecols": None, "dtype": {}, "parse_dates": []}
+
+##################################################
+
+# Define a helper to write a CSV whose descriptions often span lines, with doubled quotes and blank lines
+def write_input(path, rows=60):
+    lines = ["Name,Resolution_Description,Zip"]
+    for i in range(rows):
+        text = f'" responded,\nand ""fixed"" it\n{i}"' if i % 3 == 0 else f"closed {i}"
+        lines.append(f"  name {i} ,{text},{10000 + i}-x")
+        if i % 7 == 0:
+            lines.append("")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+##################################################
+
+# Test case for ranges ending on record boundaries and reading the same rows as the chunked reader
+@pytest.mark.parametrize("engine", [None, "pyarrow"])
+def test_ranges_match_chunked_read(tmp_path, engine):
+    if engine:
+        pytest.importorskip("pyarrow")
+    options = PYARROW if engine else None
+    input_csv = write_input(tmp_path / "input.csv")
+    expected = pd.concat(list(iter_csv(input_csv, options, 10)))
+    header_end = record_offset(input_csv, 0, 1)
+    # Every record boundary (including blank lines), from the end of the header to the end of the file
+    boundaries = set()
+    offset = header_end
+    while offset < os.path.getsize(input_csv):
+        offset = record_offset(input_csv, offset, 1)
+        boundaries.add(offset)
+
+    settings = range_settings(input_csv, options)
+    for target_bytes in (1, 50, 400, 10 ** 6):
+        ranges = partition_ranges(input_csv, target_bytes)
+        assert ranges[0][0] == header_end and ranges[-1][1] == os.path.getsize(input_csv)
+        assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+        assert all(end in boundaries for _, end in ranges)
+        frames = [read_range(input_csv, start, end, settings) for start, end in ranges]
+        pd.testing.assert_frame_equal(pd.concat(frames, ignore_index=True), expected.reset_index(drop=True))
+
+# Test case for splitting only part of a file, and a file without rows
+def test_partial_and_empty_ranges(tmp_path):
+    input_csv = write_input(tmp_path / "input.csv")
+    start = record_offset(input_csv, record_offset(input_csv, 0, 1), 5)
+    end = record_offset(input_csv, start, 20)
+    ranges = partition_ranges(input_csv, 100, start, end)
+    settings = range_settings(input_csv)
+    rows = pd.concat([read_range(input_csv, a, b, settings) for a, b in ranges])
+    assert rows["Zip"].tolist() == [f"{10005 + i}-x" for i in range(20)]
+
+    empty_csv = tmp_path / "empty.csv"
+    empty_csv.write_text("A,B\n", encoding="utf-8")
+    assert partition_ranges(str(empty_csv), 100) == []
+
+##################################################
+
+# Define a helper to run the pipeline and return its outputs and summaries
+def run(tmp_path, label, input_csv, **options):
+    tracker = ChangeTracker()
+    result = clean_csv_in_chunks(input_csv, str(tmp_path / f"{label}.csv"), CONFIG, chunk_size=7,
+                                 db_path=str(tmp_path / f"{label}.db"), tracker=tracker, **options)
+    with sqlite3.connect(tmp_path / f"{label}.db") as conn:
+        rows = conn.execute("SELECT * FROM cleaned_data").fetchall()
+    summary = {
+        "rows": result["rows"],
+        "change_counts": result["change_counts"],
+        "example_changes": result["example_changes"],
+        "pre": format_profile(result["pre_profile"], "Pre"),
+        "post": format_profile(result["post_profile"], "Post"),
+        "changes": tracker.stats(),
+    }
+    return (tmp_path / f"{label}.csv").read_text(encoding="utf-8"), rows, summary
+
+# Test case for partitioned runs matching a plain chunked run
+@pytest.mark.parametrize("workers", [1, 2])
+def test_partitioned_run_matches_plain(tmp_path, workers):
+    input_csv = write_input(tmp_path / "input.csv")
+    expected = run(tmp_path, "plain", input_csv)
+    assert run(tmp_path, "partitioned", input_csv, workers=workers, modes={"partitioned": True}) == expected
+    # Without a tracker the workers only send back the last row read
+    plain = clean_csv_in_chunks(input_csv, str(tmp_path / "a.csv"), CONFIG, chunk_size=7)
+    partitioned = clean_csv_in_chunks(input_csv, str(tmp_path / "b.csv"), CONFIG, chunk_size=7,
+                                      workers=workers, modes={"partitioned": True})
+    assert partitioned["rows"] == plain["rows"]
+    assert partitioned["example_changes"] == plain["example_changes"]
+    assert (tmp_path / "a.csv").read_text(encoding="utf-8") == (tmp_path / "b.csv").read_text(encoding="utf-8")
+
+# Test case for worker processes writing a column of decimals the same way in every range, as a serial run does
+def test_partitioned_workers_keep_column_types(tmp_path):
+    input_csv = tmp_path / "scores.csv"
+    rows = [f"n{i},{i}.5" if i < 7 else f"n{i},{i}" for i in range(40)]
+    input_csv.write_text("Name,Score\n" + "\n".join(rows) + "\n", encoding="utf-8")
+    expected = run(tmp_path, "serial", str(input_csv))
+    assert "N30,30.0\n" in expected[0]
+    for workers in (1, 2):
+        assert run(tmp_path, f"partitioned_{workers}", str(input_csv), workers=workers,
+                   modes={"partitioned": True}) == expected
+
+# Test case for partitioned reading being rejected with pipelined mode
+def test_partitioned_rejects_pipelined(tmp_path):
+    input_csv = write_input(tmp_path / "input.csv")
+    with pytest.raises(ValueError, match="Partitioned reading"):
+        clean_csv_in_chunks(input_csv, str(tmp_path / "out.csv"), CONFIG,
+                            modes={"partitioned": True, "pipelined": True})
+
+##################################################
@@ -0,0 +1,160 @@
+"""
+Test cases for the PostgreSQL COPY exporter.
+The exports run against a throwaway PostgreSQL server started by the fixture
+with initdb and pg_ctl (or an existing server given in DNT_TEST_POSTGRES_URL);
+they are skipped if neither is available.  Verifies typed table creation, the
+truncate, append and upsert modes, rollback on errors, and streaming export,
+including number columns whose later nulls are replaced with text.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import shutil
+import socket
+import subprocess
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+import pytest
+from normalizer.config_loader import load_config
+from normalizer.pg_exporter import export_to_postgres, postgres_column_types, postgres_engine, postgres_options
+from normalizer.pipeline import clean_csv_in_chunks
+
+##################################################
+
+# Set the sample input and config used by the streaming test
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+CONFIG_PATH = "config/config.yaml"
+
+# Sample DataFrame used for testing
+sample_df = pd.DataFrame({
+    "Key": [1, 2, 3],
+    "Agency": ["NYPD", "", None],
+    "Score": [1.5, None, 3.0],
+    "Closed": pd.to_datetime(["2025-05-27 03:18", None, "2025-05-28 00:00"]),
+})
+
+##################################################
+
+# Define a fixture that starts a local PostgreSQL server for the tests in this file
+@pytest.fixture(scope="module")
+def postgres_url(tmp_path_factory):
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("psycopg2")
+    url = os.environ.get("DNT_TEST_POSTGRES_URL")
+    if url:
+        yield url
+        return
+
+    initdb, pg_ctl = shutil.which("initdb"), shutil.which("pg_ctl")
+    if not initdb or not pg_ctl:
+        pytest.skip("PostgreSQL server binaries (initdb, pg_ctl) are not on PATH")
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        pytest.skip("PostgreSQL cannot be started as root")
+    data_dir = tmp_path_factory.mktemp("pgdata")
+    subprocess.run([initdb, "-D", str(data_dir), "-U", "dnt", "--auth=trust", "-E", "UTF8"],
+                   check=True, capture_output=True)
+    # Ask the OS for a free port, and listen on a socket in the data directory only
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    subprocess.run([pg_ctl, "-D", str(data_dir), "-l", str(data_dir / "server.log"), "-w",
+                    "-o", f"-p {port} -k {data_dir} -c listen_addresses=''", "start"],
+                   check=True, capture_output=True)
+    url = f"postgresql+psycopg2://dnt@/postgres?host={data_dir}&port={port}"
+    try:
+        yield url
+    finally:
+        postgres_engine(url).dispose()
+        postgres_engine.cache_clear()
+        subprocess.run([pg_ctl, "-D", str(data_dir), "-m", "fast", "-w", "stop"], capture_output=True)
+
+# Define a helper to read a table back, ordered by its first column
+def read_table(url, table):
+    with postgres_engine(url).connect() as conn:
+        return pd.read_sql(f'SELECT * FROM "{table}" ORDER BY 1', conn)
+
+##################################################
+
+# Test case for reading and validating the postgres section of the config
+def test_postgres_options(monkeypatch):
+    monkeypatch.setenv("DNT_POSTGRES_URL", "postgresql://example/db")
+    options = postgres_options({"postgres": {"table": "t", "mode": "upsert", "primary_key": "Key"}})
+    assert options["url"] == "postgresql://example/db"
+    assert options["schema"] == "public"
+    assert options["batch_size"] == 50_000
+    assert postgres_options({})["mode"] == "truncate"
+    assert options["text_columns"] == []
+    filled = {"field_rules": {"Score": {"replace_nulls_with": {"enabled": True, "value": "Not Specified"}}}}
+    assert postgres_options(filled)["text_columns"] == ["Score"]
+
+    with pytest.raises(ValueError):
+        postgres_options({"postgres": {"mode": "upsert"}})
+    with pytest.raises(ValueError):
+        postgres_options({"postgres": {"mode": "merge"}})
+    with pytest.raises(ValueError):
+        postgres_options({"postgres": {"batch_size": 0}})
+    with pytest.raises(ValueError):
+        postgres_options({"postgres": {"password": "x"}})
+
+# Test case for choosing column types from the data
+def test_postgres_column_types():
+    assert postgres_column_types(sample_df) == {
+        "Key": "BIGINT", "Agency": "TEXT", "Score": "DOUBLE PRECISION", "Closed": "TIMESTAMP"
+    }
+    # Columns whose nulls are replaced with text are TEXT even when the first rows are numbers
+    assert postgres_column_types(sample_df, ["Score"])["Score"] == "TEXT"
+
+##################################################
+
+# Test case for truncate and append loads keeping nulls, empty strings and types
+def test_truncate_and_append(postgres_url):
+    export_to_postgres(sample_df, postgres_url, "loads", batch_size=2)
+    stats = export_to_postgres(sample_df, postgres_url, "loads", batch_size=2)
+    loaded = read_table(postgres_url, "loads")
+    assert stats == {"mode": "truncate", "rows": 3, "inserted": 3, "updated": 0}
+    assert loaded["Key"].tolist() == [1, 2, 3]
+    assert loaded["Agency"].tolist() == ["NYPD", "", None]
+    assert loaded["Closed"].iloc[0] == pd.Timestamp("2025-05-27 03:18")
+
+    export_to_postgres(sample_df, postgres_url, "loads", mode="append")
+    assert len(read_table(postgres_url, "loads")) == 6
+
+# Test case for upserts inserting new keys and updating existing ones
+def test_upsert(postgres_url):
+    export_to_postgres(sample_df.iloc[:2], postgres_url, "upserts", mode="upsert", primary_key="Key")
+    changed = sample_df.copy()
+    changed.loc[0, "Agency"] = "DSNY"
+    stats = export_to_postgres(changed, postgres_url, "upserts", mode="upsert", primary_key="Key", batch_size=2)
+    assert stats["inserted"] == 1 and stats["updated"] == 2
+    assert read_table(postgres_url, "upserts")["Agency"].tolist() == ["DSNY", "", None]
+
+# Test case for a failed load rolling back, leaving the previous rows in place
+def test_failed_load_rolls_back(postgres_url):
+    export_to_postgres(sample_df, postgres_url, "rollback")
+    with pytest.raises(ValueError):
+        export_to_postgres(sample_df.rename(columns={"Score": "Other"}), postgres_url, "rollback")
+    assert len(read_table(postgres_url, "rollback")) == 3
+
+# Test case for the streaming pipeline loading every chunk into one table
+def test_streaming_export(postgres_url, tmp_path):
+    options = postgres_options({"postgres": {"url": postgres_url, "table": "streamed", "batch_size": 1}})
+    result = clean_csv_in_chunks(SAMPLE_CSV_PATH, str(tmp_path / "out.csv"), load_config(CONFIG_PATH),
+                                 chunk_size=2, postgres_options=options)
+    cleaned = pd.read_csv(tmp_path / "out.csv", dtype=str)
+    loaded = read_table(postgres_url, "streamed").astype(str)
+    assert result["postgres_stats"]["rows"] == len(cleaned)
+    assert sorted(loaded.values.tolist()) == sorted(cleaned.values.tolist())
+
+# Test case for a number column whose later nulls are replaced with text loading as TEXT
+def test_streaming_export_of_filled_numbers(postgres_url, tmp_path):
+    input_csv = tmp_path / "scores.csv"
+    input_csv.write_text("Key,Score\n1,1.5\n2,2.5\n3,\n4,4.5\n", encoding="utf-8")
+    config = {"field_rules": {"Score": {"replace_nulls_with": {"enabled": True, "value": "Not Specified"}}}}
+    options = postgres_options({**config, "postgres": {"url": postgres_url, "table": "filled"}})
+    result = clean_csv_in_chunks(str(input_csv), str(tmp_path / "out.csv"), config, chunk_size=2,
+                                 postgres_options=options)
+    assert result["postgres_stats"]["rows"] == 4
+    assert read_table(postgres_url, "filled")["Score"].tolist() == ["1.5", "2.5", "Not Specified", "4.5"]
+
+##################################################
@@ -0,0 +1,123 @@
+"""
+Test cases for the streaming (chunked) cleaning pipeline.
+Verifies that cleaning a CSV chunk by chunk produces the same cleaned CSV,
+SQLite table, and summaries as cleaning it all at once in memory.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import sqlite3
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+from normalizer.cleaner import clean_dataframe
+from normalizer.config_loader import load_config
+from normalizer.pipeline import clean_csv_in_chunks, clean_dataframe_parallel, concat_partitions, split_rows
+from normalizer.profiler import DataProfile
+from normalizer.reporter import format_profile, summarize_dataframe
+
+##################################################
+
+# Set the sample input and config used by every test
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+CONFIG_PATH = "config/config.yaml"
+
+##################################################
+
+# Test case for streaming output matching the in-memory output
+def test_chunked_output_matches_in_memory(tmp_path):
+    config = load_config(CONFIG_PATH)
+    output_path = tmp_path / "chunked_CLEANED.csv"
+    db_path = tmp_path / "chunked_CLEANED.db"
+
+    # Use a chunk size that does not divide the row count evenly
+    result = clean_csv_in_chunks(SAMPLE_CSV_PATH, str(output_path), config,
+                                 chunk_size=2, db_path=str(db_path))
+
+    df = pd.read_csv(SAMPLE_CSV_PATH, low_memory=False)
+    cleaned_df, change_counts = clean_dataframe(df, config)
+
+    # Cleaned CSV is byte for byte the same as the in-memory path
+    assert output_path.read_text(encoding="utf-8") == cleaned_df.to_csv(index=False)
+    assert result["rows"] == len(df)
+    assert result["change_counts"] == change_counts
+
+    # Every chunk was appended to the same SQLite table
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cleaned_data").fetchone()[0] == len(df)
+
+    # Merged profiles read exactly like a summary of the whole DataFrame
+    assert format_profile(result["pre_profile"], "Pre-Clean") == summarize_dataframe(df, "Pre-Clean")
+    assert format_profile(result["post_profile"], "Post-Clean") == summarize_dataframe(cleaned_df, "Post-Clean")
+
+##################################################
+
+# Test case for merging profiles built from separate chunks
+def test_profiles_merge():
+    df = pd.DataFrame({"A": ["x", "y", None, "x"], "B": [1, None, 1, 2]})
+    first = DataProfile().update(df.iloc[:2])
+    second = DataProfile().update(df.iloc[2:])
+    merged = first.merge(second)
+    assert merged.rows == 4
+    assert merged.null_counts == {"A": 1, "B": 1}
+    assert format_profile(merged, "Test") == summarize_dataframe(df, "Test")
+
+##################################################
+
+# Test case for row partitions covering every row exactly once, in order
+def test_split_rows_keeps_order():
+    df = pd.DataFrame({"A": range(7)})
+    parts = split_rows(df, 3)
+    assert [len(part) for part in parts] == [3, 2, 2]
+    assert pd.concat(parts)["A"].tolist() == list(range(7))
+    assert len(split_rows(df.iloc[:2], 8)) == 2
+
+##################################################
+
+# Test case for the process pool producing the same output as a serial run
+def test_parallel_cleaning_matches_serial(tmp_path):
+    config = load_config(CONFIG_PATH)
+    df = pd.read_csv(SAMPLE_CSV_PATH, low_memory=False)
+
+    serial_df, serial_counts = clean_dataframe(df, config)
+    parallel_df, parallel_counts = clean_dataframe_parallel(df, config, workers=3)
+    assert parallel_df.to_csv(index=False) == serial_df.to_csv(index=False)
+    assert parallel_counts == serial_counts
+
+    # Streaming mode with workers writes the chunks back in their original order
+    output_path = tmp_path / "parallel_CLEANED.csv"
+    result = clean_csv_in_chunks(SAMPLE_CSV_PATH, str(output_path), config, chunk_size=1, workers=2)
+    assert output_path.read_text(encoding="utf-8") == serial_df.to_csv(index=False)
+    assert result["change_counts"] == serial_counts
+    # Profiles built in the workers merge into the profile of the whole file
+    assert format_profile(result["post_profile"], "Post") == summarize_dataframe(serial_df, "Post")
+
+##################################################
+
+# Test case for categorical partitions staying categorical when put back together
+def test_concat_partitions_keeps_categoricals():
+    first = pd.DataFrame({"A": pd.Categorical(["x", "y"]), "B": [1, 2]})
+    second = pd.DataFrame({"A": pd.Categorical(["z", "x"]), "B": [3, 4]}, index=[2, 3])
+    combined = concat_partitions([first, second])
+    assert isinstance(combined["A"].dtype, pd.CategoricalDtype)
+    assert combined["A"].tolist() == ["x", "y", "z", "x"]
+    assert combined["B"].tolist() == [1, 2, 3, 4]
+
+##################################################
+
+# Test case for streaming chunks into an incremental SQLite table
+def test_chunked_incremental_sqlite(tmp_path):
+    config = load_config(CONFIG_PATH)
+    options = {"mode": "incremental", "primary_key": "UI_Key", "delete_missing": True}
+    output_path = str(tmp_path / "incremental_CLEANED.csv")
+    db_path = str(tmp_path / "incremental_CLEANED.db")
+
+    first = clean_csv_in_chunks(SAMPLE_CSV_PATH, output_path, config, chunk_size=2,
+                                db_path=db_path, sqlite_options=options)
+    second = clean_csv_in_chunks(SAMPLE_CSV_PATH, output_path, config, chunk_size=2,
+                                 db_path=db_path, sqlite_options=options)
+    assert first["sqlite_stats"]["inserted"] == 5
+    assert second["sqlite_stats"]["unchanged"] == 5
+    assert second["sqlite_stats"]["deleted"] == 0
+
+##################################################
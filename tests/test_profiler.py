@@ -0,0 +1,86 @@
+"""
+Test cases for the single-pass DataFrame profiler.
+Verifies exact counts against pandas, merging of chunk profiles, and the
+HyperLogLog and frequent-items fallback for high-cardinality columns.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+from normalizer.profiler import ColumnProfile, DataProfile, HyperLogLog, hash_values, profile_dataframe
+
+##################################################
+
+# Set the sample input used by the tests
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+
+##################################################
+
+# Test case for exact profiles matching pandas' own counts
+def test_profile_matches_pandas():
+    df = pd.read_csv(SAMPLE_CSV_PATH, low_memory=False)
+    profile = profile_dataframe(df)
+    assert profile.rows == len(df)
+    assert list(profile.columns) == list(df.columns)
+    assert profile.null_counts == df.isnull().sum().to_dict()
+    assert profile.distinct_counts == df.nunique().to_dict()
+
+##################################################
+
+# Test case for lengths and top values of one column
+def test_column_lengths_and_top_values():
+    values = pd.Series(["bb", "a", None, "bb", "cccc", "bb", "a"])
+    profile = ColumnProfile().update(values)
+    assert profile.nulls == 1
+    assert (profile.min_length, profile.max_length) == (1, 4)
+    assert profile.top_values(2) == [("bb", 3), ("a", 2)]
+
+    # Unused categories of a categorical column are not counted
+    categorical = pd.Series(pd.Categorical(["x", "x"], categories=["x", "y"]))
+    assert ColumnProfile().update(categorical).distinct == 1
+
+##################################################
+
+# Test case for chunk profiles merging into the profile of all rows
+def test_merged_chunks_match_whole_profile():
+    df = pd.DataFrame({"A": ["x", "y", None, "x", "z"], "B": [1.0, None, 1.0, 2.0, None]})
+    merged = DataProfile()
+    for start in range(0, len(df), 2):
+        merged.merge(DataProfile().update(df.iloc[start:start + 2]))
+    whole = profile_dataframe(df)
+    assert merged.null_counts == whole.null_counts
+    assert merged.distinct_counts == whole.distinct_counts
+    assert merged.columns["A"].top_values() == whole.columns["A"].top_values()
+
+##################################################
+
+# Test case for the HyperLogLog estimate staying close to the true count
+def test_hyperloglog_estimate():
+    sketch = HyperLogLog()
+    sketch.add_hashes(hash_values([f"id-{n}" for n in range(50_000)]))
+    assert abs(sketch.estimate() - 50_000) < 50_000 * 0.03
+
+    # Merging two halves gives the same sketch as adding everything at once
+    first, second = HyperLogLog(), HyperLogLog()
+    first.add_hashes(hash_values([f"id-{n}" for n in range(25_000)]))
+    second.add_hashes(hash_values([f"id-{n}" for n in range(25_000, 50_000)]))
+    assert (first.merge(second).registers == sketch.registers).all()
+
+##################################################
+
+# Test case for high-cardinality columns switching to approximate counts
+def test_high_cardinality_column_is_approximate():
+    values = pd.Series([f"id-{n}" for n in range(20_000)] + ["common"] * 5_000)
+    profile = DataProfile(distinct_limit=1_000)
+    for start in range(0, len(values), 4_000):
+        profile.update(values.iloc[start:start + 4_000].to_frame("ID"))
+    column = profile.columns["ID"]
+    assert not column.exact
+    assert abs(column.distinct - 20_001) < 20_001 * 0.03
+    # The frequent value is still found, with a count that is not overstated
+    value, count = column.top_values(1)[0]
+    assert value == "common" and count <= 5_000
+
+##################################################
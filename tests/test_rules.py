@@ -46,4 +46,70 @@ def test_fix_date_format():
     assert rules.fix_date_format("not-a-date") == "not-a-date"  # invalid input
     assert rules.fix_date_format(20250511) == 20250511  # non-string input
 
-######################################################
\ No newline at end of file
+######################################################
+
+# Function to test the date format pre-check never rejects a value strptime accepts
+def test_date_precheck_pattern():
+    pattern = rules.date_precheck_pattern("%m%d%Y %H%M")
+    assert pattern.fullmatch("5262025 2359")
+    assert not pattern.fullmatch("NYPD")
+    assert not pattern.fullmatch("Noise - Commercial")
+    # %d also accepts a leading space, so the pattern does too
+    assert rules.date_precheck_pattern("%d/%m/%Y").fullmatch(" 2/05/2025")
+    # Formats with text directives are not pre-checked
+    assert rules.date_precheck_pattern("%d %b %Y") is None
+    assert rules.fix_date_format("02 May 2025", "%d %b %Y", "%Y-%m-%d") == "2025-05-02"
+
+######################################################
+
+# Function to test the date cache counts hits, misses, and pre-check rejections
+def test_fix_date_format_cache():
+    rules.clear_date_cache()
+    for _ in range(3):
+        assert rules.fix_date_format("05/11/2025") == "2025-05-11"
+        # Passes the pre-check but fails to parse, so the failure is cached too
+        assert rules.fix_date_format("13/45/2025") == "13/45/2025"
+        # Fails the pre-check, so strptime is never tried
+        assert rules.fix_date_format("not-a-date") == "not-a-date"
+    info = rules.date_cache_info()
+    assert info["misses"] == 2
+    assert info["hits"] == 4
+    assert info["rejected"] == 3
+    assert info["size"] == 2
+
+# Function to test the column version counting the values pandas parses, which never reach the cache
+def test_fix_date_format_series_counts():
+    import pandas as pd
+    rules.clear_date_cache()
+    values = pd.Series(["05/11/2025", "05/12/2025", "13/45/2025", "not-a-date"], dtype=object)
+    assert rules.fix_date_format_series(values).tolist() == ["2025-05-11", "2025-05-12", "13/45/2025", "not-a-date"]
+    info = rules.date_cache_info()
+    assert (info["vectorized"], info["misses"], info["hits"], info["rejected"]) == (2, 1, 0, 1)
+    assert "2 values parsed column-wise" in rules.date_cache_summary()
+
+######################################################
+
+# Function to test removing invalid characters with other allow-lists
+def test_remove_invalid_chars_profiles():
+    assert rules.remove_invalid_chars("10001-1234 NY", rules.char_profile("zip")) == "10001-1234"
+    assert rules.remove_invalid_chars("Name+Tag@Site.com ", rules.char_profile("email")) == "Name+Tag@Site.com"
+    assert rules.remove_invalid_chars("Gone, ok?", rules.char_profile("text")) == "Gone, ok?"
+    assert rules.remove_invalid_chars("AB-12 c", "A-Z") == "AB"
+    # Clean ASCII values skip the regex and come back as the very same object
+    value = "already clean"
+    assert rules.remove_invalid_chars(value) is value
+    # Non-ASCII values always go through the regex
+    assert rules.remove_invalid_chars("Café!") == "Café"
+
+######################################################
+
+# Function to test the column version gives the same result as the single-value version
+def test_remove_invalid_chars_series():
+    import pandas as pd
+    values = pd.Series(["hello$%^world!", "user@site.com", "Café!", "clean"], dtype=object)
+    expected = [rules.remove_invalid_chars(v) for v in values]
+    assert rules.remove_invalid_chars_series(values).tolist() == expected
+    zip_class = rules.char_profile("zip")
+    assert rules.remove_invalid_chars_series(values, zip_class).tolist() == ["", "", "", ""]
+
+######################################################
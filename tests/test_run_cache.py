@@ -0,0 +1,110 @@
+"""
+Test cases for the content-addressed run cache.
+Verifies that a run is only reused when the input, config and options are
+unchanged and every recorded output is still on disk untouched, and that a run
+asked for a change sidecar cleans the file instead of reusing a cached run.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import glob
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from normalizer.runner import clean_file
+from normalizer.run_cache import config_digest, lookup_run, record_run, run_cache_key
+
+##################################################
+
+# Set the config used by every test
+CONFIG = {"field_rules": {"name": {"strip_whitespace": True, "normalize_case": "title"}}}
+
+# Define the helper to create an input file and one finished run's outputs
+def make_run(tmp_path):
+    input_csv = tmp_path / "input.csv"
+    input_csv.write_text("name\n  alice \n", encoding="utf-8")
+    cleaned = tmp_path / "input_CLEANED.csv"
+    cleaned.write_text("name\nAlice\n", encoding="utf-8")
+    report = tmp_path / "report.html"
+    report.write_text("<html></html>", encoding="utf-8")
+    return input_csv, {"csv": str(cleaned), "sqlite": None, "report": str(report)}
+
+##################################################
+
+# Test case for the config hash ignoring key order
+def test_config_digest_ignores_key_order():
+    reordered = {"field_rules": {"name": {"normalize_case": "title", "strip_whitespace": True}}}
+    assert config_digest(CONFIG) == config_digest(reordered)
+    assert config_digest(CONFIG) != config_digest({"field_rules": {"name": {"strip_whitespace": False}}})
+
+##################################################
+
+# Test case for an unchanged run being reused
+def test_unchanged_run_is_reused(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    input_csv, outputs = make_run(tmp_path)
+    key, info = run_cache_key(str(input_csv), CONFIG, {"chunk_size": None}, cache_dir)
+
+    # Nothing is cached before the first run is recorded
+    assert lookup_run(str(input_csv), key, cache_dir) is None
+    record_run(str(input_csv), key, info, outputs, cache_dir)
+
+    key_again, _ = run_cache_key(str(input_csv), CONFIG, {"chunk_size": None}, cache_dir)
+    assert key_again == key
+    cached = lookup_run(str(input_csv), key_again, cache_dir)
+    assert cached["csv"] == os.path.abspath(outputs["csv"])
+    assert cached["sqlite"] is None
+
+##################################################
+
+# Test case for changes to the input, config or options missing the cache
+def test_changes_miss_the_cache(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    input_csv, outputs = make_run(tmp_path)
+    key, info = run_cache_key(str(input_csv), CONFIG, {"chunk_size": None}, cache_dir)
+    record_run(str(input_csv), key, info, outputs, cache_dir)
+
+    # Different options or config give a different key
+    assert run_cache_key(str(input_csv), CONFIG, {"chunk_size": 10}, cache_dir)[0] != key
+    assert run_cache_key(str(input_csv), {"field_rules": {}}, {"chunk_size": None}, cache_dir)[0] != key
+
+    # Editing the input file gives a different key
+    input_csv.write_text("name\n  bob \n", encoding="utf-8")
+    assert run_cache_key(str(input_csv), CONFIG, {"chunk_size": None}, cache_dir)[0] != key
+
+##################################################
+
+# Test case for a modified or missing output invalidating the cached run
+def test_changed_output_invalidates_run(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    input_csv, outputs = make_run(tmp_path)
+    key, info = run_cache_key(str(input_csv), CONFIG, None, cache_dir)
+    record_run(str(input_csv), key, info, outputs, cache_dir)
+
+    with open(outputs["csv"], "a", encoding="utf-8") as f:
+        f.write("Edited\n")
+    assert lookup_run(str(input_csv), key, cache_dir) is None
+
+    # A missing report also forces a fresh run
+    record_run(str(input_csv), key, info, outputs, cache_dir)
+    os.remove(outputs["report"])
+    assert lookup_run(str(input_csv), key, cache_dir) is None
+
+# Test case for a run with a change sidecar cleaning the file even when the cache holds it
+def test_sidecar_skips_the_cache(tmp_path):
+    input_csv = tmp_path / "sidecar_cache_feed.csv"
+    input_csv.write_text("name\n  alice \n", encoding="utf-8")
+    sidecar = tmp_path / "changes.ndjson"
+    config = {"field_rules": {"name": {"trim_whitespace": True, "normalize_case": "title"}}}
+    try:
+        options = {"report_path": str(tmp_path / "report.html")}
+        clean_file(str(input_csv), config, "config/config.yaml", force=True, **options)
+        assert clean_file(str(input_csv), config, "config/config.yaml", **options)["status"] == "cached"
+        result = clean_file(str(input_csv), config, "config/config.yaml", sidecar_path=str(sidecar), **options)
+        assert result["status"] == "cleaned"
+        assert result["sidecar"] == str(sidecar)
+        assert sidecar.read_text(encoding="utf-8").strip()
+    finally:
+        for path in glob.glob("data/*/sidecar_cache_feed_CLEANED.*"):
+            os.remove(path)
+
+##################################################
@@ -0,0 +1,133 @@
+"""
+Test cases for the SQLite exporter.
+Verifies the bulk loader creates a typed table, loads every row with nulls
+and categoricals intact, appends across calls, builds configured indexes,
+leaves the database in its original journal mode, and that incremental mode
+only rewrites rows whose values changed.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import sqlite3
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
+import pytest
+from normalizer.sql_exporter import export_to_sqlite, sqlite_column_types, sqlite_options
+
+##################################################
+
+# Sample cleaned data covering each kind of column
+sample_df = pd.DataFrame({
+    "UI_Key": [65070824, 65069274, 65071908],
+    "Score": [1.5, None, 3.0],
+    "Agency": pd.Categorical(["Nypd", "Dsny", "Nypd"]),
+    "Complaint Type": ["Noise - Commercial", None, "Heat"],
+    "Zip": [11420, "Not Specified", 10030],
+})
+
+##################################################
+
+# Test case for the declared column types
+def test_sqlite_column_types():
+    assert sqlite_column_types(sample_df) == {
+        "UI_Key": "INTEGER",
+        "Score": "REAL",
+        "Agency": "TEXT",
+        "Complaint Type": "TEXT",
+        "Zip": "TEXT",
+    }
+
+##################################################
+
+# Test case for a full bulk load with small batches, an append, and indexes
+def test_export_to_sqlite_bulk_load(tmp_path):
+    db_path = str(tmp_path / "bulk.db")
+    export_to_sqlite(sample_df, db_path, batch_size=2, indexes=[["Agency"], ["Agency", "Zip"]])
+    export_to_sqlite(sample_df.iloc[:1], db_path, if_exists="append")
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute('SELECT "UI_Key", "Score", "Agency", "Complaint Type" FROM cleaned_data').fetchall()
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        declared = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(cleaned_data)")}
+
+    assert rows == [
+        (65070824, 1.5, "Nypd", "Noise - Commercial"),
+        (65069274, None, "Dsny", None),
+        (65071908, 3.0, "Nypd", "Heat"),
+        (65070824, 1.5, "Nypd", "Noise - Commercial"),
+    ]
+    assert indexes == {"idx_cleaned_data_Agency", "idx_cleaned_data_Agency_Zip"}
+    assert journal_mode == "delete"
+    assert declared["UI_Key"] == "INTEGER"
+
+    # Replacing drops the old rows, and 'fail' refuses to touch an existing table
+    export_to_sqlite(sample_df.iloc[:2], db_path)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cleaned_data").fetchone()[0] == 2
+    with pytest.raises(ValueError, match="already exists"):
+        export_to_sqlite(sample_df, db_path, if_exists="fail")
+
+##################################################
+
+# Test case for reading and validating the sqlite section of the config
+def test_sqlite_options():
+    assert sqlite_options({}) == {"batch_size": 50_000, "indexes": []}
+    options = sqlite_options({"sqlite": {"mode": "incremental", "primary_key": "UI_Key"}})
+    assert options["primary_key"] == "UI_Key" and options["delete_missing"] is False
+    with pytest.raises(ValueError, match="primary_key"):
+        sqlite_options({"sqlite": {"mode": "incremental"}})
+    options = sqlite_options({"sqlite": {"batch_size": 10, "indexes": ["Zip", ["Agency", "Zip"]]}})
+    assert options == {"batch_size": 10, "indexes": [["Zip"], ["Agency", "Zip"]]}
+    with pytest.raises(ValueError):
+        sqlite_options({"sqlite": {"batch_size": 0}})
+    with pytest.raises(ValueError):
+        sqlite_options({"sqlite": {"indexes": [{"columns": "Zip"}]}})
+
+##################################################
+
+# Test case for incremental mode only writing new and changed rows
+def test_incremental_upsert(tmp_path):
+    db_path = str(tmp_path / "incremental.db")
+    options = {"mode": "incremental", "primary_key": "UI_Key"}
+
+    # A table from a full export is rebuilt once for incremental mode
+    export_to_sqlite(sample_df, db_path)
+    stats = export_to_sqlite(sample_df, db_path, **options)
+    assert stats == {"inserted": 3, "updated": 0, "unchanged": 0, "deleted": 0, "rebuilt": True}
+
+    # Re-running with the same data writes nothing
+    stats = export_to_sqlite(sample_df, db_path, **options)
+    assert stats == {"inserted": 0, "updated": 0, "unchanged": 3, "deleted": 0, "rebuilt": False}
+
+    # One changed row, one new row, and one row gone from the input
+    next_day = pd.DataFrame({
+        "UI_Key": [65070824, 65069274, 65099999],
+        "Score": [1.5, 2.0, 4.0],
+        "Agency": pd.Categorical(["Nypd", "Dsny", "Hpd"]),
+        "Complaint Type": ["Noise - Commercial", None, "Heat"],
+        "Zip": [11420, "Not Specified", 10001],
+    })
+    stats = export_to_sqlite(next_day, db_path, delete_missing=True, **options)
+    assert stats == {"inserted": 1, "updated": 1, "unchanged": 1, "deleted": 1, "rebuilt": False}
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute('SELECT "UI_Key", "Score", "Agency" FROM cleaned_data ORDER BY "UI_Key"').fetchall()
+    assert rows == [(65069274, 2.0, "Dsny"), (65070824, 1.5, "Nypd"), (65099999, 4.0, "Hpd")]
+
+    # Duplicate keys would make the upsert ambiguous
+    with pytest.raises(ValueError, match="duplicate"):
+        export_to_sqlite(pd.concat([next_day, next_day]), db_path, **options)
+
+# Test case for unchanged rows staying unchanged when their columns are read with other dtypes
+def test_incremental_hash_ignores_dtypes(tmp_path):
+    db_path = str(tmp_path / "dtypes.db")
+    options = {"mode": "incremental", "primary_key": "UI_Key"}
+    export_to_sqlite(sample_df, db_path, **options)
+    # The same values as object columns, as a chunk read with other nulls would hold them
+    retyped = sample_df.astype({"UI_Key": object, "Agency": object})
+    stats = export_to_sqlite(retyped, db_path, **options)
+    assert stats == {"inserted": 0, "updated": 0, "unchanged": 3, "deleted": 0, "rebuilt": False}
+
+##################################################
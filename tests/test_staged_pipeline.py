@@ -0,0 +1,151 @@
+"""
+Test cases for the staged (pipelined) pipeline.
+Verifies that a pipelined streaming run writes the same outputs and records the
+same changes as a plain one, that the queues hold back a fast reader, and that
+an error in any stage stops every stage and is raised in the calling thread.
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import time
+import sqlite3
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+from normalizer.change_tracker import ChangeTracker
+from normalizer.config_loader import load_config
+from normalizer.instrumentation import RunMetrics
+from normalizer.pipeline import clean_csv_in_chunks
+from normalizer.staged_pipeline import StagedPipeline
+
+##################################################
+
+# Set the sample input and config used by every test
+SAMPLE_CSV_PATH = "data/1-CSV-Raw/test_input_sample.csv"
+CONFIG_PATH = "config/config.yaml"
+
+##################################################
+
+# Define a helper to run the streaming pipeline and return its CSV text, SQLite rows and change stats
+def run_chunks(tmp_path, label, input_csv=SAMPLE_CSV_PATH, **options):
+    output_path = tmp_path / f"{label}.csv"
+    db_path = tmp_path / f"{label}.db"
+    tracker = ChangeTracker()
+    result = clean_csv_in_chunks(input_csv, str(output_path), load_config(CONFIG_PATH), chunk_size=2,
+                                 db_path=str(db_path), tracker=tracker, **options)
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT * FROM cleaned_data").fetchall()
+    return output_path.read_text(encoding="utf-8"), rows, tracker.stats(), result
+
+##################################################
+
+# Test case for pipelined runs (with and without worker processes) matching a plain run
+def test_pipelined_output_matches_plain(tmp_path):
+    plain_csv, plain_rows, plain_stats, plain = run_chunks(tmp_path, "plain")
+    for workers in (1, 2):
+        metrics = RunMetrics()
+        csv_text, rows, stats, result = run_chunks(tmp_path, f"staged_{workers}", workers=workers,
+                                                   modes={"pipelined": True, "queue_size": 1}, metrics=metrics)
+        assert csv_text == plain_csv
+        assert rows == plain_rows
+        assert stats == plain_stats
+        assert result["rows"] == plain["rows"]
+        assert result["change_counts"] == plain["change_counts"]
+        assert metrics.stages["write_csv"]["calls"] == metrics.stages["clean"]["calls"]
+
+# Test case for a pipelined run over an input with no rows still writing the header
+def test_pipelined_empty_input(tmp_path):
+    empty_csv = tmp_path / "empty.csv"
+    empty_csv.write_text("A,B\n", encoding="utf-8")
+    csv_text, rows, _, result = run_chunks(tmp_path, "empty", input_csv=str(empty_csv),
+                                           modes={"pipelined": True})
+    assert csv_text == "A,B\n"
+    assert rows == [] and result["rows"] == 0
+
+##################################################
+
+# Test case for the bounded queue holding back a reader that is faster than the consumer
+def test_backpressure():
+    produced = []
+    def source():
+        for n in range(20):
+            produced.append(n)
+            yield n
+
+    with StagedPipeline(queue_size=1) as staged:
+        items = staged.read(source())
+        assert next(items) == 0
+        time.sleep(0.3)
+        # One item taken, one in the queue, and one read but waiting to be queued
+        assert len(produced) <= 3
+        assert list(items) == list(range(1, 20))
+
+# Test case for every writer receiving every chunk in order
+def test_writers_get_every_chunk():
+    written = {"a": [], "b": []}
+    with StagedPipeline(queue_size=1) as staged:
+        staged.add_writer("a", written["a"].append)
+        staged.add_writer("b", written["b"].append)
+        for chunk in staged.read(range(10)):
+            staged.send(chunk)
+    assert written == {"a": list(range(10)), "b": list(range(10))}
+
+##################################################
+
+# Define a writer that fails on its third chunk
+def failing_writer(chunk):
+    if chunk == 2:
+        raise ValueError("disk full")
+
+# Test case for a writer's error stopping the run and being raised in the calling thread
+def test_writer_error_propagates():
+    staged = StagedPipeline(queue_size=1)
+    staged.add_writer("fails", failing_writer)
+    with pytest.raises(ValueError, match="disk full"):
+        with staged:
+            for chunk in staged.read(range(1000)):
+                staged.send(chunk)
+    assert not any(thread.is_alive() for thread in staged.threads)
+
+# Test case for a reader's error being raised to the consumer
+def test_reader_error_propagates():
+    def source():
+        yield 1
+        raise OSError("input went away")
+
+    staged = StagedPipeline()
+    with pytest.raises(OSError, match="input went away"):
+        with staged:
+            list(staged.read(source()))
+
+# Test case for an error in the calling thread stopping the reader and writers
+def test_abort_stops_threads():
+    staged = StagedPipeline(queue_size=1)
+    staged.add_writer("slow", lambda chunk: time.sleep(0.01))
+    with pytest.raises(RuntimeError):
+        with staged:
+            for chunk in staged.read(range(1000)):
+                staged.send(chunk)
+                if chunk == 5:
+                    raise RuntimeError("cleaning failed")
+    assert not any(thread.is_alive() for thread in staged.threads)
+
+# Define a change tracker that fails on the second chunk, while the writer threads are busy
+class FailingTracker(ChangeTracker):
+    def record(self, original, cleaned, batch):
+        if self.rows:
+            raise ValueError("tracking failed")
+        super().record(original, cleaned, batch)
+
+# Test case for a failure mid-run stopping the writer threads
+def test_pipelined_run_failure(tmp_path):
+    before = threading.active_count()
+    with pytest.raises(ValueError, match="tracking failed"):
+        clean_csv_in_chunks(SAMPLE_CSV_PATH, str(tmp_path / "out.csv"), load_config(CONFIG_PATH), chunk_size=2,
+                            db_path=str(tmp_path / "out.db"), tracker=FailingTracker(), modes={"pipelined": True})
+    assert threading.active_count() == before
+    with pytest.raises(ValueError):
+        StagedPipeline(queue_size=0)
+
+##################################################
@@ -0,0 +1,60 @@
+"""
+Test cases for the startup time of the command-line entry points.
+Orchestration scripts call the dnt CLI thousands of times a day, so importing
+it must stay cheap.  Runs the interpreter with -X importtime and checks that
+the CLI module loads within its time budget, and that --help, version and the
+main.py flag parsing never import the heavy modules (pandas, numpy, yaml,
+jinja2, sqlite3, pyarrow, sqlalchemy).
+"""
+
+# Import necessary libraries and set path to normalizer module
+import os
+import sys
+import subprocess
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from normalizer.cli import COLUMNAR_FORMATS
+from normalizer.columnar_exporter import FORMAT_EXTENSIONS
+
+##################################################
+
+# Budget for importing normalizer.cli, in microseconds (about 20 ms when measured, with headroom for slow machines)
+CLI_IMPORT_BUDGET_US = 100_000
+
+# Modules that must not be imported just to start the CLI
+HEAVY_MODULES = {"pandas", "numpy", "yaml", "jinja2", "sqlite3", "pyarrow", "sqlalchemy", "psycopg2"}
+
+##################################################
+
+# Define a helper to run Python with -X importtime and return the imported modules and their cumulative times
+def import_times(*args):
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+##################################################
+
+# Test case for the CLI module loading within its budget and without the heavy modules
+def test_cli_import_budget():
+    times = import_times("-c", "import normalizer.cli")
+    assert not HEAVY_MODULES & set(times), sorted(HEAVY_MODULES & set(times))
+    assert times["normalizer.cli"] < CLI_IMPORT_BUDGET_US, f"normalizer.cli took {times['normalizer.cli']} us"
+
+# Test case for --help and version returning without importing the heavy modules
+def test_help_and_version_stay_light():
+    for args in (["-m", "normalizer.cli", "--help"], ["-m", "normalizer.cli", "batch", "--help"],
+                 ["-m", "normalizer.cli", "version"], ["main.py", "--help"]):
+        loaded = HEAVY_MODULES & set(import_times(*args))
+        assert not loaded, f"{' '.join(args)} imported {sorted(loaded)}"
+
+# Test case for the CLI's copy of the columnar formats matching the exporter
+def test_columnar_formats_match_exporter():
+    assert sorted(COLUMNAR_FORMATS) == sorted(FORMAT_EXTENSIONS)
+
+##################################################